@@ -0,0 +1,180 @@
+#! python3
+
+# Copyright Tomer Figenblat.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Python script for benchmarking the parsing of broadcast rates by the bridge."""
+
+import asyncio
+from argparse import ArgumentParser, RawDescriptionHelpFormatter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+from aioswitcher.bridge import SwitcherBridge
+from aioswitcher.device import SwitcherBase
+
+# a Switcher V2 broadcast, the device id is replaced for every datagram fed
+_DATAGRAM = bytes.fromhex(
+    "fef0a500023c020000000000841201000000aaaaaa0000007ff6c26000000000000000000000"
+    "f0fe03004d7920537769746368657220426f696c6572000000000000000000000000000001a7"
+    "c0a8012112a1a21abc1a000000000000000002537769746368657220426f696c657220434638"
+    "42000000000000000000000000020400001c000000000000004b9589c0000000000000000000"
+    "000000302a00000102aa3461dd"
+)
+
+# the datagrams of a second are fed in slices, as read by the event loop
+_SLICES_PER_SECOND = 100
+
+_examples = """Executing this script will feed broadcast datagrams to the bridge at steady
+rates for a second each, parsing them in the event loop and in an executor, and print
+for each rate in datagrams per second:
+    stall - the longest period the event loop was blocked, in milliseconds.
+    dispatch - the mean period from feeding a datagram to dispatching its device,
+        in milliseconds.
+The crossover is the smallest rate from which the executor stalls the loop less, pass
+it as the offload_threshold of the bridge.
+
+Benchmark the default rates with a thread pool:
+    python benchmark_bridge_parsing.py\n
+Benchmark specific rates with a process pool of 4 workers:
+    python benchmark_bridge_parsing.py -e process -w 4 -r 1000 10000 50000\n
+"""  # noqa E501
+
+parser = ArgumentParser(
+    description="Benchmark parsing broadcast rates in the event loop and an executor",
+    epilog=_examples,
+    formatter_class=RawDescriptionHelpFormatter,
+)
+parser.add_argument(
+    "-r",
+    "--rates",
+    help="the rates to benchmark, in datagrams per second",
+    type=int,
+    nargs="+",
+    default=[100, 500, 1000, 2500, 5000, 10000, 25000],
+)
+parser.add_argument(
+    "-e",
+    "--executor",
+    choices=["thread", "process"],
+    help="the executor to parse in, defaults to thread",
+    default="thread",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    help="the number of executor workers, defaults to 1",
+    type=int,
+    default=1,
+)
+
+
+def _datagrams(count: int) -> List[bytes]:
+    """Return datagrams from distinct devices."""
+    return [
+        _DATAGRAM[:18] + index.to_bytes(3, "big") + _DATAGRAM[21:]
+        for index in range(count)
+    ]
+
+
+async def _measure(rate: int, executor: Optional[Executor]) -> Tuple[float, float]:
+    """Feed a second of datagrams, return the longest stall and the mean dispatch."""
+    done = asyncio.Event()
+    received = 0
+    stall = 0.0
+
+    def on_device(device: SwitcherBase) -> None:
+        nonlocal received
+        received += 1
+        if received == rate:
+            done.set()
+
+    async def probe() -> None:
+        nonlocal stall
+        while True:
+            started = perf_counter()
+            await asyncio.sleep(0)
+            stall = max(stall, perf_counter() - started)
+
+    # every datagram is parsed in the executor when one is used
+    bridge = SwitcherBridge(
+        on_device, executor=executor, offload_threshold=0, max_in_flight=rate
+    )
+    datagrams = _datagrams(rate)
+    prober = asyncio.create_task(probe())
+    await asyncio.sleep(0)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for index in range(_SLICES_PER_SECOND):
+        # feed a slice as if its datagrams were read in a single loop iteration
+        for datagram in datagrams[index::_SLICES_PER_SECOND]:
+            bridge._handle_datagram(datagram)
+        await asyncio.sleep(
+            max(0, started + (index + 1) / _SLICES_PER_SECOND - loop.time())
+        )
+    await done.wait()
+
+    prober.cancel()
+    await bridge.stop()
+    return stall * 1000, bridge.dispatch_latency.mean * 1000
+
+
+async def benchmark(rates: List[int], executor: Executor) -> None:
+    """Benchmark the rates and print the results."""
+    # warm up the executor workers
+    await _measure(min(rates), executor)
+
+    crossover = None
+    headers = ("loop stall", "loop dispatch", "pool stall", "pool dispatch")
+    print(f"{'rate':>8}" + "".join(f" {header:>13}" for header in headers))
+    for rate in sorted(rates):
+        inline_stall, inline_dispatch = await _measure(rate, None)
+        offload_stall, offload_dispatch = await _measure(rate, executor)
+        print(
+            f"{rate:>8} {inline_stall:>13.2f} {inline_dispatch:>13.2f}"
+            f" {offload_stall:>13.2f} {offload_dispatch:>13.2f}"
+        )
+        # the crossover holds only if the executor stalls less for all higher rates
+        if offload_stall >= inline_stall:
+            crossover = None
+        elif crossover is None:
+            crossover = rate
+
+    if crossover is None:
+        print("parsing in the event loop stalled it less for all the rates")
+    else:
+        print(f"crossover at {crossover} datagrams per second")
+        print(f"use offload_threshold={crossover}")
+
+
+def main() -> None:
+    """Run the bridge parsing benchmark script."""
+    args = parser.parse_args()
+    executor: Executor = (
+        ProcessPoolExecutor(args.workers)
+        if args.executor == "process"
+        else ThreadPoolExecutor(args.workers)
+    )
+
+    try:
+        with executor:
+            asyncio.run(benchmark(args.rates, executor))
+    except KeyboardInterrupt:
+        exit()
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,7 @@
 
 name = "aioswitcher"
 
-__all__ = ["api", "bridge", "device", "schedule"]
+__all__ = ["api", "bridge", "device", "registry", "schedule"]
 
 
 # the following enum should be under the schedule module
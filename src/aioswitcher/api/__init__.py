@@ -14,14 +14,29 @@
 
 """Switcher integration TCP socket API module."""
 
-from asyncio import open_connection
-from binascii import unhexlify
+from asyncio import Lock, open_connection, timeout
 from datetime import timedelta
 from enum import Enum, unique
+from functools import wraps
 from logging import getLogger
 from socket import AF_INET
+from struct import unpack_from
+from time import monotonic
 from types import TracebackType
-from typing import Optional, Set, Tuple, Type, Union, final
+from typing import (
+    Any,
+    Callable,
+    Concatenate,
+    Coroutine,
+    Optional,
+    ParamSpec,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    final,
+)
 
 from ..device import (
     DeviceState,
@@ -32,18 +47,15 @@
     ThermostatSwing,
 )
 from ..device.tools import (
-    convert_token_to_packet,
-    current_timestamp_to_hexadecimal,
+    convert_token_to_bytes,
+    current_timestamp_to_bytes,
     get_light_api_packet_index,
     get_shutter_api_packet_index,
-    minutes_to_hexadecimal_seconds,
-    set_message_length,
-    sign_packet_with_crc_key,
-    string_to_hexadecimale_device_name,
-    timedelta_to_hexadecimal_seconds,
+    string_to_device_name,
+    timedelta_to_seconds,
 )
 from ..schedule import Days
-from ..schedule.tools import time_to_hexadecimal_timestamp, weekdays_to_hexadecimal
+from ..schedule.tools import time_to_timestamp, weekdays_to_bit_summary
 from . import packets
 from .messages import (
     SwitcherBaseResponse,
@@ -54,7 +66,7 @@
     SwitcherStateResponse,
     SwitcherThermostatStateResponse,
 )
-from .remotes import SwitcherBreezeRemote
+from .remotes import SwitcherBreezeCommand, SwitcherBreezeRemote
 
 logger = getLogger(__name__)
 
@@ -62,6 +74,17 @@
 SWITCHER_TCP_PORT_TYPE1 = 9957
 # Type 2 devices: Breeze, Runners
 SWITCHER_TCP_PORT_TYPE2 = 10000
+# Default lifetime of a cached login session on an open connection
+SWITCHER_SESSION_LIFETIME = timedelta(minutes=5)
+MESSAGE_MAGIC = packets.MESSAGE_MAGIC
+MESSAGE_HEADER_LENGTH = 4
+READ_CHUNK_SIZE = 1024
+# Default seconds allowed for connecting to the device and for reading a response
+SWITCHER_CONNECT_TIMEOUT = 10.0
+SWITCHER_READ_TIMEOUT = 10.0
+
+P = ParamSpec("P")
+R = TypeVar("R")
 
 
 @unique
@@ -72,6 +95,64 @@ class Command(Enum):
     OFF = "0"
 
 
+# Byte values of the enum members as sent in the packets
+_COMMAND_BYTES = {member: int(member.value, 16) for member in Command}
+_STATE_BYTES = {member: int(member.value, 16) for member in DeviceState}
+_MODE_BYTES = {member: int(member.value, 16) for member in ThermostatMode}
+_FAN_LEVEL_BYTES = {member: int(member.value, 16) for member in ThermostatFanLevel}
+_SWING_BYTES = {member: int(member.value, 16) for member in ThermostatSwing}
+_CHILD_LOCK_BYTES = {member: int(member.value, 16) for member in ShutterChildLock}
+
+
+class SwitcherTimeoutError(TimeoutError):
+    """Raised when the device doesn't respond within the configured deadline."""
+
+
+def _with_deadline(
+    func: Callable[Concatenate["SwitcherApi", P], Coroutine[Any, Any, R]]
+) -> Callable[Concatenate["SwitcherApi", P], Coroutine[Any, Any, R]]:
+    """Apply the total operation deadline to a ``SwitcherApi`` request method.
+
+    When the deadline passes, ``SwitcherTimeoutError`` is raised. The connection is
+    closed by ``_send_packet`` only if the deadline interrupted reading a response,
+    a request still queued for the connection leaves it open for the others.
+    """
+
+    @wraps(func)
+    async def wrapper(self: "SwitcherApi", /, *args: P.args, **kwargs: P.kwargs) -> R:
+        try:
+            async with timeout(self._operation_timeout):
+                return await func(self, *args, **kwargs)
+        except SwitcherTimeoutError:
+            raise
+        except TimeoutError as exc:
+            raise SwitcherTimeoutError(f"{func.__name__} request timed out") from exc
+
+    return wrapper
+
+
+def _get_frame_length(buffer: bytearray) -> Optional[int]:
+    """Return the length of the frame at the head of the buffer.
+
+    Args:
+        buffer: the bytes received from the device and not consumed yet.
+
+    Returns:
+        The length of the framed message, 0 if the buffer doesn't hold a valid
+        header, the buffered bytes should then be treated as a single message,
+        or None if more bytes are needed for reading the header.
+
+    """
+    if len(buffer) < MESSAGE_HEADER_LENGTH:
+        return (
+            None if buffer[: len(MESSAGE_MAGIC)] == MESSAGE_MAGIC[: len(buffer)] else 0
+        )
+    if buffer[: len(MESSAGE_MAGIC)] != MESSAGE_MAGIC:
+        return 0
+    length: int = unpack_from("<H", buffer, len(MESSAGE_MAGIC))[0]
+    return length if length >= MESSAGE_HEADER_LENGTH else 0
+
+
 @final
 class SwitcherApi:
     """Switcher TCP based API.
@@ -81,6 +162,13 @@ class SwitcherApi:
         ip_address: the ip address assigned to the device.
         device_id: the id of the desired device.
         device_key: the login key of the device.
+        token: the token of the user, needed only for token based devices.
+        session_lifetime: how long a login session is reused on an open connection,
+            use a zero timedelta to log in before every request.
+        connect_timeout: seconds allowed for connecting, None for no deadline.
+        read_timeout: seconds allowed for reading a response, None for no deadline.
+        operation_timeout: seconds allowed for a request method as a whole,
+            including logging in, None for no deadline.
 
     """
 
@@ -91,27 +179,66 @@ def __init__(
         device_id: str,
         device_key: str,
         token: Union[str, None] = None,
+        session_lifetime: timedelta = SWITCHER_SESSION_LIFETIME,
+        connect_timeout: Optional[float] = SWITCHER_CONNECT_TIMEOUT,
+        read_timeout: Optional[float] = SWITCHER_READ_TIMEOUT,
+        operation_timeout: Optional[float] = None,
     ) -> None:
         """Initialize the Switcher TCP connection API."""
         self._device_type = device_type
         self._ip_address = ip_address
         self._device_id = device_id
         self._device_key = device_key
+        # the id and key as sent in the packets
+        self._device_id_bytes = bytes.fromhex(device_id)
+        self._device_key_bytes = bytes.fromhex(device_key)
         self._port = SWITCHER_TCP_PORT_TYPE1
         if device_type.protocol_type == 2:
             self._port = SWITCHER_TCP_PORT_TYPE2
         self._connected = False
-        self._token = None
+        self._session_lifetime = session_lifetime.total_seconds()
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._operation_timeout = operation_timeout
+        self._session: Optional[Tuple[bytes, SwitcherLoginResponse]] = None
+        self._session_expires = 0.0
+        self._buffer = bytearray()
+        # serialize requests so each response is paired with its own request
+        self._request_lock = Lock()
+        self._login_lock = Lock()
+        self._token: Optional[bytes] = None
         if self._device_type.token_needed:
             if not token:
                 raise RuntimeError("A token is needed but is missing")
-            self._token = convert_token_to_packet(str(token))
+            self._token = convert_token_to_bytes(str(token))
 
     @property
     def connected(self) -> bool:
         """Return true if api is connected."""
         return self._connected
 
+    @property
+    def closing(self) -> bool:
+        """Return true if the connection was closed or half-closed by either side."""
+        if not self._connected:
+            return True
+        return bool(self._reader.at_eof() or self._writer.is_closing())
+
+    @property
+    def device_id(self) -> str:
+        """Return the id of the device."""
+        return self._device_id
+
+    @property
+    def ip_address(self) -> str:
+        """Return the ip address of the device."""
+        return self._ip_address
+
+    @property
+    def port(self) -> int:
+        """Return the tcp port of the device."""
+        return self._port
+
     async def __aenter__(self) -> "SwitcherApi":
         """Enter SwitcherApi asynchronous context manager.
 
@@ -134,13 +261,19 @@ async def __aexit__(
     async def connect(self) -> None:
         """Connect to asynchronous socket and get reader and writer object."""
         logger.info("connecting to the switcher device")
-        self._reader, self._writer = await open_connection(
-            host=self._ip_address,
-            port=self._port,
-            family=AF_INET,
-        )
+        try:
+            async with timeout(self._connect_timeout):
+                self._reader, self._writer = await open_connection(
+                    host=self._ip_address,
+                    port=self._port,
+                    family=AF_INET,
+                )
+        except TimeoutError as exc:
+            raise SwitcherTimeoutError("connecting to the device timed out") from exc
 
         self._connected = True
+        self._buffer.clear()
+        self._invalidate_session()
         logger.info("switcher device connected")
 
     async def disconnect(self) -> None:
@@ -152,59 +285,154 @@ async def disconnect(self) -> None:
         else:
             logger.info("switcher device not connected")
         self._connected = False
+        self._buffer.clear()
+        self._invalidate_session()
+
+    def _abort(self) -> None:
+        """Close the connection after a request was interrupted mid-way."""
+        if self._connected:
+            logger.info("closing the connection to the switcher device")
+            self._writer.close()
+        self._connected = False
+        self._buffer.clear()
+        self._invalidate_session()
 
-    async def _send_packet(self, packet_id: str, packet: str) -> bytes:
-        """Sign and send a packet, then read the response.
+    def _invalidate_session(self) -> None:
+        """Drop the cached login session, the next request will log in again."""
+        self._session = None
+        self._session_expires = 0.0
+
+    async def _send_packet(self, packet_id: str, packet: bytes) -> bytes:
+        """Send a signed packet, then read the response.
+
+        Concurrent calls are queued, each packet is written only after the response
+        for the previous one was read, so responses are never mixed up. If reading
+        the response is interrupted, e.g. by a timeout or a cancellation, the
+        connection is closed, so the unread response isn't read by the next request,
+        which fails until reconnecting.
 
         Args:
             packet_id (str): The identifier for the packet being sent.
-            packet (str): The packet to be sent.
+            packet (bytes): The packet to be sent, built by a ``PacketSchema``.
 
         Returns:
             bytes: The response from the device.
-        """
-        packet = set_message_length(packet)
-        signed_packet = sign_packet_with_crc_key(packet)
 
-        logger.debug(f"sending a {packet_id} packet")
-        self._writer.write(unhexlify(signed_packet))
-        response = await self._reader.read(1024)
+        Raises:
+            ConnectionError: if not connected, e.g. after an interrupted request
+                closed the connection.
+        """
+        async with self._request_lock:
+            if not self._connected:
+                raise ConnectionError("not connected")
+            logger.debug(f"sending a {packet_id} packet")
+            self._writer.write(packet)
+            try:
+                async with timeout(self._read_timeout):
+                    response = await self._read_frame()
+            except TimeoutError as exc:
+                self._abort()
+                raise SwitcherTimeoutError(
+                    f"reading the {packet_id} response timed out"
+                ) from exc
+            except BaseException:
+                self._abort()
+                raise
+        if not response:
+            # an empty response means the device rejected the request,
+            # don't trust the current session for the upcoming requests
+            self._invalidate_session()
         return response
 
-    async def _login(self) -> Tuple[str, SwitcherLoginResponse]:
+    async def _read_frame(self) -> bytes:
+        """Read a single message from the device.
+
+        The message length is taken from the message header, bytes received past
+        the end of the message are kept for the next response. Messages without a
+        valid header are returned as received.
+
+        Returns:
+            bytes: The message, empty if the connection was closed.
+        """
+        while True:
+            frame_length = _get_frame_length(self._buffer)
+            if frame_length is not None and len(self._buffer) >= frame_length > 0:
+                frame = bytes(self._buffer[:frame_length])
+                del self._buffer[:frame_length]
+                return frame
+            if frame_length == 0 and self._buffer:
+                frame = bytes(self._buffer)
+                self._buffer.clear()
+                return frame
+
+            chunk = await self._reader.read(READ_CHUNK_SIZE)
+            if not chunk:
+                frame = bytes(self._buffer)
+                self._buffer.clear()
+                return frame
+            self._buffer.extend(chunk)
+
+    async def _login(self) -> Tuple[bytes, SwitcherLoginResponse]:
         """Use for sending the login packet to the device.
 
+        The session is cached and reused for subsequent requests on the same
+        connection until it expires or the device rejects it.
+
         Returns:
-            A tuple of the hex timestamp and an instance of ``SwitcherLoginResponse``.
+            A tuple of the packed timestamp and an instance of
+            ``SwitcherLoginResponse``.
 
         Note:
             This is a private function used by other functions, do not call this
             function directly.
 
         """
-        timestamp = current_timestamp_to_hexadecimal()
-        if bool(self._token):
-            packet = packets.LOGIN_TOKEN_PACKET_TYPE2.format(
-                self._token, timestamp, self._device_id
+        if self._session and monotonic() < self._session_expires:
+            logger.debug("reusing the current login session")
+            return self._session
+
+        async with self._login_lock:
+            # another request might have logged in while waiting for the lock
+            if self._session and monotonic() < self._session_expires:
+                return self._session
+            return await self._send_login()
+
+    async def _send_login(self) -> Tuple[bytes, SwitcherLoginResponse]:
+        """Send the login packets to the device and cache the session."""
+        timestamp = current_timestamp_to_bytes()
+        if self._token:
+            packet = packets.LOGIN_TOKEN_TYPE2_SCHEMA.build(
+                token=self._token,
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
             )
         elif (
             self._device_type == DeviceType.BREEZE
             or self._device_type == DeviceType.RUNNER
             or self._device_type == DeviceType.RUNNER_MINI
         ):
-            packet = packets.LOGIN_PACKET_TYPE2.format(timestamp, self._device_id)
+            packet = packets.LOGIN_TYPE2_SCHEMA.build(
+                timestamp=timestamp, device_id=self._device_id_bytes
+            )
         else:
-            packet = packets.LOGIN_PACKET_TYPE1.format(timestamp, self._device_key)
+            packet = packets.LOGIN_TYPE1_SCHEMA.build(
+                timestamp=timestamp, device_key=self._device_key_bytes
+            )
 
         response = await self._send_packet("login", packet)
 
-        if bool(self._token):
-            packet = packets.LOGIN2_TOKEN_PACKET_TYPE2.format(
-                self._device_id, timestamp, self._token
+        if self._token:
+            packet = packets.LOGIN2_TOKEN_TYPE2_SCHEMA.build(
+                device_id=self._device_id_bytes, timestamp=timestamp, token=self._token
             )
             response = await self._send_packet("login2", packet)
-        return timestamp, SwitcherLoginResponse(response)
+        login_resp = SwitcherLoginResponse(response)
+        if login_resp.successful and self._session_lifetime > 0:
+            self._session = (timestamp, login_resp)
+            self._session_expires = monotonic() + self._session_lifetime
+        return timestamp, login_resp
 
+    @_with_deadline
     async def get_state(self) -> SwitcherStateResponse:
         """Use for sending the get state packet to the device.
 
@@ -214,8 +442,10 @@ async def get_state(self) -> SwitcherStateResponse:
         """
         timestamp, login_resp = await self._login()
         if login_resp.successful:
-            packet = packets.GET_STATE_PACKET_TYPE1.format(
-                login_resp.session_id, timestamp, self._device_id
+            packet = packets.GET_STATE_TYPE1_SCHEMA.build(
+                session_id=login_resp.session_id_bytes,
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
             )
             state_resp = await self._send_packet("get state", packet)
             try:
@@ -223,9 +453,11 @@ async def get_state(self) -> SwitcherStateResponse:
                 if response.successful:
                     return response
             except (KeyError, ValueError) as ve:
+                self._invalidate_session()
                 raise RuntimeError("get state request was not successful") from ve
         raise RuntimeError("login request was not successful")
 
+    @_with_deadline
     async def control_device(
         self, command: Command, minutes: int = 0
     ) -> SwitcherBaseResponse:
@@ -240,21 +472,17 @@ async def control_device(
 
         """
         timestamp, login_resp = await self._login()
-        timer = (
-            minutes_to_hexadecimal_seconds(minutes)
-            if minutes > 0
-            else packets.NO_TIMER_REQUESTED
-        )
-        packet = packets.SEND_CONTROL_PACKET.format(
-            login_resp.session_id,
-            timestamp,
-            self._device_id,
-            command.value,
-            timer,
+        packet = packets.SEND_CONTROL_SCHEMA.build(
+            session_id=login_resp.session_id_bytes,
+            timestamp=timestamp,
+            device_id=self._device_id_bytes,
+            command=_COMMAND_BYTES[command],
+            timer=minutes * 60 if minutes > 0 else 0,
         )
         response = await self._send_packet("control", packet)
         return SwitcherBaseResponse(response)
 
+    @_with_deadline
     async def set_auto_shutdown(self, full_time: timedelta) -> SwitcherBaseResponse:
         """Use for sending the set auto-off packet to the device.
 
@@ -267,16 +495,16 @@ async def set_auto_shutdown(self, full_time: timedelta) -> SwitcherBaseResponse:
 
         """
         timestamp, login_resp = await self._login()
-        auto_shutdown = timedelta_to_hexadecimal_seconds(full_time)
-        packet = packets.SET_AUTO_OFF_SET_PACKET.format(
-            login_resp.session_id,
-            timestamp,
-            self._device_id,
-            auto_shutdown,
+        packet = packets.SET_AUTO_OFF_SET_SCHEMA.build(
+            session_id=login_resp.session_id_bytes,
+            timestamp=timestamp,
+            device_id=self._device_id_bytes,
+            auto_off=timedelta_to_seconds(full_time),
         )
         response = await self._send_packet("set auto shutdown", packet)
         return SwitcherBaseResponse(response)
 
+    @_with_deadline
     async def set_device_name(self, name: str) -> SwitcherBaseResponse:
         """Use for sending the set name packet to the device.
 
@@ -288,16 +516,16 @@ async def set_device_name(self, name: str) -> SwitcherBaseResponse:
 
         """
         timestamp, login_resp = await self._login()
-        device_name = string_to_hexadecimale_device_name(name)
-        packet = packets.UPDATE_DEVICE_NAME_PACKET.format(
-            login_resp.session_id,
-            timestamp,
-            self._device_id,
-            device_name,
+        packet = packets.UPDATE_DEVICE_NAME_SCHEMA.build(
+            session_id=login_resp.session_id_bytes,
+            timestamp=timestamp,
+            device_id=self._device_id_bytes,
+            name=string_to_device_name(name),
         )
         response = await self._send_packet("set name", packet)
         return SwitcherBaseResponse(response)
 
+    @_with_deadline
     async def get_schedules(self) -> SwitcherGetSchedulesResponse:
         """Use for retrieval of the schedules from the device.
 
@@ -306,14 +534,15 @@ async def get_schedules(self) -> SwitcherGetSchedulesResponse:
 
         """
         timestamp, login_resp = await self._login()
-        packet = packets.GET_SCHEDULES_PACKET.format(
-            login_resp.session_id,
-            timestamp,
-            self._device_id,
+        packet = packets.GET_SCHEDULES_SCHEMA.build(
+            session_id=login_resp.session_id_bytes,
+            timestamp=timestamp,
+            device_id=self._device_id_bytes,
         )
         response = await self._send_packet("get schedules", packet)
         return SwitcherGetSchedulesResponse(response)
 
+    @_with_deadline
     async def delete_schedule(self, schedule_id: str) -> SwitcherBaseResponse:
         """Use for deleting a schedule from the device.
 
@@ -327,12 +556,16 @@ async def delete_schedule(self, schedule_id: str) -> SwitcherBaseResponse:
 
         """
         timestamp, login_resp = await self._login()
-        packet = packets.DELETE_SCHEDULE_PACKET.format(
-            login_resp.session_id, timestamp, self._device_id, schedule_id
+        packet = packets.DELETE_SCHEDULE_SCHEMA.build(
+            session_id=login_resp.session_id_bytes,
+            timestamp=timestamp,
+            device_id=self._device_id_bytes,
+            schedule_id=int(schedule_id, 16),
         )
         response = await self._send_packet("delete schedule", packet)
         return SwitcherBaseResponse(response)
 
+    @_with_deadline
     async def create_schedule(
         self, start_time: str, end_time: str, days: Set[Days] = set()
     ) -> SwitcherBaseResponse:
@@ -348,26 +581,18 @@ async def create_schedule(
 
         """
         timestamp, login_resp = await self._login()
-
-        start_time_hex = time_to_hexadecimal_timestamp(start_time)
-        end_time_hex = time_to_hexadecimal_timestamp(end_time)
-        weekdays = (
-            weekdays_to_hexadecimal(days)
-            if len(days) > 0
-            else packets.NON_RECURRING_SCHEDULE
-        )
-        new_schedule = packets.SCHEDULE_CREATE_DATA_FORMAT.format(
-            weekdays, start_time_hex, end_time_hex
-        )
-        packet = packets.CREATE_SCHEDULE_PACKET.format(
-            login_resp.session_id,
-            timestamp,
-            self._device_id,
-            new_schedule,
+        packet = packets.CREATE_SCHEDULE_SCHEMA.build(
+            session_id=login_resp.session_id_bytes,
+            timestamp=timestamp,
+            device_id=self._device_id_bytes,
+            weekdays=weekdays_to_bit_summary(days) if len(days) > 0 else 0,
+            start_time=time_to_timestamp(start_time),
+            end_time=time_to_timestamp(end_time),
         )
         response = await self._send_packet("create schedule", packet)
         return SwitcherBaseResponse(response)
 
+    @_with_deadline
     async def control_breeze_device(
         self,
         remote: SwitcherBreezeRemote,
@@ -398,9 +623,7 @@ async def control_breeze_device(
             logger.error("Failed to log into device id %s", self._device_id)
             raise RuntimeError("login request was not successful")
 
-        logger.debug(
-            "logged in session_id=%s, timestamp=%s", login_resp.session_id, timestamp
-        )
+        logger.debug("logged in session_id=%s", login_resp.session_id)
 
         cmd_response: Union[SwitcherBaseResponse, None] = None
         if (
@@ -424,15 +647,15 @@ async def control_breeze_device(
             if remote._separated_swing_command:
                 set_swing = ThermostatSwing.OFF
             if update_state:
-                packet = packets.BREEZE_UPDATE_STATUS_PACKET.format(
-                    login_resp.session_id,
-                    timestamp,
-                    self._device_id,
-                    state.value,
-                    mode.value,
-                    target_temp,
-                    fan_level.value,
-                    set_swing.value,
+                packet = packets.BREEZE_UPDATE_STATUS_SCHEMA.build(
+                    session_id=login_resp.session_id_bytes,
+                    timestamp=timestamp,
+                    device_id=self._device_id_bytes,
+                    state=_STATE_BYTES[state],
+                    mode=_MODE_BYTES[mode],
+                    target_temp=target_temp,
+                    fan_swing=_FAN_LEVEL_BYTES[fan_level] << 4
+                    | _SWING_BYTES[set_swing],
                 )
                 response = await self._send_packet("set status", packet)
             else:
@@ -440,12 +663,8 @@ async def control_breeze_device(
                     state, mode, target_temp, fan_level, set_swing, current_state.state
                 )
 
-                packet = packets.BREEZE_COMMAND_PACKET.format(
-                    login_resp.session_id,
-                    timestamp,
-                    self._device_id,
-                    command.length,
-                    command.command,
+                packet = self._build_breeze_command(
+                    timestamp, login_resp.session_id_bytes, command
                 )
                 response = await self._send_packet("control", packet)
             cmd_response = SwitcherBaseResponse(response)
@@ -456,7 +675,7 @@ async def control_breeze_device(
         if remote._separated_swing_command and swing and not update_state:
             # if device is SPECIAL SWING device and user requested a swing change
             cmd_response = await self._control_breeze_swing_device(
-                timestamp, login_resp.session_id, remote, swing
+                timestamp, login_resp.session_id_bytes, remote, swing
             )
 
         if cmd_response:
@@ -465,8 +684,8 @@ async def control_breeze_device(
 
     async def _control_breeze_swing_device(
         self,
-        timestamp: str,
-        session_id: str,
+        timestamp: bytes,
+        session_id: bytes,
         remote: SwitcherBreezeRemote,
         swing: ThermostatSwing,
     ) -> SwitcherBaseResponse:
@@ -484,17 +703,25 @@ async def _control_breeze_swing_device(
         """
         logger.debug("about to send Breeze special swing command")
         command = remote.build_swing_command(swing)
-        packet = packets.BREEZE_COMMAND_PACKET.format(
-            session_id,
-            timestamp,
-            self._device_id,
-            command.length,
-            command.command,
-        )
+        packet = self._build_breeze_command(timestamp, session_id, command)
 
         response = await self._send_packet("control", packet)
         return SwitcherBaseResponse(response)
 
+    def _build_breeze_command(
+        self, timestamp: bytes, session_id: bytes, command: SwitcherBreezeCommand
+    ) -> bytes:
+        """Build the packet sending a Breeze remote command."""
+        command_bytes = bytes.fromhex(command.command)
+        return packets.BREEZE_COMMAND_SCHEMA.build(
+            session_id=session_id,
+            timestamp=timestamp,
+            device_id=self._device_id_bytes,
+            length=len(command_bytes),
+            command=command_bytes,
+        )
+
+    @_with_deadline
     async def stop_shutter(self, index: int = 0) -> SwitcherBaseResponse:
         """Use for stopping the shutter.
 
@@ -512,29 +739,27 @@ async def stop_shutter(self, index: int = 0) -> SwitcherBaseResponse:
             logger.error("Failed to log into device with id %s", self._device_id)
             raise RuntimeError("login request was not successful")
 
-        logger.debug(
-            "logged in session_id=%s, timestamp=%s", login_resp.session_id, timestamp
-        )
-
-        if bool(self._token):
-            command = "0000"
-            hex_pos = f"0{index_packet}{command}"
+        logger.debug("logged in session_id=%s", login_resp.session_id)
 
-            packet = packets.GENERAL_TOKEN_COMMAND.format(
-                timestamp,
-                self._device_id,
-                self._token,
-                packets.STOP_SHUTTER_PRECOMMAND,
-                hex_pos,
+        if self._token:
+            packet = packets.GENERAL_TOKEN_COMMAND_SCHEMA.build(
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
+                token=self._token,
+                precommand=packets.STOP_SHUTTER_PRECOMMAND_BYTES,
+                command=bytes((index_packet, 0, 0)),
             )
         else:
-            packet = packets.RUNNER_STOP_COMMAND.format(
-                login_resp.session_id, timestamp, self._device_id
+            packet = packets.RUNNER_STOP_SCHEMA.build(
+                session_id=login_resp.session_id_bytes,
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
             )
 
         response = await self._send_packet("stop control", packet)
         return SwitcherBaseResponse(response)
 
+    @_with_deadline
     async def set_position(
         self, position: int = 0, index: int = 0
     ) -> SwitcherBaseResponse:
@@ -549,7 +774,6 @@ async def set_position(
 
         """
         index_packet = get_shutter_api_packet_index(self._device_type, index)
-        hex_pos = "{0:0{1}x}".format(position, 2)
 
         logger.debug("about to send set position command")
         timestamp, login_resp = await self._login()
@@ -557,28 +781,28 @@ async def set_position(
             logger.error("Failed to log into device with id %s", self._device_id)
             raise RuntimeError("login request was not successful")
 
-        logger.debug(
-            "logged in session_id=%s, timestamp=%s", login_resp.session_id, timestamp
-        )
+        logger.debug("logged in session_id=%s", login_resp.session_id)
 
-        if bool(self._token):
-            hex_pos = f"0{index_packet}{hex_pos}"
-
-            packet = packets.GENERAL_TOKEN_COMMAND.format(
-                timestamp,
-                self._device_id,
-                self._token,
-                packets.SET_POSITION_PRECOMMAND,
-                hex_pos,
+        if self._token:
+            packet = packets.GENERAL_TOKEN_COMMAND_SCHEMA.build(
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
+                token=self._token,
+                precommand=packets.SET_POSITION_PRECOMMAND_BYTES,
+                command=bytes((index_packet, position)),
             )
         else:
-            packet = packets.RUNNER_SET_POSITION.format(
-                login_resp.session_id, timestamp, self._device_id, hex_pos
+            packet = packets.RUNNER_SET_POSITION_SCHEMA.build(
+                session_id=login_resp.session_id_bytes,
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
+                position=position,
             )
 
         response = await self._send_packet("control", packet)
         return SwitcherBaseResponse(response)
 
+    @_with_deadline
     async def set_shutter_child_lock(
         self, command: ShutterChildLock, index: int = 0
     ) -> SwitcherBaseResponse:
@@ -593,7 +817,6 @@ async def set_shutter_child_lock(
 
         """
         index_packet = get_shutter_api_packet_index(self._device_type, index)
-        hex_pos = command.value
 
         logger.debug("about to send set shutter child lock command")
         timestamp, login_resp = await self._login()
@@ -601,27 +824,28 @@ async def set_shutter_child_lock(
             logger.error("Failed to log into device with id %s", self._device_id)
             raise RuntimeError("login request was not successful")
 
-        logger.debug(
-            "logged in session_id=%s, timestamp=%s", login_resp.session_id, timestamp
-        )
+        logger.debug("logged in session_id=%s", login_resp.session_id)
 
-        if bool(self._token):
-            hex_pos = f"0{index_packet}{command.value}"
-            packet = packets.GENERAL_TOKEN_COMMAND.format(
-                timestamp,
-                self._device_id,
-                self._token,
-                packets.SET_CHILD_LOCK_PRECOMMAND,
-                hex_pos,
+        if self._token:
+            packet = packets.GENERAL_TOKEN_COMMAND_SCHEMA.build(
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
+                token=self._token,
+                precommand=packets.SET_CHILD_LOCK_PRECOMMAND_BYTES,
+                command=bytes((index_packet, _CHILD_LOCK_BYTES[command])),
             )
         else:
-            packet = packets.RUNNER_SET_CHILD_LOCK.format(
-                login_resp.session_id, timestamp, self._device_id, hex_pos
+            packet = packets.RUNNER_SET_CHILD_LOCK_SCHEMA.build(
+                session_id=login_resp.session_id_bytes,
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
+                child_lock=_CHILD_LOCK_BYTES[command],
             )
 
         response = await self._send_packet("control", packet)
         return SwitcherBaseResponse(response)
 
+    @_with_deadline
     async def get_breeze_state(self) -> SwitcherThermostatStateResponse:
         """Use for sending the get state packet to the Breeze device.
 
@@ -635,10 +859,12 @@ async def get_breeze_state(self) -> SwitcherThermostatStateResponse:
         raise RuntimeError("login request was not successful")
 
     async def _get_breeze_state(
-        self, timestamp: str, login_resp: SwitcherLoginResponse
+        self, timestamp: bytes, login_resp: SwitcherLoginResponse
     ) -> SwitcherThermostatStateResponse:
-        packet = packets.GET_STATE_PACKET2_TYPE2.format(
-            login_resp.session_id, timestamp, self._device_id
+        packet = packets.GET_STATE2_TYPE2_SCHEMA.build(
+            session_id=login_resp.session_id_bytes,
+            timestamp=timestamp,
+            device_id=self._device_id_bytes,
         )
 
         state_resp = await self._send_packet("get state", packet)
@@ -646,8 +872,10 @@ async def _get_breeze_state(
             response = SwitcherThermostatStateResponse(state_resp)
             return response
         except (KeyError, ValueError) as ve:
+            self._invalidate_session()
             raise RuntimeError("get breeze state request was not successful") from ve
 
+    @_with_deadline
     async def get_shutter_state(self, index: int = 0) -> SwitcherShutterStateResponse:
         """Use for sending the get state packet to the Runners devices.
 
@@ -660,8 +888,10 @@ async def get_shutter_state(self, index: int = 0) -> SwitcherShutterStateRespons
         """
         timestamp, login_resp = await self._login()
         if login_resp.successful:
-            packet = packets.GET_STATE_PACKET2_TYPE2.format(
-                login_resp.session_id, timestamp, self._device_id
+            packet = packets.GET_STATE2_TYPE2_SCHEMA.build(
+                session_id=login_resp.session_id_bytes,
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
             )
 
             state_resp = await self._send_packet("get state", packet)
@@ -671,11 +901,13 @@ async def get_shutter_state(self, index: int = 0) -> SwitcherShutterStateRespons
                 )
                 return response
             except (KeyError, ValueError) as ve:
+                self._invalidate_session()
                 raise RuntimeError(
                     "get shutter state request was not successful"
                 ) from ve
         raise RuntimeError("login request was not successful")
 
+    @_with_deadline
     async def get_light_state(self, index: int = 0) -> SwitcherLightStateResponse:
         """Use for sending the get state packet to the Light devices.
 
@@ -688,8 +920,10 @@ async def get_light_state(self, index: int = 0) -> SwitcherLightStateResponse:
         """
         timestamp, login_resp = await self._login()
         if login_resp.successful:
-            packet = packets.GET_STATE_PACKET2_TYPE2.format(
-                login_resp.session_id, timestamp, self._device_id
+            packet = packets.GET_STATE2_TYPE2_SCHEMA.build(
+                session_id=login_resp.session_id_bytes,
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
             )
 
             state_resp = await self._send_packet("get state", packet)
@@ -699,9 +933,11 @@ async def get_light_state(self, index: int = 0) -> SwitcherLightStateResponse:
                 )
                 return response
             except (KeyError, ValueError) as ve:
+                self._invalidate_session()
                 raise RuntimeError("get light state request was not successful") from ve
         raise RuntimeError("login request was not successful")
 
+    @_with_deadline
     async def set_light(
         self, command: DeviceState, index: int = 0
     ) -> SwitcherBaseResponse:
@@ -716,7 +952,6 @@ async def set_light(
 
         """
         index_packet = get_light_api_packet_index(self._device_type, index)
-        hex_pos = f"0{index_packet}{command.value}"
 
         logger.debug("about to send set light command")
         timestamp, login_resp = await self._login()
@@ -724,17 +959,15 @@ async def set_light(
             logger.error("Failed to log into device with id %s", self._device_id)
             raise RuntimeError("login request was not successful")
 
-        logger.debug(
-            "logged in session_id=%s, timestamp=%s", login_resp.session_id, timestamp
-        )
+        logger.debug("logged in session_id=%s", login_resp.session_id)
 
-        if bool(self._token):
-            packet = packets.GENERAL_TOKEN_COMMAND.format(
-                timestamp,
-                self._device_id,
-                self._token,
-                packets.SET_LIGHT_PRECOMMAND,
-                hex_pos,
+        if self._token:
+            packet = packets.GENERAL_TOKEN_COMMAND_SCHEMA.build(
+                timestamp=timestamp,
+                device_id=self._device_id_bytes,
+                token=self._token,
+                precommand=packets.SET_LIGHT_PRECOMMAND_BYTES,
+                command=bytes((index_packet, _STATE_BYTES[command])),
             )
         else:
             logger.error("Failed to set light device with id %s", self._device_id)
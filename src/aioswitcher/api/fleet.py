@@ -0,0 +1,158 @@
+# Copyright Tomer Figenblat.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Switcher integration TCP socket API fan-out over multiple devices."""
+
+from asyncio import Semaphore, as_completed, gather, get_running_loop, timeout
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from logging import getLogger
+from typing import AsyncIterator, Iterable, Optional, Union, final
+
+from ..device import DeviceCategory, DeviceType
+from . import SwitcherApi
+from .messages import SwitcherBaseResponse
+from .pool import SwitcherApiPool
+
+__all__ = ["SwitcherDeviceDescriptor", "SwitcherFleetResult", "get_fleet_states"]
+logger = getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 32
+DEFAULT_DEVICE_TIMEOUT = 10.0
+
+
+@final
+@dataclass(frozen=True)
+class SwitcherDeviceDescriptor:
+    """Connection details of a single device.
+
+    Args:
+        device_type: the type of the device.
+        ip_address: the ip address assigned to the device.
+        device_id: the id of the desired device.
+        device_key: the login key of the device.
+        token: the token of the user, needed only for token based devices.
+
+    """
+
+    device_type: DeviceType
+    ip_address: str
+    device_id: str
+    device_key: str
+    token: Union[str, None] = None
+
+
+@final
+@dataclass(frozen=True)
+class SwitcherFleetResult:
+    """Outcome of a request sent to a single device.
+
+    Args:
+        device: the descriptor of the device the request was sent to.
+        response: the response from the device, None if the request failed.
+        error: the error the request failed with, None if the request succeeded.
+
+    """
+
+    device: SwitcherDeviceDescriptor
+    response: Optional[SwitcherBaseResponse] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def successful(self) -> bool:
+        """Return true if the request was completed with a response."""
+        return self.error is None and self.response is not None
+
+
+async def _get_state(api: SwitcherApi, device_type: DeviceType) -> SwitcherBaseResponse:
+    """Send the get state request matching the device category."""
+    if device_type.category == DeviceCategory.THERMOSTAT:
+        return await api.get_breeze_state()
+    if device_type.category in (
+        DeviceCategory.SHUTTER,
+        DeviceCategory.SINGLE_SHUTTER_DUAL_LIGHT,
+        DeviceCategory.DUAL_SHUTTER_SINGLE_LIGHT,
+    ):
+        return await api.get_shutter_state()
+    if device_type.category == DeviceCategory.LIGHT:
+        return await api.get_light_state()
+    return await api.get_state()
+
+
+async def get_fleet_states(
+    devices: Iterable[SwitcherDeviceDescriptor],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    device_timeout: float = DEFAULT_DEVICE_TIMEOUT,
+    pool: Optional[SwitcherApiPool] = None,
+) -> AsyncIterator[SwitcherFleetResult]:
+    """Get the state of multiple devices concurrently.
+
+    The get state request is selected by the device category, e.g.
+    ``get_breeze_state`` for thermostats and ``get_shutter_state`` for shutters.
+    Results are yielded as each device answers, a failing or unresponsive device
+    is reported with its own result and doesn't delay the others.
+
+    Args:
+        devices: the descriptors of the devices to query.
+        concurrency: the maximum number of devices queried at once.
+        device_timeout: seconds allowed for each device, including connecting.
+        pool: optionally a connection pool to take the connections from.
+
+    Yields:
+        An instance of ``SwitcherFleetResult`` per device.
+
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    semaphore = Semaphore(concurrency)
+
+    async def query(device: SwitcherDeviceDescriptor) -> SwitcherFleetResult:
+        async with semaphore:
+            try:
+                async with timeout(device_timeout), AsyncExitStack() as stack:
+                    if pool:
+                        api = await stack.enter_async_context(
+                            pool.acquire(
+                                device.device_type,
+                                device.ip_address,
+                                device.device_id,
+                                device.device_key,
+                                device.token,
+                            )
+                        )
+                    else:
+                        api = await stack.enter_async_context(
+                            SwitcherApi(
+                                device.device_type,
+                                device.ip_address,
+                                device.device_id,
+                                device.device_key,
+                                device.token,
+                            )
+                        )
+                    response = await _get_state(api, device.device_type)
+                return SwitcherFleetResult(device, response=response)
+            except Exception as exc:
+                logger.debug("get state failed for device %s", device.device_id)
+                return SwitcherFleetResult(device, error=exc)
+
+    loop = get_running_loop()
+    tasks = [loop.create_task(query(device)) for device in devices]
+    try:
+        for completed in as_completed(tasks):
+            yield await completed
+    finally:
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
@@ -14,9 +14,11 @@
 
 """Switcher integration TCP socket API messages."""
 
-from binascii import hexlify, unhexlify
+from binascii import hexlify
 from dataclasses import InitVar, dataclass, field
-from typing import Set, final
+from struct import Struct
+from struct import error as struct_error
+from typing import Any, Set, final
 
 from ..device import (
     DeviceState,
@@ -35,146 +37,135 @@
 )
 from ..schedule.parser import SwitcherSchedule, get_schedules
 
+# Layouts of the values in the state responses
+_UINT8 = Struct("B")
+_UINT16 = Struct("<H")
+_UINT32 = Struct("<I")
+_SHUTTER_DIRECTION = Struct("2s")
+_REMOTE_ID = Struct("8s")
+# Offsets of the values in the state responses
+_STATE_OFFSET = 75
+_POWER_CONSUMPTION_OFFSET = 77
+_TIME_LEFT_OFFSET = 89
+_TIME_ON_OFFSET = 93
+_AUTO_SHUTDOWN_OFFSET = 97
+_THERMOSTAT_TEMP_OFFSET = 76
+_THERMOSTAT_STATE_OFFSET = 78
+_THERMOSTAT_MODE_OFFSET = 79
+_THERMOSTAT_TARGET_TEMP_OFFSET = 80
+_THERMOSTAT_FAN_SWING_OFFSET = 81
+_THERMOSTAT_REMOTE_ID_OFFSET = 84
+# Circuits of shutter and light devices are 16 bytes apart
+_CIRCUIT_OFFSET = 76
+_CIRCUIT_LENGTH = 16
+# Members of the enums by their value in the state responses
+_DEVICE_STATES = {int(member.value, 16): member for member in DeviceState}
+_THERMOSTAT_MODES = {int(member.value, 16): member for member in ThermostatMode}
+_THERMOSTAT_FAN_LEVELS = {
+    int(member.value, 16): member for member in ThermostatFanLevel
+}
+_SHUTTER_DIRECTIONS = {
+    bytes.fromhex(member.value): member for member in ShutterDirection
+}
+
 
 @final
 @dataclass
 class StateMessageParser:
-    """Use for parsing api messages."""
+    """Use for parsing api messages.
+
+    Raises:
+        ValueError: from the getters, if the response is too short for the value.
+
+    """
 
     response: InitVar[bytes]
 
     def __post_init__(self, response: bytes) -> None:
         """Post initialization of the parser."""
-        self._hex_response = hexlify(response)
+        self._response = memoryview(response)
+
+    def _unpack(self, layout: Struct, offset: int) -> Any:
+        """Return the single value of the layout at the offset of the response."""
+        try:
+            return layout.unpack_from(self._response, offset)[0]
+        except struct_error as exc:
+            raise ValueError("response is too short for the requested value") from exc
 
     def get_power_consumption(self) -> int:
         """Return the current power consumption of the device."""
-        hex_power = self._hex_response[154:162]
-        return int(hex_power[2:4] + hex_power[0:2], 16)
+        return int(self._unpack(_UINT16, _POWER_CONSUMPTION_OFFSET))
 
     def get_time_left(self) -> str:
         """Return the time left for the device current run."""
-        hex_time_left = self._hex_response[178:186]
-        time_left_seconds = int(
-            hex_time_left[6:8]
-            + hex_time_left[4:6]
-            + hex_time_left[2:4]
-            + hex_time_left[0:2],
-            16,
-        )
-        return seconds_to_iso_time(time_left_seconds)
+        return seconds_to_iso_time(self._unpack(_UINT32, _TIME_LEFT_OFFSET))
 
     def get_time_on(self) -> str:
         """Return how long the device has been on."""
-        hex_time_on = self._hex_response[186:194]
-        time_on_seconds = int(
-            hex_time_on[6:8] + hex_time_on[4:6] + hex_time_on[2:4] + hex_time_on[0:2],
-            16,
-        )
-        return seconds_to_iso_time(time_on_seconds)
+        return seconds_to_iso_time(self._unpack(_UINT32, _TIME_ON_OFFSET))
 
     def get_auto_shutdown(self) -> str:
         """Return the value of the auto shutdown configuration."""
-        hex_auto_off = self._hex_response[194:202]
-        auto_off_seconds = int(
-            hex_auto_off[6:8]
-            + hex_auto_off[4:6]
-            + hex_auto_off[2:4]
-            + hex_auto_off[0:2],
-            16,
-        )
-        return seconds_to_iso_time(auto_off_seconds)
+        return seconds_to_iso_time(self._unpack(_UINT32, _AUTO_SHUTDOWN_OFFSET))
 
     def get_state(self) -> DeviceState:
         """Return the current device state."""
-        hex_state = self._hex_response[150:152].decode()
-        states = dict(map(lambda s: (s.value, s), DeviceState))
-        return states[hex_state]
+        return _DEVICE_STATES[self._unpack(_UINT8, _STATE_OFFSET)]
 
     def get_thermostat_state(self) -> DeviceState:
         """Return the current thermostat state."""
-        hex_power = self._hex_response[156:158].decode()
-        return DeviceState.OFF if hex_power == DeviceState.OFF.value else DeviceState.ON
+        state = self._unpack(_UINT8, _THERMOSTAT_STATE_OFFSET)
+        return DeviceState.ON if state else DeviceState.OFF
 
     def get_thermostat_mode(self) -> ThermostatMode:
         """Return the current thermostat mode."""
-        hex_mode = self._hex_response[158:160]
-        modes = dict(map(lambda s: (s.value, s), ThermostatMode))
-        try:
-            return modes[hex_mode.decode()]
-        except KeyError:
-            return ThermostatMode.COOL
+        mode = self._unpack(_UINT8, _THERMOSTAT_MODE_OFFSET)
+        return _THERMOSTAT_MODES.get(mode, ThermostatMode.COOL)
 
     def get_thermostat_temp(self) -> float:
         """Return the current temp of the thermostat."""
-        return int(self._hex_response[154:156] + self._hex_response[152:154], 16) / 10
+        return int(self._unpack(_UINT16, _THERMOSTAT_TEMP_OFFSET)) / 10
 
     def get_thermostat_target_temp(self) -> int:
         """Return the current temperature of the thermostat."""
-        hex_temp = self._hex_response[160:162]
-        return int(hex_temp, 16)
+        return int(self._unpack(_UINT8, _THERMOSTAT_TARGET_TEMP_OFFSET))
 
     def get_thermostat_fan_level(self) -> ThermostatFanLevel:
         """Return the current thermostat fan level."""
-        hex_level = self._hex_response[162:163].decode()
-        levels = dict(map(lambda s: (s.value, s), ThermostatFanLevel))
-        try:
-            return levels[hex_level]
-        except KeyError:
-            return ThermostatFanLevel.LOW
+        level = self._unpack(_UINT8, _THERMOSTAT_FAN_SWING_OFFSET) >> 4
+        return _THERMOSTAT_FAN_LEVELS.get(level, ThermostatFanLevel.LOW)
 
     def get_thermostat_swing(self) -> ThermostatSwing:
         """Return the current thermostat fan swing."""
-        hex_swing = self._hex_response[163:164].decode()
-        return (
-            ThermostatSwing.OFF
-            if hex_swing == ThermostatSwing.OFF.value
-            else ThermostatSwing.ON
-        )
+        swing = self._unpack(_UINT8, _THERMOSTAT_FAN_SWING_OFFSET) & 0x0F
+        return ThermostatSwing.ON if swing else ThermostatSwing.OFF
 
     def get_thermostat_remote_id(self) -> str:
         """Return the current thermostat remote."""
-        remote_hex = unhexlify(self._hex_response)
-        return remote_hex[84:92].decode().rstrip("\x00")
+        remote_id = self._unpack(_REMOTE_ID, _THERMOSTAT_REMOTE_ID_OFFSET)
+        return str(remote_id.decode().rstrip("\x00"))
 
     def get_shutter_position(self, index: int) -> int:
         """Return the current shutter position."""
-        start_index = 152 + (index * 32)
-        end_index = start_index + 2
-        hex_pos = self._hex_response[start_index:end_index].decode()
-        return int(hex_pos, 16)
+        offset = _CIRCUIT_OFFSET + index * _CIRCUIT_LENGTH
+        return int(self._unpack(_UINT8, offset))
 
     def get_shutter_direction(self, index: int) -> ShutterDirection:
         """Return the current shutter direction."""
-        start_index = 156 + (index * 32)
-        end_index = start_index + 4
-        hex_dir = self._hex_response[start_index:end_index].decode()
-        directions = dict(map(lambda s: (s.value, s), ShutterDirection))
-        return directions[hex_dir]
+        offset = _CIRCUIT_OFFSET + index * _CIRCUIT_LENGTH + 2
+        return _SHUTTER_DIRECTIONS[self._unpack(_SHUTTER_DIRECTION, offset)]
 
     def get_shutter_child_lock(self, index: int) -> ShutterChildLock:
         """Return the current shutter child lock."""
-        start_index = 154 + (index * 32)
-        end_index = start_index + 2
-        hex_pos = self._hex_response[start_index:end_index].decode()
-        hex_device_state = hex_pos[0:2]
-        return (
-            ShutterChildLock.ON
-            if hex_device_state == ShutterChildLock.ON.value
-            else ShutterChildLock.OFF
-        )
+        offset = _CIRCUIT_OFFSET + index * _CIRCUIT_LENGTH + 1
+        child_lock = self._unpack(_UINT8, offset)
+        return ShutterChildLock.ON if child_lock == 1 else ShutterChildLock.OFF
 
     def get_light_state(self, index: int) -> DeviceState:
         """Return the current light state."""
-        start_index = 152 + (index * 32)
-        end_index = start_index + 2
-        hex_pos = self._hex_response[start_index:end_index].decode()
-        hex_device_state = hex_pos[0:2]
-        return (
-            DeviceState.ON
-            if hex_device_state == DeviceState.ON.value
-            else DeviceState.OFF
-        )
+        offset = _CIRCUIT_OFFSET + index * _CIRCUIT_LENGTH
+        state = self._unpack(_UINT8, offset)
+        return DeviceState.ON if state == 1 else DeviceState.OFF
 
 
 @dataclass
@@ -215,6 +206,11 @@ def __post_init__(self) -> None:
         except Exception as exc:
             raise ValueError("failed to parse login response message") from exc
 
+    @property
+    def session_id_bytes(self) -> bytes:
+        """Return the session id as sent in the request packets."""
+        return self.unparsed_response[8:12]
+
 
 @final
 @dataclass
@@ -12,7 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Switcher integration TCP socket API packet formats."""
+"""Switcher integration TCP socket API packet formats.
+
+The hex string templates describe the packets as sent over the wire, the packet
+schemas at the bottom of this module build the same packets as signed bytes.
+"""
+
+from dataclasses import dataclass
+from struct import Struct, pack_into
+from typing import Any, List, Optional, Tuple, Union, final
+
+from ..device.tools import (
+    SIGNATURE_LENGTH,
+    CrcPrefix,
+    get_crc_prefix,
+    sign_packet_into,
+)
+
+# Every message starts with the magic bytes followed by the message length
+MESSAGE_MAGIC = b"\xfe\xf0"
 
 # weekdays sum, start-time timestamp, end-time timestamp
 SCHEDULE_CREATE_DATA_FORMAT = "01{}01{}{}"
@@ -201,3 +219,313 @@
     + "{}"
     + "00000000"
 )
+
+
+@final
+@dataclass(frozen=True)
+class PacketField:
+    """A value set when building a packet.
+
+    Args:
+        name: the keyword of the value passed to ``PacketSchema.build``.
+        fmt: the ``struct`` format of a fixed size value, None for variable length
+            bytes.
+
+    """
+
+    name: str
+    fmt: Optional[str] = None
+
+
+# a run of constant bytes with the fixed size fields set into it, optionally
+# followed by a variable length field
+_Segment = Tuple[bytes, List[Tuple[Struct, int, str]], Optional[str]]
+
+
+@final
+class PacketSchema:
+    """Layout of a request packet, building the signed packet bytes.
+
+    A packet is a header, the message body made of constant bytes and fields, and
+    the crc signature. The header holds the magic bytes, the message length and the
+    message type, the length and the signature are set when building. For packets
+    without variable length fields, the length is set upfront and the crc of the
+    constant bytes opening the packet is calculated once.
+
+    Args:
+        message_type: the 4 bytes following the message length in the header.
+        parts: the constant bytes and the fields of the message body, in order.
+
+    """
+
+    def __init__(self, message_type: bytes, *parts: Union[bytes, PacketField]) -> None:
+        """Initialize the schema, precomputing the constant bytes and offsets."""
+        self._segments: List[_Segment] = []
+        self._fixed_length = 0
+        constant = bytearray(MESSAGE_MAGIC + bytes(2) + message_type)
+        fields: List[Tuple[Struct, int, str]] = []
+        for part in parts:
+            if isinstance(part, bytes):
+                constant.extend(part)
+            elif part.fmt is not None:
+                codec = Struct(part.fmt)
+                fields.append((codec, len(constant), part.name))
+                constant.extend(bytes(codec.size))
+            else:
+                self._segments.append((bytes(constant), fields, part.name))
+                self._fixed_length += len(constant)
+                constant, fields = bytearray(), []
+        self._fixed_length += len(constant)
+        self._crc_prefix: Optional[CrcPrefix] = None
+        if not self._segments:
+            pack_into("<H", constant, 2, self._fixed_length + SIGNATURE_LENGTH)
+            prefix_end = fields[0][1] if fields else len(constant)
+            self._crc_prefix = get_crc_prefix(bytes(constant[:prefix_end]))
+        self._segments.append((bytes(constant), fields, None))
+
+    def build(self, **values: Any) -> bytes:
+        """Build the signed packet.
+
+        Args:
+            values: the value of every field, by the field name. Values of fixed size
+                bytes fields are padded or truncated to the field size.
+
+        Returns:
+            The packet bytes ready to be sent to the device.
+
+        """
+        length = self._fixed_length + SIGNATURE_LENGTH
+        for _, _, variable in self._segments:
+            if variable:
+                length += len(values[variable])
+
+        packet = bytearray(length)
+        offset = 0
+        for constant, fields, variable in self._segments:
+            start, offset = offset, offset + len(constant)
+            packet[start:offset] = constant
+            for codec, field_offset, name in fields:
+                codec.pack_into(packet, start + field_offset, values[name])
+            if variable:
+                value = values[variable]
+                start, offset = offset, offset + len(value)
+                packet[start:offset] = value
+
+        if not self._crc_prefix:
+            pack_into("<H", packet, 2, length)
+        sign_packet_into(packet, offset, self._crc_prefix)
+        return bytes(packet)
+
+
+_SESSION_ID = PacketField("session_id", "4s")
+_TIMESTAMP = PacketField("timestamp", "4s")
+_DEVICE_ID = PacketField("device_id", "3s")
+_TOKEN = PacketField("token")
+_PAD_36 = bytes(36)
+_REQUEST_SUFFIX = bytes(10) + b"\xf0\xfe"
+
+
+def _request_format(request_type: int) -> Tuple[Union[bytes, PacketField], ...]:
+    """Return the parts of the request format, following the message type."""
+    return (
+        _SESSION_ID,
+        bytes((request_type, 0x00, 0x01)) + bytes(9),
+        _TIMESTAMP,
+        _REQUEST_SUFFIX,
+    )
+
+
+_REQUEST_FORMAT_TYPE1 = _request_format(0x34)
+_REQUEST_FORMAT2_TYPE2 = _request_format(0x39)
+_REQUEST_FORMAT_BREEZE = _request_format(0x00)
+
+# values are timestamp, device key
+LOGIN_TYPE1_SCHEMA = PacketSchema(
+    b"\x02\x32\xa1\x00",
+    bytes(4),
+    *_REQUEST_FORMAT_TYPE1[1:],
+    PacketField("device_key", "1s"),
+    _PAD_36 + b"\x00",
+)
+
+# values are timestamp, device id
+LOGIN_TYPE2_SCHEMA = PacketSchema(
+    b"\x03\x05\xa6\x00",
+    bytes(4) + b"\xff\x03\x01" + bytes(9),
+    _TIMESTAMP,
+    _REQUEST_SUFFIX,
+    _DEVICE_ID,
+    b"\x00",
+)
+
+# values are token, timestamp, device id
+LOGIN_TOKEN_TYPE2_SCHEMA = PacketSchema(
+    b"\x03\x05\xa6\x00",
+    bytes(4) + b"\xff\x03\x01" + bytes(4),
+    _TOKEN,
+    b"\x00",
+    _TIMESTAMP,
+    _REQUEST_SUFFIX,
+    _DEVICE_ID,
+    b"\x00",
+)
+
+# values are device id, timestamp, token
+LOGIN2_TOKEN_TYPE2_SCHEMA = PacketSchema(
+    b"\x03\x05\xa1\x00",
+    bytes(4) + b"\xf5\x03\x01" + bytes(3),
+    _DEVICE_ID,
+    bytes(3),
+    _TIMESTAMP,
+    _REQUEST_SUFFIX,
+    bytes(2),
+    _TOKEN,
+    bytes(32) + b"\x01",
+)
+
+# values are session id, timestamp, device id
+GET_STATE_TYPE1_SCHEMA = PacketSchema(
+    b"\x02\x32\x01\x03", *_REQUEST_FORMAT_TYPE1, _DEVICE_ID, b"\x00"
+)
+
+# values are session id, timestamp, device id
+GET_STATE2_TYPE2_SCHEMA = PacketSchema(
+    b"\x03\x05\x01\x03", *_REQUEST_FORMAT2_TYPE2, _DEVICE_ID, b"\x00"
+)
+
+# values are session id, timestamp, device id, command, timer seconds
+SEND_CONTROL_SCHEMA = PacketSchema(
+    b"\x02\x32\x01\x02",
+    *_REQUEST_FORMAT_TYPE1,
+    _DEVICE_ID,
+    _PAD_36 + b"\x00\x01\x06\x00",
+    PacketField("command", "B"),
+    b"\x00",
+    PacketField("timer", "<I"),
+)
+
+# values are session id, timestamp, device id, auto-off seconds
+SET_AUTO_OFF_SET_SCHEMA = PacketSchema(
+    b"\x02\x32\x01\x02",
+    *_REQUEST_FORMAT_TYPE1,
+    _DEVICE_ID,
+    _PAD_36 + b"\x00\x04\x04\x00",
+    PacketField("auto_off", "<I"),
+)
+
+# values are session id, timestamp, device id, name
+UPDATE_DEVICE_NAME_SCHEMA = PacketSchema(
+    b"\x02\x32\x02\x02",
+    *_REQUEST_FORMAT_TYPE1,
+    _DEVICE_ID,
+    _PAD_36 + b"\x00",
+    PacketField("name", "32s"),
+)
+
+# values are session id, timestamp, device id
+GET_SCHEDULES_SCHEMA = PacketSchema(
+    b"\x02\x32\x01\x02",
+    *_REQUEST_FORMAT_TYPE1,
+    _DEVICE_ID,
+    _PAD_36 + b"\x00\x06\x00\x00",
+)
+
+# values are session id, timestamp, device id, schedule id
+DELETE_SCHEDULE_SCHEMA = PacketSchema(
+    b"\x02\x32\x01\x02",
+    *_REQUEST_FORMAT_TYPE1,
+    _DEVICE_ID,
+    _PAD_36 + b"\x00\x08\x01\x00",
+    PacketField("schedule_id", "B"),
+)
+
+# values are session id, timestamp, device id, weekdays, start time, end time
+CREATE_SCHEDULE_SCHEMA = PacketSchema(
+    b"\x02\x32\x01\x02",
+    *_REQUEST_FORMAT_TYPE1,
+    _DEVICE_ID,
+    _PAD_36 + b"\x00\x03\x0c\x00\xff\x01",
+    PacketField("weekdays", "B"),
+    b"\x01",
+    PacketField("start_time", "<I"),
+    PacketField("end_time", "<I"),
+)
+
+# values are session id, timestamp, device id, command length, command
+BREEZE_COMMAND_SCHEMA = PacketSchema(
+    b"\x03\x05\x01\x02",
+    *_REQUEST_FORMAT_BREEZE,
+    _DEVICE_ID,
+    _PAD_36 + b"\x37\x01",
+    PacketField("length", "<H"),
+    PacketField("command"),
+)
+
+# values are session id, timestamp, device id, state, mode, target temp,
+# fan level and swing packed as the high and low nibbles of a single byte
+BREEZE_UPDATE_STATUS_SCHEMA = PacketSchema(
+    b"\x03\x05\x01\x0e",
+    *_REQUEST_FORMAT_BREEZE,
+    _DEVICE_ID,
+    _PAD_36 + b"\x37\x01\x00\x03\x0b\x04\x00",
+    PacketField("state", "B"),
+    PacketField("mode", "B"),
+    PacketField("target_temp", "B"),
+    PacketField("fan_swing", "B"),
+)
+
+# values are session id, timestamp, device id
+RUNNER_STOP_SCHEMA = PacketSchema(
+    b"\x03\x05\x01\x02",
+    _SESSION_ID,
+    b"\x23\x23\x01" + bytes(9),
+    _TIMESTAMP,
+    _REQUEST_SUFFIX,
+    _DEVICE_ID,
+    _PAD_36 + b"\x37\x02\x02" + bytes(3),
+)
+
+# values are session id, timestamp, device id, position
+RUNNER_SET_POSITION_SCHEMA = PacketSchema(
+    b"\x03\x05\x01\x02",
+    _SESSION_ID,
+    b"\x29\x04\x01" + bytes(9),
+    _TIMESTAMP,
+    _REQUEST_SUFFIX,
+    _DEVICE_ID,
+    _PAD_36 + b"\x37\x01\x01\x00",
+    PacketField("position", "B"),
+)
+
+# values are session id, timestamp, device id, child lock
+RUNNER_SET_CHILD_LOCK_SCHEMA = PacketSchema(
+    b"\x03\x05\x01\x02",
+    _SESSION_ID,
+    bytes(12),
+    _TIMESTAMP,
+    _REQUEST_SUFFIX,
+    _DEVICE_ID,
+    _PAD_36 + b"\x37\x07\x01\x00",
+    PacketField("child_lock", "B"),
+)
+
+# values are timestamp, device id, token, precommand, command
+GENERAL_TOKEN_COMMAND_SCHEMA = PacketSchema(
+    b"\x03\x05\x01\x02",
+    bytes(16),
+    _TIMESTAMP,
+    _REQUEST_SUFFIX,
+    _DEVICE_ID,
+    b"\x00",
+    _TOKEN,
+    bytes(31),
+    PacketField("precommand", "2s"),
+    b"\x06\x00",
+    PacketField("command"),
+    bytes(4),
+)
+
+STOP_SHUTTER_PRECOMMAND_BYTES = b"\x37\x02"
+SET_POSITION_PRECOMMAND_BYTES = b"\x37\x01"
+SET_CHILD_LOCK_PRECOMMAND_BYTES = b"\x37\x07"
+SET_LIGHT_PRECOMMAND_BYTES = b"\x37\x0a"
@@ -0,0 +1,227 @@
+# Copyright Tomer Figenblat.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Switcher integration TCP socket API connection pool."""
+
+from asyncio import CancelledError, Semaphore, Task, get_running_loop, sleep
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import timedelta
+from logging import getLogger
+from time import monotonic
+from types import TracebackType
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type, Union, final
+
+from ..device import DeviceType
+from . import (
+    SWITCHER_CONNECT_TIMEOUT,
+    SWITCHER_READ_TIMEOUT,
+    SWITCHER_TCP_PORT_TYPE1,
+    SWITCHER_TCP_PORT_TYPE2,
+    SwitcherApi,
+)
+
+__all__ = ["SwitcherApiPool"]
+logger = getLogger(__name__)
+
+# ip address, tcp port, device id
+PoolKey = Tuple[str, int, str]
+
+
+@dataclass
+class _PoolEntry:
+    """Connections held by the pool for a single device."""
+
+    semaphore: Semaphore
+    idle: List[Tuple[SwitcherApi, float]] = field(default_factory=list)
+    users: int = 0
+
+
+@final
+class SwitcherApiPool:
+    """Pool of warm, logged in ``SwitcherApi`` connections keyed by device.
+
+    Connections are handed out with ``acquire`` and returned to the pool when the
+    context exits, a connection that failed while in use is closed and not reused.
+
+    Args:
+        max_connections: the maximum number of open connections per device.
+        idle_timeout: idle connections are closed after this period.
+        connect_timeout: seconds allowed for connecting, None for no deadline.
+        read_timeout: seconds allowed for reading a response, None for no deadline.
+        operation_timeout: seconds allowed for a request method as a whole,
+            including logging in, None for no deadline.
+
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 1,
+        idle_timeout: timedelta = timedelta(seconds=60),
+        connect_timeout: Optional[float] = SWITCHER_CONNECT_TIMEOUT,
+        read_timeout: Optional[float] = SWITCHER_READ_TIMEOUT,
+        operation_timeout: Optional[float] = None,
+    ) -> None:
+        """Initialize the connection pool."""
+        if max_connections < 1:
+            raise ValueError("max connections must be at least 1")
+        self._max_connections = max_connections
+        self._idle_timeout = idle_timeout.total_seconds()
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._operation_timeout = operation_timeout
+        self._entries: Dict[PoolKey, _PoolEntry] = {}
+        self._reaper: Optional[Task[None]] = None
+        self._closed = False
+
+    async def __aenter__(self) -> "SwitcherApiPool":
+        """Enter SwitcherApiPool asynchronous context manager."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Exit SwitcherApiPool asynchronous context manager."""
+        await self.close()
+
+    @property
+    def idle_connections(self) -> int:
+        """Return the number of idle connections held by the pool."""
+        return sum(len(entry.idle) for entry in self._entries.values())
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        device_type: DeviceType,
+        ip_address: str,
+        device_id: str,
+        device_key: str,
+        token: Union[str, None] = None,
+    ) -> AsyncIterator[SwitcherApi]:
+        """Acquire a connected ``SwitcherApi`` for the device.
+
+        Args:
+            device_type: the type of the device.
+            ip_address: the ip address assigned to the device.
+            device_id: the id of the desired device.
+            device_key: the login key of the device.
+            token: the token of the user, needed only for token based devices.
+
+        Yields:
+            A connected instance of ``aioswitcher.api.SwitcherApi``.
+
+        """
+        if self._closed:
+            raise RuntimeError("the connection pool is closed")
+        port = (
+            SWITCHER_TCP_PORT_TYPE2
+            if device_type.protocol_type == 2
+            else SWITCHER_TCP_PORT_TYPE1
+        )
+        key = (ip_address, port, device_id)
+        entry = self._entries.get(key)
+        if not entry:
+            entry = self._entries[key] = _PoolEntry(Semaphore(self._max_connections))
+        self._start_reaper()
+
+        entry.users += 1
+        try:
+            async with entry.semaphore:
+                api = await self._checkout(
+                    entry, device_type, ip_address, device_id, device_key, token
+                )
+                try:
+                    yield api
+                except BaseException:
+                    # the state of the socket is unknown, don't hand it out again
+                    await api.disconnect()
+                    raise
+                if self._closed or api.closing:
+                    await api.disconnect()
+                else:
+                    entry.idle.append((api, monotonic()))
+        finally:
+            entry.users -= 1
+
+    async def _checkout(
+        self,
+        entry: _PoolEntry,
+        device_type: DeviceType,
+        ip_address: str,
+        device_id: str,
+        device_key: str,
+        token: Union[str, None],
+    ) -> SwitcherApi:
+        """Return an idle connection or open a new one."""
+        while entry.idle:
+            api, _ = entry.idle.pop()
+            if not api.closing:
+                logger.debug("reusing a pooled connection for device %s", device_id)
+                return api
+            logger.debug("dropping a half-closed connection for device %s", device_id)
+            await api.disconnect()
+
+        api = SwitcherApi(
+            device_type,
+            ip_address,
+            device_id,
+            device_key,
+            token,
+            connect_timeout=self._connect_timeout,
+            read_timeout=self._read_timeout,
+            operation_timeout=self._operation_timeout,
+        )
+        await api.connect()
+        return api
+
+    def _start_reaper(self) -> None:
+        """Start the idle connections reaper if not already running."""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = get_running_loop().create_task(self._reap_periodically())
+
+    async def _reap_periodically(self) -> None:
+        """Close idle connections periodically until no connections are left."""
+        while self._entries:
+            await sleep(max(self._idle_timeout / 2, 1))
+            await self.reap()
+
+    async def reap(self) -> None:
+        """Close connections idle for longer than the idle timeout."""
+        deadline = monotonic() - self._idle_timeout
+        for key, entry in list(self._entries.items()):
+            expired = [api for api, since in entry.idle if since <= deadline]
+            entry.idle = [(api, since) for api, since in entry.idle if since > deadline]
+            for api in expired:
+                logger.debug("closing an idle connection for device %s", key[2])
+                await api.disconnect()
+            if not entry.idle and not entry.users:
+                del self._entries[key]
+
+    async def close(self) -> None:
+        """Close all idle connections and stop the pool."""
+        self._closed = True
+        if self._reaper and not self._reaper.done():
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except CancelledError:
+                pass
+        for entry in self._entries.values():
+            for api, _ in entry.idle:
+                await api.disconnect()
+            entry.idle.clear()
+        self._entries.clear()
@@ -0,0 +1,203 @@
+# Copyright Tomer Figenblat.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Switcher integration TCP socket API reconnect and circuit breaker tools."""
+
+from asyncio import sleep
+from dataclasses import dataclass
+from datetime import timedelta
+from enum import Enum, auto, unique
+from logging import getLogger
+from random import uniform
+from time import monotonic
+from typing import Any, Callable, Dict, Optional, final
+
+from ..device import SwitcherBase
+from . import SwitcherApi
+
+__all__ = [
+    "CircuitState",
+    "SwitcherCircuitBreaker",
+    "SwitcherCircuitOpenError",
+    "connect_with_backoff",
+]
+logger = getLogger(__name__)
+
+
+@unique
+class CircuitState(Enum):
+    """Enum for relaying the state of a device circuit."""
+
+    CLOSED = auto()
+    OPEN = auto()
+    HALF_OPEN = auto()
+
+
+class SwitcherCircuitOpenError(RuntimeError):
+    """Raised when connecting to a device known to be down."""
+
+
+@dataclass
+class _Circuit:
+    """Failure tracking for a single device."""
+
+    failures: int = 0
+    opened_at: Optional[float] = None
+    probing: bool = False
+
+
+@final
+class SwitcherCircuitBreaker:
+    """Per-device circuit breaker, failing fast while a device is known to be down.
+
+    The circuit of a device opens after consecutive connection failures. While open,
+    connection attempts are rejected until the reset timeout passes, then a single
+    probe is allowed. The circuit closes on a successful connection or when the
+    device is seen broadcasting, use ``device_seen`` or ``track`` with the bridge.
+
+    Args:
+        failure_threshold: consecutive failures opening the circuit.
+        reset_timeout: the period after which an open circuit allows a probe.
+
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: timedelta = timedelta(seconds=60),
+    ) -> None:
+        """Initialize the circuit breaker."""
+        if failure_threshold < 1:
+            raise ValueError("failure threshold must be at least 1")
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout.total_seconds()
+        self._circuits: Dict[str, _Circuit] = {}
+
+    def state(self, device_id: str) -> CircuitState:
+        """Return the state of the circuit for the device."""
+        circuit = self._circuits.get(device_id)
+        if not circuit or circuit.opened_at is None:
+            return CircuitState.CLOSED
+        if circuit.probing or monotonic() - circuit.opened_at >= self._reset_timeout:
+            return CircuitState.HALF_OPEN
+        return CircuitState.OPEN
+
+    def allow_request(self, device_id: str) -> bool:
+        """Return true if a connection attempt to the device is allowed."""
+        state = self.state(device_id)
+        if state == CircuitState.CLOSED:
+            return True
+        circuit = self._circuits[device_id]
+        if state == CircuitState.HALF_OPEN and not circuit.probing:
+            logger.debug("probing device %s after its circuit was open", device_id)
+            circuit.probing = True
+            return True
+        return False
+
+    def record_success(self, device_id: str) -> None:
+        """Close the circuit of the device after a successful connection."""
+        if self._circuits.pop(device_id, None):
+            logger.info("circuit closed for device %s", device_id)
+
+    def record_failure(self, device_id: str) -> None:
+        """Count a connection failure, opening the circuit at the threshold."""
+        circuit = self._circuits.setdefault(device_id, _Circuit())
+        circuit.failures += 1
+        if circuit.probing or circuit.failures >= self._failure_threshold:
+            if circuit.opened_at is None or circuit.probing:
+                logger.info("circuit opened for device %s", device_id)
+            circuit.opened_at = monotonic()
+            circuit.probing = False
+
+    def release_probe(self, device_id: str) -> None:
+        """Allow another probe after an attempt ended without a connection result."""
+        circuit = self._circuits.get(device_id)
+        if circuit:
+            circuit.probing = False
+
+    def device_seen(self, device: SwitcherBase) -> None:
+        """Close the circuit of a device found broadcasting by the bridge."""
+        self.record_success(device.device_id)
+
+    def track(
+        self, on_device: Callable[[SwitcherBase], Any]
+    ) -> Callable[[SwitcherBase], Any]:
+        """Wrap a bridge callback, closing circuits for every device seen.
+
+        Args:
+            on_device: the callback to forward the devices to.
+
+        Returns:
+            A callable for passing to ``aioswitcher.bridge.SwitcherBridge``.
+
+        """
+
+        def tracking_callback(device: SwitcherBase) -> Any:
+            self.device_seen(device)
+            return on_device(device)
+
+        return tracking_callback
+
+
+async def connect_with_backoff(
+    api: SwitcherApi,
+    breaker: Optional[SwitcherCircuitBreaker] = None,
+    attempts: int = 5,
+    base_delay: float = 0.5,
+    max_delay: float = 30.0,
+) -> None:
+    """Connect to the device, retrying with exponential backoff and full jitter.
+
+    Args:
+        api: the ``SwitcherApi`` to connect.
+        breaker: optionally a circuit breaker shared by all connection attempts.
+        attempts: the maximum number of connection attempts.
+        base_delay: seconds to wait before the first retry, doubled for each retry.
+        max_delay: the maximum seconds to wait between attempts.
+
+    Raises:
+        SwitcherCircuitOpenError: if the circuit for the device is open.
+        OSError: the last connection error, including timeouts, if all attempts
+            failed.
+
+    """
+    if attempts < 1:
+        raise ValueError("attempts must be at least 1")
+    for attempt in range(attempts):
+        if breaker and not breaker.allow_request(api.device_id):
+            raise SwitcherCircuitOpenError(f"device {api.device_id} is known as down")
+        try:
+            await api.connect()
+        except OSError:
+            if breaker:
+                breaker.record_failure(api.device_id)
+            if attempt == attempts - 1:
+                raise
+            delay = uniform(0, min(max_delay, base_delay * 2**attempt))  # nosec
+            logger.debug(
+                "connecting to device %s failed, retrying in %.2f seconds",
+                api.device_id,
+                delay,
+            )
+            await sleep(delay)
+        except BaseException:
+            # a cancelled attempt says nothing about the device, but must not leave
+            # the probe taken forever
+            if breaker:
+                breaker.release_probe(api.device_id)
+            raise
+        else:
+            if breaker:
+                breaker.record_success(api.device_id)
+            return
@@ -14,17 +14,55 @@
 
 """Switcher integration, UDP Bridge module."""
 
-from asyncio import BaseTransport, DatagramProtocol, get_running_loop
-from binascii import hexlify
-from dataclasses import dataclass
+from asyncio import (
+    BaseTransport,
+    DatagramProtocol,
+    Event,
+    Future,
+    Handle,
+    Semaphore,
+    Task,
+    get_running_loop,
+    sleep,
+    wait,
+)
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from enum import Enum, auto, unique
 from functools import partial
+from inspect import isawaitable, iscoroutine, iscoroutinefunction
 from logging import getLogger
-from socket import AF_INET, inet_ntoa
-from struct import pack
+from os import fstat
+from socket import AF_INET, SO_RCVBUF, SOCK_DGRAM, SOL_SOCKET, inet_ntoa, socket
+from struct import Struct
+from struct import error as struct_error
+from time import monotonic, perf_counter
 from types import TracebackType
-from typing import Any, Callable, Dict, Optional, Tuple, Type, final
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    final,
+)
 from warnings import warn
 
+try:
+    from socket import SO_REUSEPORT
+except ImportError:  # pragma: no cover, not available on windows
+    SO_REUSEPORT = None  # type: ignore[assignment,misc]
+
 from .device import (
     DeviceCategory,
     DeviceState,
@@ -44,13 +82,26 @@
     ThermostatSwing,
 )
 from .device.tools import (
+    SIGNATURE_LENGTH,
     get_light_discovery_packet_index,
     get_shutter_discovery_packet_index,
     seconds_to_iso_time,
     watts_to_amps,
 )
-
-__all__ = ["SwitcherBridge"]
+from .registry import SwitcherDeviceRegistry
+
+__all__ = [
+    "DatagramFilter",
+    "LatencyHistogram",
+    "OverflowPolicy",
+    "SourceRateLimiter",
+    "SwitcherBridge",
+    "SwitcherBridgeStatistics",
+    "SwitcherDeviceChange",
+    "SwitcherStream",
+    "SwitcherSubscription",
+    "UnchangedBroadcastPolicy",
+]
 logger = getLogger(__name__)
 
 
@@ -70,6 +121,242 @@
 ]
 
 
+# Number of shutter and light circuits of the devices having circuits
+_DEVICE_CIRCUITS: Dict[DeviceType, Tuple[int, int]] = {
+    DeviceType.RUNNER: (1, 0),
+    DeviceType.RUNNER_MINI: (1, 0),
+    DeviceType.RUNNER_S11: (1, 2),
+    DeviceType.RUNNER_S12: (2, 1),
+    DeviceType.LIGHT_SL01: (0, 1),
+    DeviceType.LIGHT_SL01_MINI: (0, 1),
+    DeviceType.LIGHT_SL02: (0, 2),
+    DeviceType.LIGHT_SL02_MINI: (0, 2),
+    DeviceType.LIGHT_SL03: (0, 3),
+}
+
+
+def _get_shutters(
+    parser: "DatagramParser", device_type: DeviceType
+) -> Tuple[List[int], List[ShutterDirection], List[ShutterChildLock]]:
+    """Return the positions, directions and child locks of the shutter circuits."""
+    indexes = [
+        get_shutter_discovery_packet_index(device_type, circuit)
+        for circuit in range(_DEVICE_CIRCUITS[device_type][0])
+    ]
+    return (
+        [parser.get_shutter_position(index) for index in indexes],
+        [parser.get_shutter_direction(index) for index in indexes],
+        [parser.get_shutter_child_lock(index) for index in indexes],
+    )
+
+
+def _get_lights(parser: "DatagramParser", device_type: DeviceType) -> List[DeviceState]:
+    """Return the states of the light circuits."""
+    return [
+        parser.get_light_state(get_light_discovery_packet_index(device_type, circuit))
+        for circuit in range(_DEVICE_CIRCUITS[device_type][1])
+    ]
+
+
+def _build_water_heater(
+    parser: "DatagramParser", device_type: DeviceType, device_state: DeviceState
+) -> Optional[SwitcherBase]:
+    """Build a water heater device from the datagram."""
+    logger.debug("discovered a water heater switcher device")
+    is_on = device_state == DeviceState.ON
+    power_consumption = parser.get_power_consumption() if is_on else 0
+    return SwitcherWaterHeater(
+        device_type,
+        device_state,
+        parser.get_device_id(),
+        parser.get_device_key(),
+        parser.get_ip_type1(),
+        parser.get_mac_type1(),
+        parser.get_name(),
+        device_type.token_needed,
+        power_consumption,
+        watts_to_amps(power_consumption),
+        parser.get_remaining() if is_on else "00:00:00",
+        parser.get_auto_shutdown(),
+    )
+
+
+def _build_power_plug(
+    parser: "DatagramParser", device_type: DeviceType, device_state: DeviceState
+) -> Optional[SwitcherBase]:
+    """Build a power plug device from the datagram."""
+    logger.debug("discovered a power plug switcher device")
+    is_on = device_state == DeviceState.ON
+    power_consumption = parser.get_power_consumption() if is_on else 0
+    return SwitcherPowerPlug(
+        device_type,
+        device_state,
+        parser.get_device_id(),
+        parser.get_device_key(),
+        parser.get_ip_type1(),
+        parser.get_mac_type1(),
+        parser.get_name(),
+        device_type.token_needed,
+        power_consumption,
+        watts_to_amps(power_consumption),
+    )
+
+
+def _build_shutter(
+    parser: "DatagramParser", device_type: DeviceType, device_state: DeviceState
+) -> Optional[SwitcherBase]:
+    """Build a shutter device from the datagram."""
+    logger.debug("discovered a Runner switcher device")
+    return SwitcherShutter(
+        device_type,
+        DeviceState.ON,
+        parser.get_device_id(),
+        parser.get_device_key(),
+        parser.get_ip_type2(),
+        parser.get_mac_type2(),
+        parser.get_name(),
+        device_type.token_needed,
+        *_get_shutters(parser, device_type),
+    )
+
+
+def _build_single_shutter_dual_light(
+    parser: "DatagramParser", device_type: DeviceType, device_state: DeviceState
+) -> Optional[SwitcherBase]:
+    """Build a single shutter dual light device from the datagram."""
+    logger.debug("discovered a Runner S11 switcher device")
+    return SwitcherSingleShutterDualLight(
+        device_type,
+        DeviceState.ON,
+        parser.get_device_id(),
+        parser.get_device_key(),
+        parser.get_ip_type2(),
+        parser.get_mac_type2(),
+        parser.get_name(),
+        device_type.token_needed,
+        *_get_shutters(parser, device_type),
+        _get_lights(parser, device_type),
+    )
+
+
+def _build_dual_shutter_single_light(
+    parser: "DatagramParser", device_type: DeviceType, device_state: DeviceState
+) -> Optional[SwitcherBase]:
+    """Build a dual shutter single light device from the datagram."""
+    logger.debug("discovered a Runner S12 switcher device")
+    return SwitcherDualShutterSingleLight(
+        device_type,
+        DeviceState.ON,
+        parser.get_device_id(),
+        parser.get_device_key(),
+        parser.get_ip_type2(),
+        parser.get_mac_type2(),
+        parser.get_name(),
+        device_type.token_needed,
+        *_get_shutters(parser, device_type),
+        _get_lights(parser, device_type),
+    )
+
+
+def _build_thermostat(
+    parser: "DatagramParser", device_type: DeviceType, device_state: DeviceState
+) -> Optional[SwitcherBase]:
+    """Build a thermostat device from the datagram."""
+    logger.debug("discovered a Breeze switcher device")
+    return SwitcherThermostat(
+        device_type,
+        device_state,
+        parser.get_device_id(),
+        parser.get_device_key(),
+        parser.get_ip_type2(),
+        parser.get_mac_type2(),
+        parser.get_name(),
+        device_type.token_needed,
+        parser.get_thermostat_mode(),
+        parser.get_thermostat_temp(),
+        parser.get_thermostat_target_temp(),
+        parser.get_thermostat_fan_level(),
+        parser.get_thermostat_swing(),
+        parser.get_thermostat_remote_id(),
+    )
+
+
+def _build_light(
+    parser: "DatagramParser", device_type: DeviceType, device_state: DeviceState
+) -> Optional[SwitcherBase]:
+    """Build a light device from the datagram, None for unknown lights."""
+    if device_type not in _DEVICE_CIRCUITS:
+        return None
+    logger.debug("discovered a %s switcher device", device_type.value)
+    return SwitcherLight(
+        device_type,
+        DeviceState.ON,
+        parser.get_device_id(),
+        parser.get_device_key(),
+        parser.get_ip_type2(),
+        parser.get_mac_type2(),
+        parser.get_name(),
+        device_type.token_needed,
+        _get_lights(parser, device_type),
+    )
+
+
+_DeviceBuilder = Callable[
+    ["DatagramParser", DeviceType, DeviceState], Optional[SwitcherBase]
+]
+
+# Builders of the devices by the category of the device type
+_DEVICE_BUILDERS: Dict[DeviceCategory, _DeviceBuilder] = {
+    DeviceCategory.WATER_HEATER: _build_water_heater,
+    DeviceCategory.POWER_PLUG: _build_power_plug,
+    DeviceCategory.SHUTTER: _build_shutter,
+    DeviceCategory.SINGLE_SHUTTER_DUAL_LIGHT: _build_single_shutter_dual_light,
+    DeviceCategory.DUAL_SHUTTER_SINGLE_LIGHT: _build_dual_shutter_single_light,
+    DeviceCategory.THERMOSTAT: _build_thermostat,
+    DeviceCategory.LIGHT: _build_light,
+}
+
+
+def _build_device(parser: "DatagramParser") -> Optional[SwitcherBase]:
+    """Build the device from a datagram originated from a switcher device.
+
+    Args:
+        parser: the parser of the datagram.
+
+    Returns:
+        The device, or None if the device type is unknown.
+
+    """
+    device_type: DeviceType = parser.get_device_type()
+    if device_type == DeviceType.BREEZE:
+        device_state = parser.get_thermostat_state()
+    else:
+        device_state = parser.get_device_state()
+
+    builder = _DEVICE_BUILDERS.get(device_type.category) if device_type else None
+    return builder(parser, device_type, device_state) if builder else None
+
+
+# A device parsed from a datagram, None for an unknown device, or the parsing error
+_Decoded = Union[SwitcherBase, None, Exception]
+
+
+def _decode_datagram(datagram: bytes) -> _Decoded:
+    """Build the device from a datagram, returning the error instead of raising."""
+    try:
+        return _build_device(DatagramParser(datagram))
+    except Exception as exc:
+        return exc
+
+
+def _decode_datagrams(datagrams: List[bytes]) -> List[_Decoded]:
+    """Build the devices from a chunk of datagrams, used for parsing in an executor.
+
+    A faulty datagram fails only its own item, not the whole chunk.
+    """
+    return [_decode_datagram(datagram) for datagram in datagrams]
+
+
 def _parse_device_from_datagram(
     device_callback: Callable[[SwitcherBase], Any], datagram: bytes
 ) -> None:
@@ -85,280 +372,414 @@ def _parse_device_from_datagram(
     parser = DatagramParser(datagram)
     if not parser.is_switcher_originator():
         logger.debug("received datagram from an unknown source")
+        return
+
+    device = _build_device(parser)
+    if device:
+        device_callback(device)
     else:
-        device_type: DeviceType = parser.get_device_type()
-        if device_type == DeviceType.BREEZE:
-            device_state = parser.get_thermostat_state()
-        else:
-            device_state = parser.get_device_state()
-        if device_state == DeviceState.ON:
-            power_consumption = parser.get_power_consumption()
-            electric_current = watts_to_amps(power_consumption)
-        else:
-            power_consumption = 0
-            electric_current = 0.0
-
-        if device_type and device_type.category == DeviceCategory.WATER_HEATER:
-            logger.debug("discovered a water heater switcher device")
-            device_callback(
-                SwitcherWaterHeater(
-                    device_type,
-                    device_state,
-                    parser.get_device_id(),
-                    parser.get_device_key(),
-                    parser.get_ip_type1(),
-                    parser.get_mac_type1(),
-                    parser.get_name(),
-                    device_type.token_needed,
-                    power_consumption,
-                    electric_current,
-                    (
-                        parser.get_remaining()
-                        if device_state == DeviceState.ON
-                        else "00:00:00"
-                    ),
-                    parser.get_auto_shutdown(),
-                )
-            )
+        warn("discovered an unknown switcher device")
 
-        elif device_type and device_type.category == DeviceCategory.POWER_PLUG:
-            logger.debug("discovered a power plug switcher device")
-            device_callback(
-                SwitcherPowerPlug(
-                    device_type,
-                    device_state,
-                    parser.get_device_id(),
-                    parser.get_device_key(),
-                    parser.get_ip_type1(),
-                    parser.get_mac_type1(),
-                    parser.get_name(),
-                    device_type.token_needed,
-                    power_consumption,
-                    electric_current,
-                )
-            )
 
-        elif device_type and device_type.category == DeviceCategory.SHUTTER:
-            logger.debug("discovered a Runner switcher device")
-            device_callback(
-                SwitcherShutter(
-                    device_type,
-                    DeviceState.ON,
-                    parser.get_device_id(),
-                    parser.get_device_key(),
-                    parser.get_ip_type2(),
-                    parser.get_mac_type2(),
-                    parser.get_name(),
-                    device_type.token_needed,
-                    [
-                        parser.get_shutter_position(
-                            get_shutter_discovery_packet_index(device_type, 0)
-                        )
-                    ],
-                    [
-                        parser.get_shutter_direction(
-                            get_shutter_discovery_packet_index(device_type, 0)
-                        )
-                    ],
-                    [
-                        parser.get_shutter_child_lock(
-                            get_shutter_discovery_packet_index(device_type, 0)
-                        )
-                    ],
-                )
-            )
+@unique
+class UnchangedBroadcastPolicy(Enum):
+    """Enum for selecting the handling of broadcasts repeating the previous state.
 
-        elif (
-            device_type
-            and device_type.category == DeviceCategory.SINGLE_SHUTTER_DUAL_LIGHT
-        ):
-            logger.debug("discovered a Runner S11 switcher device")
-            device_callback(
-                SwitcherSingleShutterDualLight(
-                    device_type,
-                    DeviceState.ON,
-                    parser.get_device_id(),
-                    parser.get_device_key(),
-                    parser.get_ip_type2(),
-                    parser.get_mac_type2(),
-                    parser.get_name(),
-                    device_type.token_needed,
-                    [
-                        parser.get_shutter_position(
-                            get_shutter_discovery_packet_index(device_type, 0)
-                        )
-                    ],
-                    [
-                        parser.get_shutter_direction(
-                            get_shutter_discovery_packet_index(device_type, 0)
-                        )
-                    ],
-                    [
-                        parser.get_shutter_child_lock(
-                            get_shutter_discovery_packet_index(device_type, 0)
-                        )
-                    ],
-                    [
-                        parser.get_light_state(
-                            get_light_discovery_packet_index(device_type, 0)
-                        ),
-                        parser.get_light_state(
-                            get_light_discovery_packet_index(device_type, 1)
-                        ),
-                    ],
-                )
-            )
+    Devices repeat their state broadcast approximately every 4 seconds, a broadcast
+    is unchanged if its bytes, excluding the header, the timestamp and the
+    signature, are identical to the previous broadcast of the same device.
+    """
 
-        elif (
-            device_type
-            and device_type.category == DeviceCategory.DUAL_SHUTTER_SINGLE_LIGHT
-        ):
-            logger.debug("discovered a Runner S12 switcher device")
-            device_callback(
-                SwitcherDualShutterSingleLight(
-                    device_type,
-                    DeviceState.ON,
-                    parser.get_device_id(),
-                    parser.get_device_key(),
-                    parser.get_ip_type2(),
-                    parser.get_mac_type2(),
-                    parser.get_name(),
-                    device_type.token_needed,
-                    [
-                        parser.get_shutter_position(
-                            get_shutter_discovery_packet_index(device_type, 0)
-                        ),
-                        parser.get_shutter_position(
-                            get_shutter_discovery_packet_index(device_type, 1)
-                        ),
-                    ],
-                    [
-                        parser.get_shutter_direction(
-                            get_shutter_discovery_packet_index(device_type, 0)
-                        ),
-                        parser.get_shutter_direction(
-                            get_shutter_discovery_packet_index(device_type, 1)
-                        ),
-                    ],
-                    [
-                        parser.get_shutter_child_lock(
-                            get_shutter_discovery_packet_index(device_type, 0)
-                        ),
-                        parser.get_shutter_child_lock(
-                            get_shutter_discovery_packet_index(device_type, 1)
-                        ),
-                    ],
-                    [
-                        parser.get_light_state(
-                            get_light_discovery_packet_index(device_type, 0)
-                        )
-                    ],
-                )
-            )
+    PARSE = auto()
+    """Parse every broadcast into a new device object."""
+    REUSE = auto()
+    """Send the previous device object, with its ``last_data_update`` refreshed."""
+    SKIP = auto()
+    """Don't send unchanged broadcasts at all."""
 
-        elif device_type and device_type.category == DeviceCategory.THERMOSTAT:
-            logger.debug("discovered a Breeze switcher device")
-            device_callback(
-                SwitcherThermostat(
-                    device_type,
-                    device_state,
-                    parser.get_device_id(),
-                    parser.get_device_key(),
-                    parser.get_ip_type2(),
-                    parser.get_mac_type2(),
-                    parser.get_name(),
-                    device_type.token_needed,
-                    parser.get_thermostat_mode(),
-                    parser.get_thermostat_temp(),
-                    parser.get_thermostat_target_temp(),
-                    parser.get_thermostat_fan_level(),
-                    parser.get_thermostat_swing(),
-                    parser.get_thermostat_remote_id(),
-                )
-            )
 
-        elif (
-            device_type
-            and device_type.category == DeviceCategory.LIGHT
-            and device_type in (DeviceType.LIGHT_SL01, DeviceType.LIGHT_SL01_MINI)
-        ):
-            logger.debug("discovered a Light SL01 switcher device")
-            device_callback(
-                SwitcherLight(
-                    device_type,
-                    DeviceState.ON,
-                    parser.get_device_id(),
-                    parser.get_device_key(),
-                    parser.get_ip_type2(),
-                    parser.get_mac_type2(),
-                    parser.get_name(),
-                    device_type.token_needed,
-                    [
-                        parser.get_light_state(
-                            get_light_discovery_packet_index(device_type, 0)
-                        )
-                    ],
-                )
-            )
+# Datagrams parsed in the executor are submitted in chunks of up to this size
+_OFFLOAD_CHUNK_SIZE = 64
 
-        elif (
-            device_type
-            and device_type.category == DeviceCategory.LIGHT
-            and device_type in (DeviceType.LIGHT_SL02, DeviceType.LIGHT_SL02_MINI)
-        ):
-            logger.debug("discovered a Light SL02 switcher device")
-            device_callback(
-                SwitcherLight(
-                    device_type,
-                    DeviceState.ON,
-                    parser.get_device_id(),
-                    parser.get_device_key(),
-                    parser.get_ip_type2(),
-                    parser.get_mac_type2(),
-                    parser.get_name(),
-                    device_type.token_needed,
-                    [
-                        parser.get_light_state(
-                            get_light_discovery_packet_index(device_type, 0)
-                        ),
-                        parser.get_light_state(
-                            get_light_discovery_packet_index(device_type, 1)
-                        ),
-                    ],
-                )
-            )
+# Volatile parts of the datagrams, the header and the timestamp, are not compared
+_FINGERPRINT_OFFSET = 18
+_TIMESTAMP_OFFSET = 24
+_TIMESTAMP_END = 28
 
-        elif (
-            device_type
-            and device_type.category == DeviceCategory.LIGHT
-            and device_type == DeviceType.LIGHT_SL03
-        ):
-            logger.debug("discovered a Light SL03 switcher device")
-            device_callback(
-                SwitcherLight(
-                    device_type,
-                    DeviceState.ON,
-                    parser.get_device_id(),
-                    parser.get_device_key(),
-                    parser.get_ip_type2(),
-                    parser.get_mac_type2(),
-                    parser.get_name(),
-                    device_type.token_needed,
-                    [
-                        parser.get_light_state(
-                            get_light_discovery_packet_index(device_type, 0)
-                        ),
-                        parser.get_light_state(
-                            get_light_discovery_packet_index(device_type, 1)
-                        ),
-                        parser.get_light_state(
-                            get_light_discovery_packet_index(device_type, 2)
-                        ),
-                    ],
-                )
-            )
+
+def _get_fingerprint(datagram: bytes) -> Tuple[bytes, bytes]:
+    """Return the device id and the meaningful bytes of a datagram."""
+    message = memoryview(datagram)
+    device_id = _DEVICE_ID.unpack_from(message, _DEVICE_ID_OFFSET)[0]
+    fingerprint = (
+        message[_FINGERPRINT_OFFSET:_TIMESTAMP_OFFSET].tobytes()
+        + message[_TIMESTAMP_END:-SIGNATURE_LENGTH].tobytes()
+    )
+    return device_id, fingerprint
+
+
+def _get_switching_state(device: SwitcherBase) -> Tuple[Any, ...]:
+    """Return the on and off states of a device, its lights and its shutters.
+
+    Lights and shutters are always on, their lights and the directions of their
+    shutters are switched instead.
+    """
+    lights = getattr(device, "light", None)
+    directions = getattr(device, "direction", None)
+    return (
+        device.device_state,
+        tuple(lights) if isinstance(lights, list) else (),
+        tuple(directions) if isinstance(directions, list) else (),
+    )
+
+
+@final
+@dataclass(frozen=True)
+class SwitcherDeviceChange:
+    """Changes in the tracked fields of a device between two broadcasts.
+
+    Args:
+        device: the device as parsed from the latest broadcast.
+        previous: the previous values of the changed fields, empty for a device
+            seen for the first time.
+        current: the current values of the changed fields, all the tracked fields
+            for a device seen for the first time.
+
+    """
+
+    device: SwitcherBase
+    previous: Dict[str, Any]
+    current: Dict[str, Any]
+
+    @property
+    def discovered(self) -> bool:
+        """Return true if the device was seen for the first time."""
+        return not self.previous
+
+
+def _get_tracked_values(
+    device: SwitcherBase, change_fields: Optional[Tuple[str, ...]]
+) -> Dict[str, Any]:
+    """Return the values of the tracked fields the device has."""
+    if change_fields is None:
+        return {
+            device_field.name: getattr(device, device_field.name)
+            for device_field in fields(device)
+            if device_field.name != "last_data_update"
+        }
+    return {
+        name: getattr(device, name) for name in change_fields if hasattr(device, name)
+    }
+
+
+@unique
+class OverflowPolicy(Enum):
+    """Enum for selecting the handling of devices arriving at a full buffer."""
+
+    DROP_OLDEST = auto()
+    """Drop the oldest buffered device to make room for the new one."""
+    DROP_NEWEST = auto()
+    """Drop the new device, keeping the buffered ones."""
+    COALESCE = auto()
+    """Replace a buffered device with its newer state, keeping its place in line.
+
+    A new device arriving at a buffer full of other devices drops the oldest one.
+    """
+
+
+@final
+class _DeviceBuffer:
+    """Bounded buffer of devices, filled by the bridge and awaited by a consumer."""
+
+    def __init__(self, maxsize: int, overflow: OverflowPolicy) -> None:
+        """Initialize the buffer."""
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self._maxsize = maxsize
+        self._overflow = overflow
+        self._devices: "OrderedDict[Any, SwitcherBase]" = OrderedDict()
+        self._sequence = 0
+        self._ready = Event()
+        self._closed = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        """Return the number of buffered devices."""
+        return len(self._devices)
+
+    def put(self, device: SwitcherBase) -> None:
+        """Buffer a device without blocking, applying the overflow policy."""
+        if self._closed:
+            return
+        if self._overflow == OverflowPolicy.COALESCE:
+            key: Any = device.device_id
+            if key in self._devices:
+                self._devices[key] = device
+                return
         else:
-            warn("discovered an unknown switcher device")
+            key = self._sequence
+            self._sequence += 1
+
+        if len(self._devices) >= self._maxsize:
+            self.dropped += 1
+            if self._overflow == OverflowPolicy.DROP_NEWEST:
+                return
+            self._devices.popitem(last=False)
+        self._devices[key] = device
+        self._ready.set()
+
+    async def get(self) -> SwitcherBase:
+        """Wait for the next device, raise StopAsyncIteration once closed and empty."""
+        while not self._devices:
+            if self._closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        return self._devices.popitem(last=False)[1]
+
+    def close(self) -> None:
+        """Stop accepting devices, the buffered devices can still be consumed."""
+        self._closed = True
+        self._ready.set()
+
+
+@final
+class SwitcherStream:
+    """An iterator over the devices found, create with ``SwitcherBridge.stream``.
+
+    The devices are buffered from the creation of the stream, not only once the
+    iteration starts. The iteration ends after the bridge is stopped and the
+    buffered devices are consumed.
+    """
+
+    def __init__(
+        self, buffer: _DeviceBuffer, on_close: Callable[[_DeviceBuffer], None]
+    ) -> None:
+        """Initialize the stream."""
+        self._buffer = buffer
+        self._on_close = on_close
+        self._closed = False
+
+    def __aiter__(self) -> "SwitcherStream":
+        """Return the stream as its own iterator."""
+        return self
+
+    async def __anext__(self) -> SwitcherBase:
+        """Wait for the next device, end the iteration once the stream is closed."""
+        try:
+            return await self._buffer.get()
+        except StopAsyncIteration:
+            self.close()
+            raise
+
+    @property
+    def pending(self) -> int:
+        """Return the number of buffered devices."""
+        return len(self._buffer)
+
+    @property
+    def dropped(self) -> int:
+        """Return the number of devices dropped by the overflow policy."""
+        return self._buffer.dropped
+
+    def close(self) -> None:
+        """Stop buffering devices, the buffered devices can still be consumed."""
+        if not self._closed:
+            self._closed = True
+            self._buffer.close()
+            self._on_close(self._buffer)
+
+    async def aclose(self) -> None:
+        """Close the stream, for use with ``contextlib.aclosing``."""
+        self.close()
+
+
+@final
+class SwitcherSubscription:
+    """A subscriber of the bridge, create with ``SwitcherBridge.subscribe``.
+
+    Every subscription has its own buffer and delivery task, a slow subscriber
+    doesn't delay the other subscribers.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[SwitcherBase], Any],
+        device_types: Optional[Iterable[DeviceType]],
+        device_ids: Optional[Iterable[str]],
+        buffer: _DeviceBuffer,
+        on_error: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Initialize the subscription."""
+        self._callback = callback
+        self._on_error = on_error
+        self._device_types: Optional[FrozenSet[DeviceType]] = (
+            frozenset(device_types) if device_types is not None else None
+        )
+        self._device_ids: Optional[FrozenSet[str]] = (
+            frozenset(device_ids) if device_ids is not None else None
+        )
+        self._buffer = buffer
+        self._task: Optional["Task[None]"] = None
+
+    @property
+    def pending(self) -> int:
+        """Return the number of devices waiting for delivery."""
+        return len(self._buffer)
+
+    @property
+    def dropped(self) -> int:
+        """Return the number of devices dropped by the overflow policy."""
+        return self._buffer.dropped
+
+    def accepts(self, device: SwitcherBase) -> bool:
+        """Return true if the device passes the filters of the subscription."""
+        device_types, device_ids = self._device_types, self._device_ids
+        if device_types is not None and device.device_type not in device_types:
+            return False
+        return device_ids is None or device.device_id in device_ids
+
+    def put(self, device: SwitcherBase) -> None:
+        """Buffer a device for delivery if it passes the filters."""
+        if self.accepts(device):
+            self._buffer.put(device)
+
+    async def _deliver(self) -> None:
+        """Deliver the buffered devices one by one until the buffer is closed."""
+        while True:
+            try:
+                device = await self._buffer.get()
+            except StopAsyncIteration:
+                return
+            try:
+                result = self._callback(device)
+                if isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("subscriber callback failed")
+                if self._on_error:
+                    self._on_error()
+
+
+@final
+class LatencyHistogram:
+    """Histogram of latencies counted in fixed buckets, in seconds."""
+
+    BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        self._counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Count a latency in its bucket."""
+        self._counts[bisect_left(self.BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float:
+        """Return the mean latency, 0 if no latency was recorded."""
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def buckets(self) -> Dict[float, int]:
+        """Return the number of latencies by the upper bound of their bucket."""
+        return dict(zip(self.BUCKETS + (float("inf"),), self._counts))
+
+    def quantile(self, quantile: float) -> float:
+        """Return the upper bound of the bucket holding the quantile latency.
+
+        Args:
+            quantile: the quantile between 0 and 1, e.g. 0.99.
+
+        Returns:
+            The upper bound of the bucket, or the maximum latency for the last bucket.
+
+        """
+        rank = quantile * self.count
+        counted = 0
+        for bound, count in zip(self.BUCKETS, self._counts):
+            counted += count
+            if count and counted >= rank:
+                return bound
+        return self.max
+
+
+@final
+@dataclass(frozen=True)
+class SwitcherBridgeStatistics:
+    """Snapshot of the bridge counters, taken with ``SwitcherBridge.statistics``.
+
+    Compare the datagrams received with the devices sent for telling devices that
+    stopped broadcasting apart from a bridge that stopped keeping up.
+
+    Args:
+        received: the number of datagrams received by port, before filtering.
+        foreign: the number of datagrams rejected as not broadcast by a switcher.
+        denied: the number of datagrams rejected by the allow and deny lists.
+        rate_limited: the number of datagrams dropped by the rate limiter.
+        parse_failures: the number of switcher datagrams no device was parsed from.
+        overloaded: the number of datagrams dropped for exceeding the maximum
+            number of datagrams parsed in the executor at once.
+        devices: the number of devices sent to the callbacks, streams and
+            subscribers.
+        callback_errors: the number of callbacks and subscribers raising an error.
+        dropped_callbacks: the number of coroutine callbacks dropped for exceeding
+            the maximum number of pending callbacks.
+        kernel_drops: the number of datagrams dropped by the kernel for the sockets
+            of the bridge, refreshed in the background every 10 seconds, None where
+            unavailable, e.g. not on linux.
+        parse_latency: the latencies of parsing datagrams in the event loop.
+        dispatch_latency: the latencies from receiving a datagram to dispatching its
+            device to the callbacks, streams and subscribers, including the time
+            spent in the executor and the throttle. The time until the coroutine
+            callbacks complete is in ``SwitcherBridge.callback_latency``.
+
+    """
+
+    received: Dict[int, int]
+    foreign: int
+    denied: int
+    rate_limited: int
+    parse_failures: int
+    overloaded: int
+    devices: int
+    callback_errors: int
+    dropped_callbacks: int
+    kernel_drops: Optional[int]
+    parse_latency: LatencyHistogram
+    dispatch_latency: LatencyHistogram
+
+
+# Drops of the udp sockets by inode, linux only
+_PROC_NET_UDP = "/proc/net/udp"
+_PROC_NET_UDP_INODE = 9
+_PROC_NET_UDP_DROPS = 12
+_KERNEL_DROPS_INTERVAL = 10
+
+
+def _get_kernel_drops(inodes: Iterable[int]) -> Optional[int]:
+    """Return the datagrams the kernel dropped for the sockets, None if unknown."""
+    inodes = set(inodes)
+    if not inodes:
+        return None
+    try:
+        with open(_PROC_NET_UDP) as proc_net_udp:
+            lines = proc_net_udp.readlines()[1:]
+    except OSError:
+        return None
+    drops = 0
+    for line in lines:
+        columns = line.split()
+        if len(columns) > _PROC_NET_UDP_DROPS:
+            if int(columns[_PROC_NET_UDP_INODE]) in inodes:
+                drops += int(columns[_PROC_NET_UDP_DROPS])
+    return drops
 
 
 @final
@@ -367,12 +788,139 @@ class SwitcherBridge:
 
     Args:
         on_device: a callable to which every new SwitcherBase device found will be send.
+        unchanged_broadcasts: the handling of broadcasts identical to the previous
+            broadcast of the same device, parsed into a new device by default.
+        on_change: a callable to which a SwitcherDeviceChange will be send only when
+            the tracked fields of a device change.
+        change_fields: the names of the fields to track for on_change, e.g.
+            ``device_state`` or ``position``, all the fields of the device except
+            ``last_data_update`` by default.
+        registry: a registry to keep the latest state of every device in.
+        callback_concurrency: the maximum number of coroutine callbacks running at
+            once, coroutine functions can be used as callbacks.
+        drain_timeout: the period ``stop`` waits for running coroutine callbacks
+            before cancelling them.
+        on_devices: a callable to which the devices found are sent in batches,
+            a device appears once in a batch with its latest state.
+        batch_window: the period to collect devices for a batch, by default a batch
+            holds the devices found in a single event loop iteration.
+        executor: a thread or process pool executor to parse datagrams in under
+            load, the datagrams are parsed in the event loop by default.
+        offload_threshold: the number of datagrams per second above which datagrams
+            are parsed in the executor, in chunks.
+        max_in_flight: the maximum number of datagrams parsed in the executor at
+            once, datagrams exceeding it are dropped and counted. Devices parsed in
+            the executor are sent in order, a device older than one already sent
+            for the same device id is dropped.
+        datagram_filter: the filter rejecting datagrams before parsing, by default
+            only datagrams not broadcast by switcher devices are rejected.
+        rate_limiter: the limiter dropping datagrams of sources sending too fast,
+            shared by all the broadcast ports, no limit by default.
+        throttle: the minimal period between two devices sent for the same device
+            id, the latest device is sent at the end of the period, and a device
+            turning on or off, switching a light or moving a shutter is sent right
+            away. The registry is kept up to date regardless, no throttling by
+            default.
+        ports: the udp ports to listen on, all the broadcast ports by default, e.g.
+            only the protocol type 2 ports when using only type 2 devices.
+        bind_address: the address of the local interface to listen on, all the
+            interfaces by default.
+        receive_buffer_size: the size of the receive buffer of the sockets, in
+            bytes, the system default by default.
+        reuse_port: allow other processes to listen on the same ports, on platforms
+            supporting ``SO_REUSEPORT``.
+        max_pending_callbacks: the maximum number of coroutine callbacks running or
+            waiting to run, callbacks exceeding it are dropped and counted.
 
     """
 
-    def __init__(self, on_device: Callable[[SwitcherBase], Any]) -> None:
+    def __init__(
+        self,
+        on_device: Optional[Callable[[SwitcherBase], Any]] = None,
+        unchanged_broadcasts: UnchangedBroadcastPolicy = UnchangedBroadcastPolicy.PARSE,
+        on_change: Optional[Callable[[SwitcherDeviceChange], Any]] = None,
+        change_fields: Optional[Iterable[str]] = None,
+        registry: Optional[SwitcherDeviceRegistry] = None,
+        callback_concurrency: int = 16,
+        drain_timeout: timedelta = timedelta(seconds=5),
+        on_devices: Optional[Callable[[List[SwitcherBase]], Any]] = None,
+        batch_window: Optional[timedelta] = None,
+        executor: Optional[Executor] = None,
+        offload_threshold: int = 1000,
+        max_in_flight: int = 1024,
+        datagram_filter: Optional["DatagramFilter"] = None,
+        rate_limiter: Optional["SourceRateLimiter"] = None,
+        throttle: Optional[timedelta] = None,
+        ports: Optional[Iterable[int]] = None,
+        bind_address: str = "0.0.0.0",  # nosec
+        receive_buffer_size: Optional[int] = None,
+        reuse_port: bool = False,
+        max_pending_callbacks: int = 1024,
+    ) -> None:
         """Initialize the switcher bridge."""
+        if callback_concurrency < 1:
+            raise ValueError("callback concurrency must be at least 1")
+        if max_pending_callbacks < 1:
+            raise ValueError("max pending callbacks must be at least 1")
+        if max_in_flight < 1:
+            raise ValueError("max in flight must be at least 1")
+        if reuse_port and SO_REUSEPORT is None:
+            raise ValueError("reuse port is not supported on this platform")
         self._on_device = on_device
+        self._unchanged_broadcasts = unchanged_broadcasts
+        self._broadcasts: Dict[bytes, Tuple[bytes, SwitcherBase]] = {}
+        self._on_change = on_change
+        self._change_fields = tuple(change_fields) if change_fields else None
+        self._tracked_values: Dict[str, Dict[str, Any]] = {}
+        self._registry = registry
+        self._streams: List[_DeviceBuffer] = []
+        self._subscriptions: List[SwitcherSubscription] = []
+        self._callback_semaphore = Semaphore(callback_concurrency)
+        self._callback_tasks: Set["Task[None]"] = set()
+        self._max_pending_callbacks = max_pending_callbacks
+        self._drain_timeout = drain_timeout.total_seconds()
+        self.callback_latency = LatencyHistogram()
+        self._on_devices = on_devices
+        self._batch_window = batch_window.total_seconds() if batch_window else None
+        self._batch: Dict[str, SwitcherBase] = {}
+        self._batch_flush: Optional[Handle] = None
+        self._executor = executor
+        self._offload_threshold = offload_threshold
+        self._max_in_flight = max_in_flight
+        self._in_flight: Set["Future[List[_Decoded]]"] = set()
+        self._in_flight_datagrams = 0
+        self._chunk: List[Tuple[bytes, Callable[[SwitcherBase], None], int]] = []
+        self._sequence = 0
+        self._sent_sequences: Dict[str, int] = {}
+        self._chunk_flush: Optional[Handle] = None
+        self._load_window_start = 0.0
+        self._load_count = 0
+        self._datagram_filter = (
+            datagram_filter if datagram_filter is not None else DatagramFilter()
+        )
+        self._rate_limiter = rate_limiter
+        self._throttle = throttle.total_seconds() if throttle else None
+        self._last_sent: Dict[str, Tuple[float, Tuple[Any, ...]]] = {}
+        self._throttled: Dict[str, Tuple[SwitcherBase, Optional[float]]] = {}
+        self._throttle_flushes: Dict[str, Handle] = {}
+        self._ports = list(ports) if ports is not None else None
+        if self._ports is not None and not self._ports:
+            raise ValueError("ports must not be empty")
+        self._bind_address = bind_address
+        self._receive_buffer_size = receive_buffer_size
+        self._reuse_port = reuse_port
+        self.parse_latency = LatencyHistogram()
+        self.dispatch_latency = LatencyHistogram()
+        self._protocols: Dict[int, UdpClientProtocol] = {}
+        self._socket_inodes: Dict[int, int] = {}
+        self._kernel_drops: Optional[int] = None
+        self._kernel_drops_reader: Optional["Task[None]"] = None
+        self._foreign = 0
+        self._parse_failures = 0
+        self._overloaded = 0
+        self._devices_sent = 0
+        self._callback_errors = 0
+        self._dropped_callbacks = 0
         self._is_running = False
         self._transports: Dict[int, Optional[BaseTransport]] = {}
 
@@ -392,24 +940,78 @@ async def __aexit__(
 
     async def start(self) -> None:
         """Create an asynchronous listener and start the bridge."""
-        for broadcast_port in SWITCHER_UDP_BROADCAST_PORTS:
+        for broadcast_port in self._get_ports():
             logger.info("starting the udp bridge on port %s", broadcast_port)
             protocol_factory = UdpClientProtocol(
-                partial(_parse_device_from_datagram, self._on_device)
+                partial(self._handle_datagram, port=broadcast_port),
+                self._datagram_filter,
+                self._rate_limiter,
             )
+            sock = self._create_socket(broadcast_port)
+            self._socket_inodes[broadcast_port] = fstat(sock.fileno()).st_ino
             transport, protocol = await get_running_loop().create_datagram_endpoint(
-                lambda: protocol_factory,
-                local_addr=("0.0.0.0", broadcast_port),  # nosec
-                family=AF_INET,
+                lambda: protocol_factory, sock=sock
             )
+            self._protocols[broadcast_port] = protocol_factory
             self._transports[broadcast_port] = transport
             logger.debug("udp bridge on port %s started", broadcast_port)
 
         self._is_running = True
+        self._kernel_drops_reader = get_running_loop().create_task(
+            self._read_kernel_drops()
+        )
+
+    async def _read_kernel_drops(self) -> None:
+        """Refresh the kernel drops periodically, reading them off the event loop.
 
-    async def stop(self) -> None:
-        """Stop the asynchronous bridge."""
-        for broadcast_port in SWITCHER_UDP_BROADCAST_PORTS:
+        The table of the udp sockets is large on a busy host, reading it in the
+        event loop on every statistics snapshot would stall the loop.
+        """
+        inodes = list(self._socket_inodes.values())
+        while True:
+            drops = await get_running_loop().run_in_executor(
+                None, _get_kernel_drops, inodes
+            )
+            if drops is None:
+                # unavailable on this platform
+                return
+            self._kernel_drops = drops
+            await sleep(_KERNEL_DROPS_INTERVAL)
+
+    def _get_ports(self) -> List[int]:
+        """Return the ports to listen on."""
+        if self._ports is not None:
+            return self._ports
+        return SWITCHER_UDP_BROADCAST_PORTS
+
+    def _create_socket(self, port: int) -> socket:
+        """Create a udp socket with the configured options, bound to the port."""
+        sock = socket(AF_INET, SOCK_DGRAM)
+        try:
+            if self._reuse_port:
+                sock.setsockopt(SOL_SOCKET, SO_REUSEPORT, 1)
+            if self._receive_buffer_size:
+                sock.setsockopt(SOL_SOCKET, SO_RCVBUF, self._receive_buffer_size)
+            sock.bind((self._bind_address, port))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the asynchronous bridge.
+
+        Args:
+            drain: wait for the running coroutine callbacks up to the drain timeout
+                before cancelling them, or cancel them right away.
+
+        """
+        if self._kernel_drops_reader:
+            self._kernel_drops_reader.cancel()
+            await wait([self._kernel_drops_reader])
+            self._kernel_drops_reader = None
+            self._kernel_drops = None
+        for broadcast_port in self._get_ports():
             transport = self._transports.get(broadcast_port)
 
             if transport and not transport.is_closing():
@@ -418,22 +1020,584 @@ async def stop(self) -> None:
             else:
                 logger.info("udp bridge on port %s not started", broadcast_port)
 
+        # send the devices still being parsed or held back before closing the
+        # streams and the subscriptions they are sent to
+        if self._chunk:
+            self._submit_chunk()
+        if self._in_flight:
+            await wait(self._in_flight)
+        for device_id in list(self._throttle_flushes):
+            self._throttle_flushes[device_id].cancel()
+            self._flush_throttled(device_id)
+        if self._batch_flush:
+            self._batch_flush.cancel()
+            self._flush_batch()
+        for subscription in self._subscriptions:
+            subscription._buffer.close()
+        await self._stop_callbacks(drain)
+        self._subscriptions.clear()
+        # the streams are closed last, including streams created while stopping
+        for stream in self._streams:
+            stream.close()
+        self._streams.clear()
         self._is_running = False
 
+    async def _stop_callbacks(self, drain: bool) -> None:
+        """Wait for or cancel the running callbacks and subscriber deliveries."""
+        tasks = set(self._callback_tasks)
+        tasks.update(
+            subscription._task
+            for subscription in self._subscriptions
+            if subscription._task
+        )
+        if not tasks:
+            return
+        if drain:
+            logger.debug("draining %s callbacks", len(tasks))
+            await wait(tasks, timeout=self._drain_timeout)
+        for task in tasks:
+            task.cancel()
+        await wait(tasks)
+
     @property
     def is_running(self) -> bool:
         """bool: Return true if bridge is running."""
         return self._is_running
 
+    @property
+    def statistics(self) -> SwitcherBridgeStatistics:
+        """SwitcherBridgeStatistics: Return a snapshot of the bridge counters."""
+        datagram_filter, rate_limiter = self._datagram_filter, self._rate_limiter
+        return SwitcherBridgeStatistics(
+            received={
+                port: protocol.received for port, protocol in self._protocols.items()
+            },
+            foreign=self._foreign + datagram_filter.foreign,
+            denied=datagram_filter.rejected - datagram_filter.foreign,
+            rate_limited=rate_limiter.dropped if rate_limiter else 0,
+            parse_failures=self._parse_failures,
+            overloaded=self._overloaded,
+            devices=self._devices_sent,
+            callback_errors=self._callback_errors,
+            dropped_callbacks=self._dropped_callbacks,
+            kernel_drops=self._kernel_drops if self._is_running else None,
+            parse_latency=self.parse_latency,
+            dispatch_latency=self.dispatch_latency,
+        )
+
+    def subscribe(
+        self,
+        callback: Callable[[SwitcherBase], Any],
+        device_types: Optional[Iterable[DeviceType]] = None,
+        device_ids: Optional[Iterable[str]] = None,
+        maxsize: int = 100,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ) -> SwitcherSubscription:
+        """Subscribe a callback to the devices found, until unsubscribed or stopped.
+
+        The devices are delivered to each subscriber by its own task from its own
+        buffer, the overflow policy applies once the buffer is full.
+
+        Args:
+            callback: a callable or a coroutine function the devices are sent to.
+            device_types: only devices of these types, all types by default.
+            device_ids: only devices with these ids, all devices by default.
+            maxsize: the maximum number of devices waiting for delivery.
+            overflow: the handling of devices arriving at a full buffer.
+
+        Returns:
+            The subscription, for passing to ``unsubscribe``.
+
+        """
+        subscription = SwitcherSubscription(
+            callback,
+            device_types,
+            device_ids,
+            _DeviceBuffer(maxsize, overflow),
+            self._count_callback_error,
+        )
+        subscription._task = get_running_loop().create_task(subscription._deliver())
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: SwitcherSubscription) -> None:
+        """Stop delivering devices to a subscriber, dropping its pending devices."""
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+        subscription._buffer.close()
+        if subscription._task:
+            subscription._task.cancel()
+
+    def stream(
+        self,
+        maxsize: int = 100,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ) -> SwitcherStream:
+        """Iterate over the devices found, buffered for a slow consumer.
+
+        The devices are buffered without blocking the receiving of the datagrams, the
+        overflow policy applies once the buffer is full. The iteration ends after
+        the bridge is stopped and the buffered devices are consumed, right away for
+        a bridge not running.
+
+        Args:
+            maxsize: the maximum number of buffered devices.
+            overflow: the handling of devices arriving at a full buffer.
+
+        Returns:
+            A ``SwitcherStream`` iterating over every SwitcherBase device found.
+
+        """
+        buffer = _DeviceBuffer(maxsize, overflow)
+        stream = SwitcherStream(buffer, self._remove_stream)
+        if self._is_running:
+            self._streams.append(buffer)
+        else:
+            stream.close()
+        return stream
+
+    def _remove_stream(self, buffer: _DeviceBuffer) -> None:
+        """Stop sending devices to the buffer of a closed stream."""
+        if buffer in self._streams:
+            self._streams.remove(buffer)
+        if buffer.dropped:
+            logger.debug("stream dropped %s devices", buffer.dropped)
+
+    def _handle_datagram(self, datagram: bytes, port: Optional[int] = None) -> None:
+        """Parse a datagram, unless unchanged, and send the device to the callback."""
+        received = perf_counter()
+        if (
+            self._unchanged_broadcasts == UnchangedBroadcastPolicy.PARSE
+            or not _is_switcher_datagram(datagram)
+        ):
+            self._parse(datagram, partial(self._emit, port=port, received=received))
+            return
+
+        device_id, fingerprint = _get_fingerprint(datagram)
+        previous = self._broadcasts.get(device_id)
+        if previous and previous[0] == fingerprint:
+            if self._unchanged_broadcasts == UnchangedBroadcastPolicy.REUSE:
+                previous[1].last_data_update = datetime.now()
+                self._emit(previous[1], port, received)
+            elif self._registry is not None:
+                # a skipped broadcast still proves the device is online
+                self._registry.update(previous[1], port)
+            return
+
+        def remember_device(device: SwitcherBase) -> None:
+            self._broadcasts[device_id] = (fingerprint, device)
+            self._emit(device, port, received)
+
+        self._parse(datagram, remember_device)
+
+    def _parse(
+        self, datagram: bytes, on_device: Callable[[SwitcherBase], None]
+    ) -> None:
+        """Parse a datagram in the event loop, or in the executor under load."""
+        if not _is_switcher_datagram(datagram):
+            logger.debug("received datagram from an unknown source")
+            self._foreign += 1
+            return
+        # datagrams are numbered for sending the devices in order, a device parsed
+        # in the event loop can overtake an older one still parsed in the executor
+        self._sequence += 1
+        if not self._should_offload():
+            started = perf_counter()
+            decoded = _decode_datagram(datagram)
+            self.parse_latency.record(perf_counter() - started)
+            self._deliver_parsed(on_device, decoded, self._sequence)
+            return
+        if self._in_flight_datagrams >= self._max_in_flight:
+            # parsing in the event loop at peak load would stall it, drop instead
+            self._overloaded += 1
+            return
+
+        # submitting to the executor costs more than parsing a single datagram
+        self._chunk.append((datagram, on_device, self._sequence))
+        self._in_flight_datagrams += 1
+        if len(self._chunk) >= _OFFLOAD_CHUNK_SIZE:
+            self._submit_chunk()
+        elif not self._chunk_flush:
+            self._chunk_flush = get_running_loop().call_soon(self._submit_chunk)
+
+    def _should_offload(self) -> bool:
+        """Return true if the datagram rate exceeds the offload threshold."""
+        if not self._executor:
+            return False
+        now = monotonic()
+        if now - self._load_window_start >= 1:
+            self._load_window_start = now
+            self._load_count = 0
+        self._load_count += 1
+        return self._load_count > self._offload_threshold
+
+    def _submit_chunk(self) -> None:
+        """Parse the chunk of pending datagrams in the executor."""
+        if self._chunk_flush:
+            self._chunk_flush.cancel()
+            self._chunk_flush = None
+        chunk, self._chunk = self._chunk, []
+        future = get_running_loop().run_in_executor(
+            self._executor, _decode_datagrams, [datagram for datagram, _, _ in chunk]
+        )
+        self._in_flight.add(future)
+        future.add_done_callback(
+            partial(self._parsed, [(on_device, seq) for _, on_device, seq in chunk])
+        )
+
+    def _parsed(
+        self,
+        callbacks: List[Tuple[Callable[[SwitcherBase], None], int]],
+        future: "Future[List[_Decoded]]",
+    ) -> None:
+        """Send the devices parsed in the executor to their callbacks."""
+        self._in_flight.discard(future)
+        self._in_flight_datagrams -= len(callbacks)
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc:
+            logger.error("parsing %s datagrams failed: %s", len(callbacks), exc)
+            self._parse_failures += len(callbacks)
+            return
+        for (on_device, sequence), decoded in zip(callbacks, future.result()):
+            self._deliver_parsed(on_device, decoded, sequence)
+
+    def _deliver_parsed(
+        self,
+        on_device: Callable[[SwitcherBase], None],
+        decoded: _Decoded,
+        sequence: int,
+    ) -> None:
+        """Send a parsed device to its callback, counting the failures."""
+        if isinstance(decoded, Exception):
+            logger.error("parsing a datagram failed: %s", decoded)
+            self._parse_failures += 1
+        elif decoded is None:
+            self._parse_failures += 1
+            warn("discovered an unknown switcher device")
+        elif self._executor is None:
+            on_device(decoded)
+        elif sequence > self._sent_sequences.get(decoded.device_id, 0):
+            self._sent_sequences[decoded.device_id] = sequence
+            on_device(decoded)
+        else:
+            logger.debug("dropping an outdated device %s", decoded.device_id)
+
+    def _emit(
+        self,
+        device: SwitcherBase,
+        port: Optional[int] = None,
+        received: Optional[float] = None,
+    ) -> None:
+        """Send a parsed device to the registry and the callbacks."""
+        if self._registry is not None:
+            self._registry.update(device, port)
+        if self._throttle is None:
+            self._send(device, received)
+            return
+
+        device_id = device.device_id
+        last_sent = self._last_sent.get(device_id)
+        if last_sent is None or last_sent[1] != _get_switching_state(device):
+            flush = self._throttle_flushes.pop(device_id, None)
+            if flush:
+                flush.cancel()
+                self._throttled.pop(device_id, None)
+            self._send(device, received)
+            return
+        due = last_sent[0] + self._throttle - monotonic()
+        if due <= 0 and device_id not in self._throttle_flushes:
+            self._send(device, received)
+            return
+        # trailing edge, only the latest device is sent at the end of the period
+        self._throttled[device_id] = (device, received)
+        if device_id not in self._throttle_flushes:
+            self._throttle_flushes[device_id] = get_running_loop().call_later(
+                due, self._flush_throttled, device_id
+            )
+
+    def _flush_throttled(self, device_id: str) -> None:
+        """Send the latest device held back by the throttle."""
+        self._throttle_flushes.pop(device_id, None)
+        throttled = self._throttled.pop(device_id, None)
+        if throttled:
+            self._send(*throttled)
+
+    def _send(self, device: SwitcherBase, received: Optional[float] = None) -> None:
+        """Send a device to the callbacks, streams, subscribers and batch."""
+        self._devices_sent += 1
+        if received is not None:
+            self.dispatch_latency.record(perf_counter() - received)
+        if self._throttle is not None:
+            self._last_sent[device.device_id] = (
+                monotonic(),
+                _get_switching_state(device),
+            )
+        if self._on_device:
+            self._run_callback(self._on_device, device)
+        if self._on_change:
+            change = self._get_change(device)
+            if change:
+                self._run_callback(self._on_change, change)
+        for stream in self._streams:
+            stream.put(device)
+        for subscription in self._subscriptions:
+            subscription.put(device)
+        if self._on_devices:
+            self._batch[device.device_id] = device
+            if not self._batch_flush:
+                self._schedule_batch_flush()
+
+    def _schedule_batch_flush(self) -> None:
+        """Schedule sending the batch after the window or the current iteration."""
+        loop = get_running_loop()
+        if self._batch_window:
+            self._batch_flush = loop.call_later(self._batch_window, self._flush_batch)
+        else:
+            self._batch_flush = loop.call_soon(self._flush_batch)
+
+    def _flush_batch(self) -> None:
+        """Send the collected devices to the batch callback."""
+        self._batch_flush = None
+        if self._on_devices and self._batch:
+            devices = list(self._batch.values())
+            self._batch.clear()
+            self._run_callback(self._on_devices, devices)
+
+    def _run_callback(self, callback: Callable[[Any], Any], argument: Any) -> None:
+        """Call a callback, scheduling coroutine callbacks as tasks."""
+        started = perf_counter()
+        if iscoroutinefunction(callback):
+            if self._can_schedule_callback():
+                self._schedule_callback(partial(callback, argument), started)
+            return
+        try:
+            result = callback(argument)
+        except Exception:
+            logger.exception("device callback failed")
+            self._count_callback_error()
+            return
+        if isawaitable(result):
+            if self._can_schedule_callback():
+                self._schedule_callback(lambda: result, started)
+            elif iscoroutine(result):
+                result.close()
+        else:
+            self.callback_latency.record(perf_counter() - started)
+
+    def _can_schedule_callback(self) -> bool:
+        """Return true if a coroutine callback can be scheduled, counting drops.
+
+        The concurrency limit applies only once a callback task runs, bounding the
+        number of tasks keeps a slow callback from piling them up during a burst.
+        """
+        if len(self._callback_tasks) < self._max_pending_callbacks:
+            return True
+        if not self._dropped_callbacks:
+            logger.warning("dropping device callbacks, too many callbacks pending")
+        self._dropped_callbacks += 1
+        return False
+
+    def _schedule_callback(
+        self, call: Callable[[], Awaitable[Any]], started: float
+    ) -> None:
+        """Run a coroutine callback in a task tracked until done."""
+        task = get_running_loop().create_task(self._await_callback(call, started))
+        self._callback_tasks.add(task)
+        task.add_done_callback(self._callback_tasks.discard)
+
+    async def _await_callback(
+        self, call: Callable[[], Awaitable[Any]], started: float
+    ) -> None:
+        """Await a coroutine callback under the concurrency limit."""
+        try:
+            async with self._callback_semaphore:
+                await call()
+        except Exception:
+            logger.exception("device callback failed")
+            self._count_callback_error()
+        finally:
+            self.callback_latency.record(perf_counter() - started)
+
+    def _count_callback_error(self) -> None:
+        """Count a callback or a subscriber raising an error."""
+        self._callback_errors += 1
+
+    def _get_change(self, device: SwitcherBase) -> Optional[SwitcherDeviceChange]:
+        """Return the changes in the tracked fields since the previous broadcast."""
+        values = _get_tracked_values(device, self._change_fields)
+        previous_values = self._tracked_values.get(device.device_id)
+        self._tracked_values[device.device_id] = values
+        if previous_values is None:
+            return SwitcherDeviceChange(device, {}, values)
+
+        changed = [
+            name
+            for name, value in values.items()
+            if name not in previous_values or previous_values[name] != value
+        ]
+        if not changed:
+            return None
+        return SwitcherDeviceChange(
+            device,
+            {name: previous_values.get(name) for name in changed},
+            {name: values[name] for name in changed},
+        )
+
+
+@final
+class DatagramFilter:
+    """Rejection of datagrams by their raw bytes, before parsing them.
+
+    Datagrams not broadcast by a switcher device are always rejected, checking only
+    their length and magic bytes. A datagram is also rejected if its source address
+    or device id is denied, or is missing from an allow list when one is set.
+
+    Args:
+        allowed_addresses: accept only datagrams from these ip addresses.
+        denied_addresses: reject datagrams from these ip addresses.
+        allowed_device_ids: accept only datagrams of these device ids.
+        denied_device_ids: reject datagrams of these device ids.
+
+    """
+
+    def __init__(
+        self,
+        allowed_addresses: Optional[Iterable[str]] = None,
+        denied_addresses: Optional[Iterable[str]] = None,
+        allowed_device_ids: Optional[Iterable[str]] = None,
+        denied_device_ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Initialize the datagram filter."""
+        self._allowed_addresses: Optional[FrozenSet[str]] = (
+            frozenset(allowed_addresses) if allowed_addresses is not None else None
+        )
+        self._denied_addresses = frozenset(denied_addresses or ())
+        # device ids are compared as raw bytes, avoiding hexlifying every datagram
+        self._allowed_device_ids: Optional[FrozenSet[bytes]] = (
+            frozenset(map(bytes.fromhex, allowed_device_ids))
+            if allowed_device_ids is not None
+            else None
+        )
+        self._denied_device_ids = frozenset(map(bytes.fromhex, denied_device_ids or ()))
+        self._check_device_ids = bool(
+            self._allowed_device_ids is not None or self._denied_device_ids
+        )
+        self.rejected = 0
+        self.foreign = 0
+
+    def accepts(self, datagram: bytes, address: str) -> bool:
+        """Return true if the datagram should be parsed, counting the rejected."""
+        if not _is_switcher_datagram(datagram):
+            self.rejected += 1
+            self.foreign += 1
+            return False
+        if not self._accepts_address(address):
+            self.rejected += 1
+            return False
+        if self._check_device_ids:
+            device_id = _DEVICE_ID.unpack_from(datagram, _DEVICE_ID_OFFSET)[0]
+            if device_id in self._denied_device_ids or (
+                self._allowed_device_ids is not None
+                and device_id not in self._allowed_device_ids
+            ):
+                self.rejected += 1
+                return False
+        return True
+
+    def _accepts_address(self, address: str) -> bool:
+        """Return true if the source address is allowed and not denied."""
+        if address in self._denied_addresses:
+            return False
+        return self._allowed_addresses is None or address in self._allowed_addresses
+
+
+@dataclass
+class _TokenBucket:
+    """Tokens left for a single source."""
+
+    tokens: float
+    updated: float
+
+
+@final
+class SourceRateLimiter:
+    """Token bucket rate limiting of the datagrams per source ip address.
+
+    Every source can send a burst of datagrams, after which its datagrams are
+    dropped until its bucket refills. A flooding source doesn't delay the
+    datagrams of the other sources.
+
+    Args:
+        rate: the datagrams per second every source is allowed to send.
+        burst: the datagrams a source is allowed to send at once.
+        max_sources: the maximum number of sources tracked, the least recently seen
+            source is forgotten for tracking a new one.
+
+    """
+
+    def __init__(
+        self, rate: float = 10.0, burst: int = 20, max_sources: int = 1024
+    ) -> None:
+        """Initialize the rate limiter."""
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        if max_sources < 1:
+            raise ValueError("max sources must be at least 1")
+        self._rate = rate
+        self._burst = burst
+        self._max_sources = max_sources
+        self._buckets: "OrderedDict[str, _TokenBucket]" = OrderedDict()
+        self.dropped = 0
+        self.dropped_by_address: "OrderedDict[str, int]" = OrderedDict()
+
+    def allow(self, address: str) -> bool:
+        """Return true if the source has a token left, counting the dropped."""
+        now = monotonic()
+        bucket = self._buckets.get(address)
+        if bucket is None:
+            if len(self._buckets) >= self._max_sources:
+                self._buckets.popitem(last=False)
+            bucket = self._buckets[address] = _TokenBucket(self._burst, now)
+        else:
+            self._buckets.move_to_end(address)
+            bucket.tokens = min(
+                self._burst, bucket.tokens + (now - bucket.updated) * self._rate
+            )
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True
+        self.dropped += 1
+        dropped = self.dropped_by_address.pop(address, 0)
+        if not dropped:
+            logger.warning("dropping datagrams from %s, sending too fast", address)
+            if len(self.dropped_by_address) >= self._max_sources:
+                self.dropped_by_address.popitem(last=False)
+        self.dropped_by_address[address] = dropped + 1
+        return False
+
 
 @final
 class UdpClientProtocol(DatagramProtocol):
     """Implementation of the Asyncio UDP DatagramProtocol."""
 
-    def __init__(self, on_datagram: Callable[[bytes], None]) -> None:
+    def __init__(
+        self,
+        on_datagram: Callable[[bytes], None],
+        datagram_filter: Optional[DatagramFilter] = None,
+        rate_limiter: Optional[SourceRateLimiter] = None,
+    ) -> None:
         """Initialize the protocol."""
         self.transport: Optional[BaseTransport] = None
         self._on_datagram = on_datagram
+        self._datagram_filter = datagram_filter
+        self._rate_limiter = rate_limiter
+        self.received = 0
 
     def connection_made(self, transport: BaseTransport) -> None:
         """Call on connection established."""
@@ -441,6 +1605,13 @@ def connection_made(self, transport: BaseTransport) -> None:
 
     def datagram_received(self, data: bytes, addr: Tuple[Any, Any]) -> None:
         """Call on datagram received."""
+        self.received += 1
+        datagram_filter = self._datagram_filter
+        if datagram_filter and not datagram_filter.accepts(data, addr[0]):
+            return
+        rate_limiter = self._rate_limiter
+        if rate_limiter and not rate_limiter.allow(addr[0]):
+            return
         self._on_datagram(data)
 
     def error_received(self, exc: Optional[Exception]) -> None:
@@ -458,6 +1629,68 @@ def connection_lost(self, exc: Optional[Exception]) -> None:
             logger.info("udp connection stopped")
 
 
+# Lengths of the datagrams broadcast by the switcher devices
+_DATAGRAM_LENGTHS = frozenset(
+    (
+        165,  # Switcher water heaters and Power Plug
+        168,  # Switcher Breeze
+        159,  # Switcher Runner and RunnerMini
+        203,  # Switcher Runner S11 and Switcher Runner S12
+        207,  # Switcher Light SL01, SL01 Mini, SL02, SL02 Mini and SL03
+    )
+)
+_DATAGRAM_MAGIC = b"\xfe\xf0"
+
+
+def _is_switcher_datagram(datagram: bytes) -> bool:
+    """Return true if the datagram length and magic match a switcher broadcast."""
+    return len(datagram) in _DATAGRAM_LENGTHS and datagram.startswith(_DATAGRAM_MAGIC)
+
+
+# Layouts of the values in the datagrams
+_UINT8 = Struct("B")
+_UINT16 = Struct("<H")
+_UINT32 = Struct("<I")
+_DEVICE_ID = Struct("3s")
+_NAME = Struct("32s")
+_DEVICE_TYPE = Struct("2s")
+_IP_ADDRESS = Struct("4s")
+_MAC_ADDRESS = Struct("6s")
+_SHUTTER_DIRECTION = Struct("2s")
+_REMOTE_ID = Struct("8s")
+# Offsets of the values in the datagrams
+_DEVICE_ID_OFFSET = 18
+_DEVICE_KEY_OFFSET = 40
+_NAME_OFFSET = 42
+_DEVICE_TYPE_OFFSET = 74
+_IP_TYPE1_OFFSET = 76
+_IP_TYPE2_OFFSET = 77
+_MAC_TYPE1_OFFSET = 80
+_MAC_TYPE2_OFFSET = 81
+_DEVICE_STATE_OFFSET = 133
+_POWER_CONSUMPTION_OFFSET = 135
+_REMAINING_OFFSET = 147
+_AUTO_SHUTDOWN_OFFSET = 155
+_THERMOSTAT_TEMP_OFFSET = 135
+_THERMOSTAT_STATE_OFFSET = 137
+_THERMOSTAT_MODE_OFFSET = 138
+_THERMOSTAT_TARGET_TEMP_OFFSET = 139
+_THERMOSTAT_FAN_SWING_OFFSET = 140
+_THERMOSTAT_REMOTE_ID_OFFSET = 143
+# Circuits of shutter and light devices are 16 bytes apart
+_CIRCUIT_OFFSET = 135
+_CIRCUIT_LENGTH = 16
+# Members of the enums by their value in the datagrams
+_DEVICE_TYPES = {bytes.fromhex(member.hex_rep): member for member in DeviceType}
+_THERMOSTAT_MODES = {int(member.value, 16): member for member in ThermostatMode}
+_THERMOSTAT_FAN_LEVELS = {
+    int(member.value, 16): member for member in ThermostatFanLevel
+}
+_SHUTTER_DIRECTIONS = {
+    bytes.fromhex(member.value): member for member in ShutterDirection
+}
+
+
 @final
 @dataclass(frozen=True)
 class DatagramParser:
@@ -465,200 +1698,125 @@ class DatagramParser:
 
     message: bytes
 
+    def _unpack(self, layout: Struct, offset: int) -> Any:
+        """Return the single value of the layout at the offset of the message."""
+        try:
+            return layout.unpack_from(self.message, offset)[0]
+        except struct_error as exc:
+            raise ValueError("datagram is too short for the requested value") from exc
+
     def is_switcher_originator(self) -> bool:
         """Verify the broadcast message had originated from a switcher device."""
-        return hexlify(self.message)[0:4].decode() == "fef0" and (
-            len(self.message) == 165
-            or len(self.message) == 168  # Switcher Breeze
-            or len(self.message) == 159  # Switcher Runner and RunnerMini
-            or len(self.message) == 203  # Switcher Runner S11 and Switcher Runner S12
-            or len(self.message)
-            == 207  # Switcher Light SL01, Switcher Light SL01 Mini,
-            # Switcher Light SL02, Switcher Light SL02 Mini and Switcher Light SL03
-        )
+        return _is_switcher_datagram(self.message)
 
     def get_ip_type1(self) -> str:
         """Extract the IP address from the type1 broadcast message (Heater, Plug)."""
-        hex_ip = hexlify(self.message)[152:160]
-        ip_addr = int(hex_ip[6:8] + hex_ip[4:6] + hex_ip[2:4] + hex_ip[0:2], 16)
-        return inet_ntoa(pack("<L", ip_addr))
+        return inet_ntoa(self._unpack(_IP_ADDRESS, _IP_TYPE1_OFFSET))
 
     def get_ip_type2(self) -> str:
         """Extract the IP address from the broadcast message (Breeze, Runners)."""
-        hex_ip = hexlify(self.message)[154:162]
-        ip_addr = int(hex_ip[0:2] + hex_ip[2:4] + hex_ip[4:6] + hex_ip[6:8], 16)
-        return inet_ntoa(pack(">L", ip_addr))
+        return inet_ntoa(self._unpack(_IP_ADDRESS, _IP_TYPE2_OFFSET))
 
     def get_mac_type1(self) -> str:
         """Extract the MAC address from the broadcast message (Heater, Plug)."""
-        hex_mac = hexlify(self.message)[160:172].decode().upper()
-        return (
-            hex_mac[0:2]
-            + ":"
-            + hex_mac[2:4]
-            + ":"
-            + hex_mac[4:6]
-            + ":"
-            + hex_mac[6:8]
-            + ":"
-            + hex_mac[8:10]
-            + ":"
-            + hex_mac[10:12]
-        )
+        return str(self._unpack(_MAC_ADDRESS, _MAC_TYPE1_OFFSET).hex(":").upper())
 
     def get_mac_type2(self) -> str:
         """Extract the MAC address from the broadcast message (Breeze, Runners)."""
-        hex_mac = hexlify(self.message)[162:174].decode().upper()
-        return (
-            hex_mac[0:2]
-            + ":"
-            + hex_mac[2:4]
-            + ":"
-            + hex_mac[4:6]
-            + ":"
-            + hex_mac[6:8]
-            + ":"
-            + hex_mac[8:10]
-            + ":"
-            + hex_mac[10:12]
-        )
+        return str(self._unpack(_MAC_ADDRESS, _MAC_TYPE2_OFFSET).hex(":").upper())
 
     def get_name(self) -> str:
         """Extract the device name from the broadcast message."""
-        return self.message[42:74].decode().rstrip("\x00")
+        return str(self._unpack(_NAME, _NAME_OFFSET).decode().rstrip("\x00"))
 
     def get_device_id(self) -> str:
         """Extract the device id from the broadcast message."""
-        return hexlify(self.message)[36:42].decode()
+        return str(self._unpack(_DEVICE_ID, _DEVICE_ID_OFFSET).hex())
 
     def get_device_key(self) -> str:
         """Extract the device id from the broadcast message."""
-        return hexlify(self.message)[80:82].decode()
+        return f"{self._unpack(_UINT8, _DEVICE_KEY_OFFSET):02x}"
 
     def get_device_state(self) -> DeviceState:
         """Extract the device state from the broadcast message."""
-        hex_device_state = hexlify(self.message)[266:268].decode()
-        return (
-            DeviceState.ON
-            if hex_device_state == DeviceState.ON.value
-            else DeviceState.OFF
-        )
+        state = self._unpack(_UINT8, _DEVICE_STATE_OFFSET)
+        return DeviceState.ON if state == 1 else DeviceState.OFF
 
     def get_auto_shutdown(self) -> str:
         """Extract the auto shutdown value from the broadcast message."""
-        hex_auto_shutdown_val = hexlify(self.message)[310:318]
-        int_auto_shutdown_val_secs = int(
-            hex_auto_shutdown_val[6:8]
-            + hex_auto_shutdown_val[4:6]
-            + hex_auto_shutdown_val[2:4]
-            + hex_auto_shutdown_val[0:2],
-            16,
-        )
-        return seconds_to_iso_time(int_auto_shutdown_val_secs)
+        return seconds_to_iso_time(self._unpack(_UINT32, _AUTO_SHUTDOWN_OFFSET))
 
     def get_power_consumption(self) -> int:
         """Extract the power consumption from the broadcast message."""
-        hex_power_consumption = hexlify(self.message)[270:278]
-        return int(hex_power_consumption[2:4] + hex_power_consumption[0:2], 16)
+        return int(self._unpack(_UINT16, _POWER_CONSUMPTION_OFFSET))
 
     def get_remaining(self) -> str:
         """Extract the time remains for the current execution."""
-        hex_remaining_time = hexlify(self.message)[294:302]
-        int_remaining_time_seconds = int(
-            hex_remaining_time[6:8]
-            + hex_remaining_time[4:6]
-            + hex_remaining_time[2:4]
-            + hex_remaining_time[0:2],
-            16,
-        )
-        return seconds_to_iso_time(int_remaining_time_seconds)
+        return seconds_to_iso_time(self._unpack(_UINT32, _REMAINING_OFFSET))
 
     def get_device_type(self) -> DeviceType:
         """Extract the device type from the broadcast message."""
-        hex_model = hexlify(self.message[74:76]).decode()
-        devices = dict(map(lambda d: (d.hex_rep, d), DeviceType))
-        return devices[hex_model]
+        return _DEVICE_TYPES[self._unpack(_DEVICE_TYPE, _DEVICE_TYPE_OFFSET)]
 
     # Switcher Runners methods
 
     def get_shutter_position(self, index: int) -> int:
         """Return the current position of the shutter 0 <= pos <= 100."""
-        start_index = 135 + (index * 16)
-        end_index = start_index + 2
-        hex_pos = hexlify(self.message[start_index:end_index]).decode()
-        return int(hex_pos[2:4]) + int(hex_pos[0:2], 16)
+        offset = _CIRCUIT_OFFSET + index * _CIRCUIT_LENGTH
+        position = self._unpack(_UINT8, offset)
+        # the following byte is added as a binary coded decimal
+        tens, units = divmod(self._unpack(_UINT8, offset + 1), 16)
+        if tens > 9 or units > 9:
+            raise ValueError("invalid shutter position")
+        return int(position + tens * 10 + units)
 
     def get_shutter_direction(self, index: int) -> ShutterDirection:
         """Return the current direction of the shutter (UP/DOWN/STOP)."""
-        start_index = 137 + (index * 16)
-        end_index = start_index + 2
-        hex_direction = hexlify(self.message[start_index:end_index]).decode()
-        directions = dict(map(lambda d: (d.value, d), ShutterDirection))
-        return directions[hex_direction]
+        offset = _CIRCUIT_OFFSET + index * _CIRCUIT_LENGTH + 2
+        return _SHUTTER_DIRECTIONS[self._unpack(_SHUTTER_DIRECTION, offset)]
 
     def get_shutter_child_lock(self, index: int) -> ShutterChildLock:
         """Extract the shutter child lock state from the broadcast message."""
-        start_index = 136 + (index * 16)
-        end_index = start_index + 2
-        hex_pos = hexlify(self.message[start_index:end_index]).decode()
-        hex_device_state = hex_pos[0:2]
-        return (
-            ShutterChildLock.ON
-            if hex_device_state == ShutterChildLock.ON.value
-            else ShutterChildLock.OFF
-        )
+        offset = _CIRCUIT_OFFSET + index * _CIRCUIT_LENGTH + 1
+        child_lock = self._unpack(_UINT8, offset)
+        return ShutterChildLock.ON if child_lock == 1 else ShutterChildLock.OFF
 
     def get_light_state(self, index: int) -> DeviceState:
         """Extract the light state from the broadcast message."""
-        start_index = 135 + (index * 16)
-        end_index = start_index + 2
-        hex_pos = hexlify(self.message[start_index:end_index]).decode()
-        hex_device_state = hex_pos[0:2]
-        return (
-            DeviceState.ON
-            if hex_device_state == DeviceState.ON.value
-            else DeviceState.OFF
-        )
+        offset = _CIRCUIT_OFFSET + index * _CIRCUIT_LENGTH
+        state = self._unpack(_UINT8, offset)
+        return DeviceState.ON if state == 1 else DeviceState.OFF
 
     # Switcher Breeze methods
 
     def get_thermostat_temp(self) -> float:
         """Return the current temp of the thermostat."""
-        hex_temp = hexlify(self.message[135:137]).decode()
-        return int(hex_temp[2:4] + hex_temp[0:2], 16) / 10
+        return int(self._unpack(_UINT16, _THERMOSTAT_TEMP_OFFSET)) / 10
 
     def get_thermostat_state(self) -> DeviceState:
         """Return the current thermostat state."""
-        hex_power = hexlify(self.message[137:138]).decode()
-        return DeviceState.ON if hex_power == DeviceState.ON.value else DeviceState.OFF
+        state = self._unpack(_UINT8, _THERMOSTAT_STATE_OFFSET)
+        return DeviceState.ON if state == 1 else DeviceState.OFF
 
     def get_thermostat_mode(self) -> ThermostatMode:
         """Return the current thermostat mode."""
-        hex_mode = hexlify(self.message[138:139]).decode()
-        states = dict(map(lambda s: (s.value, s), ThermostatMode))
-        return ThermostatMode.COOL if hex_mode not in states else states[hex_mode]
+        mode = self._unpack(_UINT8, _THERMOSTAT_MODE_OFFSET)
+        return _THERMOSTAT_MODES.get(mode, ThermostatMode.COOL)
 
     def get_thermostat_target_temp(self) -> int:
         """Return the current temp of the thermostat."""
-        hex_temp = hexlify(self.message[139:140]).decode()
-        return int(hex_temp, 16)
+        return int(self._unpack(_UINT8, _THERMOSTAT_TARGET_TEMP_OFFSET))
 
     def get_thermostat_fan_level(self) -> ThermostatFanLevel:
         """Return the current thermostat fan level."""
-        hex_level = hexlify(self.message[140:141]).decode()
-        states = dict(map(lambda s: (s.value, s), ThermostatFanLevel))
-        return states[hex_level[0:1]]
+        fan_swing = self._unpack(_UINT8, _THERMOSTAT_FAN_SWING_OFFSET)
+        return _THERMOSTAT_FAN_LEVELS[fan_swing >> 4]
 
     def get_thermostat_swing(self) -> ThermostatSwing:
         """Return the current thermostat fan swing."""
-        hex_swing = hexlify(self.message[140:141]).decode()
-
-        return (
-            ThermostatSwing.OFF
-            if hex_swing[1:2] == ThermostatSwing.OFF.value
-            else ThermostatSwing.ON
-        )
+        fan_swing = self._unpack(_UINT8, _THERMOSTAT_FAN_SWING_OFFSET)
+        return ThermostatSwing.ON if fan_swing & 0x0F else ThermostatSwing.OFF
 
     def get_thermostat_remote_id(self) -> str:
         """Return the current thermostat remote."""
-        return self.message[143:151].decode()
+        return str(self._unpack(_REMOTE_ID, _THERMOSTAT_REMOTE_ID_OFFSET).decode())
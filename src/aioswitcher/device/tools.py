@@ -17,10 +17,13 @@
 import datetime
 import ssl
 import time
+from array import array
 from base64 import b64decode
 from binascii import crc_hqx, hexlify, unhexlify
+from functools import cache, lru_cache
 from logging import getLogger
-from struct import pack
+from struct import Struct, pack
+from typing import NamedTuple, Optional, Union, final
 
 import aiohttp
 from Crypto.Cipher import AES
@@ -30,6 +33,13 @@
 
 logger = getLogger(__name__)
 
+# The initial value of the crc calculations signing the packets
+CRC_INITIAL_VALUE = 0x1021
+# The signature is the packet crc followed by the key crc, both little endian
+SIGNATURE_LENGTH = 4
+_SIGNATURE = Struct("<HH")
+_KEY_PAD = b"0" * 32
+
 
 def seconds_to_iso_time(all_seconds: int) -> str:
     """Convert seconds to iso time.
@@ -48,6 +58,100 @@ def seconds_to_iso_time(all_seconds: int) -> str:
     return datetime.time(hour=hours, minute=minutes, second=seconds).isoformat()
 
 
+@cache
+def _get_key_crc_table() -> "array[int]":
+    """Return the key crc for every packet crc, built once on first use.
+
+    The key is the little endian packet crc followed by 32 ascii zeros, so the key
+    crc depends on the 16 bits of the packet crc alone.
+    """
+    return array(
+        "H",
+        (
+            crc_hqx(pack("<H", crc) + _KEY_PAD, CRC_INITIAL_VALUE)
+            for crc in range(0x10000)
+        ),
+    )
+
+
+@final
+class CrcPrefix(NamedTuple):
+    """The crc of the constant bytes opening a packet.
+
+    Args:
+        length: the number of constant bytes.
+        crc: the crc calculated over the constant bytes.
+
+    """
+
+    length: int
+    crc: int
+
+
+@lru_cache(maxsize=64)
+def get_crc_prefix(constant: bytes) -> CrcPrefix:
+    """Calculate the crc of the constant bytes opening a packet, cached.
+
+    Args:
+        constant: the bytes every packet of a kind opens with, including the length.
+
+    Return:
+        A prefix for resuming the crc calculation when signing the packets.
+
+    """
+    return CrcPrefix(len(constant), crc_hqx(constant, CRC_INITIAL_VALUE))
+
+
+def sign_packet_into(
+    buffer: bytearray, length: int, prefix: Optional[CrcPrefix] = None
+) -> None:
+    """Sign a packet in place, writing the signature following the packet.
+
+    Args:
+        buffer: the packet with room for the signature following it.
+        length: the length of the packet, excluding the signature.
+        prefix: optionally the crc of the constant bytes the packet opens with.
+
+    """
+    start, crc = prefix if prefix else (0, CRC_INITIAL_VALUE)
+    crc = crc_hqx(memoryview(buffer)[start:length], crc)
+    _SIGNATURE.pack_into(buffer, length, crc, _get_key_crc_table()[crc])
+
+
+def sign_packet(packet: bytes, prefix: Optional[CrcPrefix] = None) -> bytes:
+    """Sign the packet with the designated crc key.
+
+    Args:
+        packet: packet to sign.
+        prefix: optionally the crc of the constant bytes the packet opens with.
+
+    Return:
+        The packet followed by its signature.
+
+    """
+    signed = bytearray(packet)
+    signed.extend(bytes(SIGNATURE_LENGTH))
+    sign_packet_into(signed, len(packet), prefix)
+    return bytes(signed)
+
+
+def verify_packet_signature(frame: Union[bytes, bytearray]) -> bool:
+    """Verify the signature at the end of a signed packet.
+
+    Args:
+        frame: the signed packet.
+
+    Return:
+        True if the frame ends with a valid signature.
+
+    """
+    length = len(frame) - SIGNATURE_LENGTH
+    if length <= 0:
+        return False
+    crc = crc_hqx(memoryview(frame)[:length], CRC_INITIAL_VALUE)
+    return _SIGNATURE.unpack_from(frame, length) == (crc, _get_key_crc_table()[crc])
+
+
 def sign_packet_with_crc_key(hex_packet: str) -> str:
     """Sign the packets with the designated crc key.
 
@@ -58,17 +162,7 @@ def sign_packet_with_crc_key(hex_packet: str) -> str:
         The calculated and signed packet.
 
     """
-    binary_packet = unhexlify(hex_packet)
-    binary_packet_crc = pack(">I", crc_hqx(binary_packet, 0x1021))
-    hex_packet_crc = hexlify(binary_packet_crc).decode()
-    hex_packet_crc_sliced = hex_packet_crc[6:8] + hex_packet_crc[4:6]
-
-    binary_key = unhexlify(hex_packet_crc_sliced + "30" * 32)
-    binary_key_crc = pack(">I", crc_hqx(binary_key, 0x1021))
-    hex_key_crc = hexlify(binary_key_crc).decode()
-    hex_key_crc_sliced = hex_key_crc[6:8] + hex_key_crc[4:6]
-
-    return hex_packet + hex_packet_crc_sliced + hex_key_crc_sliced
+    return hexlify(sign_packet(unhexlify(hex_packet))).decode()
 
 
 def minutes_to_hexadecimal_seconds(minutes: int) -> str:
@@ -84,14 +178,14 @@ def minutes_to_hexadecimal_seconds(minutes: int) -> str:
     return hexlify(pack("<I", minutes * 60)).decode()
 
 
-def timedelta_to_hexadecimal_seconds(full_time: datetime.timedelta) -> str:
-    """Encode timedelta as seconds to an hexadecimal packed as little endian unsigned.
+def timedelta_to_seconds(full_time: datetime.timedelta) -> int:
+    """Convert timedelta to seconds for setting the auto shutdown.
 
     Args:
         full_time: timedelta time between 1 and 24 hours, seconds are ignored.
 
     Return:
-        Hexadecimal representation of the seconds built fom the full_time argument.
+        The seconds built fom the full_time argument.
 
     """
     minutes = full_time.total_seconds() / 60
@@ -99,29 +193,63 @@ def timedelta_to_hexadecimal_seconds(full_time: datetime.timedelta) -> str:
     seconds = int(hours) * 3600 + int(minutes) * 60
 
     if 3599 < seconds < 86341:
-        return hexlify(pack("<I", int(seconds))).decode()
+        return seconds
 
     raise ValueError("can only handle 1 to 24 hours")
 
 
-def string_to_hexadecimale_device_name(name: str) -> str:
-    """Encode string device name to an appropriate hexadecimal value.
+def timedelta_to_hexadecimal_seconds(full_time: datetime.timedelta) -> str:
+    """Encode timedelta as seconds to an hexadecimal packed as little endian unsigned.
+
+    Args:
+        full_time: timedelta time between 1 and 24 hours, seconds are ignored.
+
+    Return:
+        Hexadecimal representation of the seconds built fom the full_time argument.
+
+    """
+    return hexlify(pack("<I", timedelta_to_seconds(full_time))).decode()
+
+
+def string_to_device_name(name: str) -> bytes:
+    """Encode string device name to the appropriate bytes value.
 
     Args:
         name: the desired name for encoding.
 
     Return:
-        Hexadecimal representation of the name argument.
+        The name argument encoded and padded with zeros to 32 bytes.
 
     """
     length = len(name)
     if 1 < length < 33:
-        hex_name = hexlify(name.encode())
-        zeros_pad = ("00" * (32 - length)).encode()
-        return (hex_name + zeros_pad).decode()
+        return name.encode() + bytes(32 - length)
     raise ValueError("name length can vary from 2 to 32")
 
 
+def string_to_hexadecimale_device_name(name: str) -> str:
+    """Encode string device name to an appropriate hexadecimal value.
+
+    Args:
+        name: the desired name for encoding.
+
+    Return:
+        Hexadecimal representation of the name argument.
+
+    """
+    return hexlify(string_to_device_name(name)).decode()
+
+
+def current_timestamp_to_bytes() -> bytes:
+    """Pack the current timestamp as little endian unsigned int.
+
+    Return:
+        The current unix time retrieved by ``time.time``, packed.
+
+    """
+    return pack("<I", int(round(time.time())))
+
+
 def current_timestamp_to_hexadecimal() -> str:
     """Generate hexadecimal representation of the current timestamp.
 
@@ -129,10 +257,7 @@ def current_timestamp_to_hexadecimal() -> str:
         Hexadecimal representation of the current unix time retrieved by ``time.time``.
 
     """
-    round_timestamp = int(round(time.time()))
-    binary_timestamp = pack("<I", round_timestamp)
-    hex_timestamp = hexlify(binary_timestamp)
-    return hex_timestamp.decode()
+    return hexlify(current_timestamp_to_bytes()).decode()
 
 
 def watts_to_amps(watts: int) -> float:
@@ -146,15 +271,14 @@ def set_message_length(message: str) -> str:
     return "fef0" + str(length) + message[8:]
 
 
-def convert_token_to_packet(token: str) -> str:
-    """Convert a token to token packet.
+def convert_token_to_bytes(token: str) -> bytes:
+    """Decrypt a token to the token bytes sent in the packets.
 
     Args:
         token: the token of the user sent by Email
 
     Return:
-        Token packet if token is valid,
-        otherwise empty string or raise error.
+        Token bytes if token is valid, otherwise raise error.
 
     """
     try:
@@ -162,12 +286,25 @@ def convert_token_to_packet(token: str) -> str:
         encrypted_value = b64decode(bytes(token, "utf-8"))
         cipher = AES.new(token_key, AES.MODE_ECB)
         decrypted_value = cipher.decrypt(encrypted_value)
-        unpadded_decrypted_value = unpad(decrypted_value, AES.block_size)
-        return hexlify(unpadded_decrypted_value).decode()
+        return bytes(unpad(decrypted_value, AES.block_size))
     except (KeyError, ValueError) as ve:
         raise RuntimeError("convert token to packet was not successful") from ve
 
 
+def convert_token_to_packet(token: str) -> str:
+    """Convert a token to token packet.
+
+    Args:
+        token: the token of the user sent by Email
+
+    Return:
+        Token packet if token is valid,
+        otherwise empty string or raise error.
+
+    """
+    return hexlify(convert_token_to_bytes(token)).decode()
+
+
 async def validate_token(username: str, token: str) -> bool:
     """Make an asynchronous API call to validate a Token by username and token."""
     request_url = "https://switcher.co.il/ValidateToken/"
@@ -0,0 +1,311 @@
+# Copyright Tomer Figenblat.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Switcher integration, registry of the devices discovered by the bridge."""
+
+from asyncio import CancelledError, Task, gather, get_running_loop, sleep
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from inspect import isawaitable
+from logging import getLogger
+from time import monotonic
+from types import TracebackType
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    final,
+)
+
+from .device import DeviceCategory, DeviceState, DeviceType, SwitcherBase
+
+__all__ = ["SwitcherDeviceRegistry", "SwitcherRegistryEntry"]
+logger = getLogger(__name__)
+
+
+@final
+@dataclass
+class SwitcherRegistryEntry:
+    """The latest known state of a single device.
+
+    Args:
+        device: the device as parsed from its latest broadcast.
+        port: the udp port the latest broadcast was received on.
+        last_seen: the datetime the latest broadcast was received.
+        online: false if the device missed too many broadcasts.
+
+    """
+
+    device: SwitcherBase
+    port: Optional[int]
+    last_seen: datetime = field(default_factory=datetime.now)
+    online: bool = True
+    seen_at: float = field(default_factory=monotonic, repr=False)
+
+
+@final
+class SwitcherDeviceRegistry:
+    """Registry of the devices seen by the bridge, keyed by device id.
+
+    Pass the registry to ``aioswitcher.bridge.SwitcherBridge`` to keep the latest
+    state of every device. A device is marked offline after missing the configured
+    number of broadcasts, and marked online again when its next broadcast arrives.
+
+    The devices are indexed by type, category, state, ip address and mac address,
+    use ``find``, ``get_by_ip_address`` and ``get_by_mac_address`` for querying the
+    registry without scanning all the devices.
+
+    Args:
+        broadcast_interval: the interval between the broadcasts of a device.
+        missed_broadcasts: the number of missed broadcasts marking a device offline.
+        on_online: a callable to which an entry is sent when its device is seen for
+            the first time, or seen again after being offline.
+        on_offline: a callable to which an entry is sent when its device is marked
+            offline.
+
+    The ``on_online`` and ``on_offline`` callables can be coroutine functions, an
+    error raised by either is logged and never reaches the bridge.
+
+    """
+
+    def __init__(
+        self,
+        broadcast_interval: timedelta = timedelta(seconds=4),
+        missed_broadcasts: int = 3,
+        on_online: Optional[Callable[[SwitcherRegistryEntry], Any]] = None,
+        on_offline: Optional[Callable[[SwitcherRegistryEntry], Any]] = None,
+    ) -> None:
+        """Initialize the device registry."""
+        if missed_broadcasts < 1:
+            raise ValueError("missed broadcasts must be at least 1")
+        self._broadcast_interval = broadcast_interval.total_seconds()
+        self._offline_after = self._broadcast_interval * missed_broadcasts
+        self._on_online = on_online
+        self._on_offline = on_offline
+        self._entries: Dict[str, SwitcherRegistryEntry] = {}
+        self._by_type: Dict[DeviceType, Set[str]] = {}
+        self._by_category: Dict[DeviceCategory, Set[str]] = {}
+        self._by_state: Dict[DeviceState, Set[str]] = {}
+        self._by_ip_address: Dict[str, str] = {}
+        self._by_mac_address: Dict[str, str] = {}
+        self._sweeper: Optional[Task[None]] = None
+        self._callback_tasks: Set["Task[None]"] = set()
+
+    async def __aenter__(self) -> "SwitcherDeviceRegistry":
+        """Enter SwitcherDeviceRegistry asynchronous context manager."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Exit SwitcherDeviceRegistry asynchronous context manager."""
+        await self.close()
+
+    def __len__(self) -> int:
+        """Return the number of devices in the registry."""
+        return len(self._entries)
+
+    def __contains__(self, device_id: object) -> bool:
+        """Return true if the device is in the registry."""
+        return device_id in self._entries
+
+    def __iter__(self) -> Iterator[SwitcherRegistryEntry]:
+        """Iterate over the entries of the registry."""
+        return iter(list(self._entries.values()))
+
+    def get(self, device_id: str) -> Optional[SwitcherRegistryEntry]:
+        """Return the entry of the device, None if the device was never seen."""
+        return self._entries.get(device_id)
+
+    def get_by_ip_address(self, ip_address: str) -> Optional[SwitcherRegistryEntry]:
+        """Return the entry of the device owning the ip address, None if unknown."""
+        device_id = self._by_ip_address.get(ip_address)
+        return self._entries[device_id] if device_id else None
+
+    def get_by_mac_address(self, mac_address: str) -> Optional[SwitcherRegistryEntry]:
+        """Return the entry of the device owning the mac address, None if unknown."""
+        device_id = self._by_mac_address.get(mac_address.upper())
+        return self._entries[device_id] if device_id else None
+
+    def find(
+        self,
+        device_type: Optional[DeviceType] = None,
+        category: Optional[DeviceCategory] = None,
+        device_state: Optional[DeviceState] = None,
+        online: Optional[bool] = None,
+    ) -> List[SwitcherRegistryEntry]:
+        """Return the entries of the devices matching all the given criteria.
+
+        Args:
+            device_type: only devices of this type.
+            category: only devices of this category.
+            device_state: only devices in this state.
+            online: only online devices if true, only offline devices if false.
+
+        Returns:
+            A list of the matching ``SwitcherRegistryEntry``, all the entries if no
+            criteria was given.
+
+        """
+        criteria: List[Tuple[Dict[Any, Set[str]], Hashable]] = [
+            (self._by_type, device_type),
+            (self._by_category, category),
+            (self._by_state, device_state),
+        ]
+        matches = [index.get(key, set()) for index, key in criteria if key is not None]
+        if matches:
+            matches.sort(key=len)
+            device_ids = matches[0].intersection(*matches[1:])
+            entries = [self._entries[device_id] for device_id in device_ids]
+        else:
+            entries = list(self._entries.values())
+        if online is None:
+            return entries
+        return [entry for entry in entries if entry.online == online]
+
+    def update(self, device: SwitcherBase, port: Optional[int] = None) -> None:
+        """Store the latest state of a device seen broadcasting.
+
+        Args:
+            device: the device as parsed from its latest broadcast.
+            port: the udp port the broadcast was received on.
+
+        """
+        entry = self._entries.get(device.device_id)
+        if entry:
+            came_online = not entry.online
+            self._unindex(entry.device)
+            entry.device = device
+            entry.port = port
+            entry.last_seen = datetime.now()
+            entry.seen_at = monotonic()
+            entry.online = True
+        else:
+            came_online = True
+            entry = self._entries[device.device_id] = SwitcherRegistryEntry(
+                device, port
+            )
+        self._index(device)
+        self._start_sweeper()
+
+        if came_online:
+            logger.debug("device %s is online", device.device_id)
+            if self._on_online:
+                self._notify(self._on_online, entry)
+
+    def remove(self, device_id: str) -> None:
+        """Remove a device from the registry."""
+        entry = self._entries.pop(device_id, None)
+        if entry:
+            self._unindex(entry.device)
+
+    def _index(self, device: SwitcherBase) -> None:
+        """Add a device to the secondary indexes."""
+        device_id = device.device_id
+        for index, key in self._get_index_keys(device):
+            index.setdefault(key, set()).add(device_id)
+        self._by_ip_address[device.ip_address] = device_id
+        self._by_mac_address[device.mac_address] = device_id
+
+    def _unindex(self, device: SwitcherBase) -> None:
+        """Remove a device from the secondary indexes."""
+        device_id = device.device_id
+        for index, key in self._get_index_keys(device):
+            device_ids = index.get(key)
+            if device_ids is not None:
+                device_ids.discard(device_id)
+                if not device_ids:
+                    del index[key]
+        if self._by_ip_address.get(device.ip_address) == device_id:
+            del self._by_ip_address[device.ip_address]
+        if self._by_mac_address.get(device.mac_address) == device_id:
+            del self._by_mac_address[device.mac_address]
+
+    def _get_index_keys(
+        self, device: SwitcherBase
+    ) -> List[Tuple[Dict[Any, Set[str]], Hashable]]:
+        """Return the indexes holding the device paired with its key in each."""
+        return [
+            (self._by_type, device.device_type),
+            (self._by_category, device.device_type.category),
+            (self._by_state, device.device_state),
+        ]
+
+    def sweep(self) -> None:
+        """Mark the devices missing too many broadcasts as offline."""
+        deadline = monotonic() - self._offline_after
+        for entry in list(self._entries.values()):
+            if entry.online and entry.seen_at <= deadline:
+                entry.online = False
+                logger.debug("device %s is offline", entry.device.device_id)
+                if self._on_offline:
+                    self._notify(self._on_offline, entry)
+
+    def _notify(
+        self,
+        callback: Callable[[SwitcherRegistryEntry], Any],
+        entry: SwitcherRegistryEntry,
+    ) -> None:
+        """Send an entry to a callback, awaiting it in a task if it's a coroutine."""
+        try:
+            result = callback(entry)
+        except Exception:
+            logger.exception("registry callback failed")
+            return
+        if isawaitable(result):
+            task = get_running_loop().create_task(self._await_callback(result))
+            self._callback_tasks.add(task)
+            task.add_done_callback(self._callback_tasks.discard)
+
+    async def _await_callback(self, result: Awaitable[Any]) -> None:
+        """Await the result of a coroutine callback, logging its errors."""
+        try:
+            await result
+        except Exception:
+            logger.exception("registry callback failed")
+
+    def _start_sweeper(self) -> None:
+        """Start the offline devices sweeper if not already running."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = get_running_loop().create_task(self._sweep_periodically())
+
+    async def _sweep_periodically(self) -> None:
+        """Mark offline devices periodically until all the devices are offline."""
+        while any(entry.online for entry in self._entries.values()):
+            await sleep(self._broadcast_interval)
+            self.sweep()
+
+    async def close(self) -> None:
+        """Stop marking devices as offline, cancelling the running callbacks."""
+        if self._sweeper and not self._sweeper.done():
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except CancelledError:
+                pass
+        tasks = list(self._callback_tasks)
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
@@ -127,39 +127,64 @@ def hexadecimale_timestamp_to_localtime(hex_timestamp: bytes) -> str:
     return time.strftime("%H:%M", local_time)
 
 
-def weekdays_to_hexadecimal(days: Union[Days, Set[Days]]) -> str:
-    """Sum the requested weekdays bit representation and return as hexadecimal value.
+def weekdays_to_bit_summary(days: Union[Days, Set[Days]]) -> int:
+    """Sum the requested weekdays bit representation.
 
     Args:
         days: the requested Weekday members.
 
     Return:
-        Hexadecimale representation of the sum of all requested days.
+        The sum of the bit representation of all requested days.
 
     """
     if days:
         if type(days) is Days:
-            return "{:02x}".format(days.bit_rep)
+            return days.bit_rep
         elif type(days) is set or len(days) == len(set(days)):  # type: ignore
             map_to_bits = map(lambda w: w.bit_rep, days)  # type: ignore
-            return "{:02x}".format(int(sum(map_to_bits)))
+            return int(sum(map_to_bits))
     raise ValueError("no days requested")
 
 
-def time_to_hexadecimal_timestamp(time_value: str) -> str:
-    """Convert hours and minutes to a timestamp with the current date and encode.
+def weekdays_to_hexadecimal(days: Union[Days, Set[Days]]) -> str:
+    """Sum the requested weekdays bit representation and return as hexadecimal value.
+
+    Args:
+        days: the requested Weekday members.
+
+    Return:
+        Hexadecimale representation of the sum of all requested days.
+
+    """
+    return "{:02x}".format(weekdays_to_bit_summary(days))
+
+
+def time_to_timestamp(time_value: str) -> int:
+    """Convert hours and minutes to a timestamp with the current date.
 
     Args:
         time_value: time to convert. e.g. "21:00".
 
     Return:
-        Hexadecimal representation of the timestamp.
+        The unix timestamp of the time today.
 
     """
     tsplit = time_value.split(":")
     str_timedate = time.strftime("%d/%m/%Y") + " " + tsplit[0] + ":" + tsplit[1]
     struct_timedate = time.strptime(str_timedate, "%d/%m/%Y %H:%M")
-    timestamp = time.mktime(struct_timedate)
-    binary_timestamp = pack("<I", int(timestamp))
+    return int(time.mktime(struct_timedate))
+
+
+def time_to_hexadecimal_timestamp(time_value: str) -> str:
+    """Convert hours and minutes to a timestamp with the current date and encode.
+
+    Args:
+        time_value: time to convert. e.g. "21:00".
+
+    Return:
+        Hexadecimal representation of the timestamp.
+
+    """
+    binary_timestamp = pack("<I", time_to_timestamp(time_value))
 
     return hexlify(binary_timestamp).decode()
@@ -0,0 +1,128 @@
+# Copyright Tomer Figenblat.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Switcher integration TCP socket API fan-out test cases."""
+
+from asyncio import Event, sleep
+from asyncio.streams import StreamReader, StreamWriter
+from unittest.mock import AsyncMock, Mock, patch
+
+from assertpy import assert_that
+from pytest import fixture, mark, raises
+
+from aioswitcher.api import SwitcherApi
+from aioswitcher.api.fleet import SwitcherDeviceDescriptor, get_fleet_states
+from aioswitcher.api.pool import SwitcherApiPool
+from aioswitcher.device import DeviceType
+
+pytestmark = mark.asyncio
+
+heater = SwitcherDeviceDescriptor(DeviceType.TOUCH, "1.2.3.4", "aaaaaa", "18")
+breeze = SwitcherDeviceDescriptor(DeviceType.BREEZE, "1.2.3.5", "bbbbbb", "18")
+runner = SwitcherDeviceDescriptor(DeviceType.RUNNER, "1.2.3.6", "cccccc", "18")
+light = SwitcherDeviceDescriptor(DeviceType.LIGHT_SL01, "1.2.3.7", "dddddd", "18", "zvVvd7JxtN7CgvkD1Psujw==")
+
+
+def _connection():
+    reader = AsyncMock(spec_set=StreamReader)
+    reader.at_eof = Mock(return_value=False)
+    writer = AsyncMock(spec_set=StreamWriter)
+    writer.write = Mock()
+    writer.close = Mock()
+    writer.is_closing = Mock(return_value=False)
+    return reader, writer
+
+
+@fixture
+def open_connection_mock():
+    with patch("aioswitcher.api.open_connection", side_effect=lambda **_: _connection()) as mock:
+        yield mock
+
+
+async def _collect(results):
+    return {result.device.device_id: result async for result in results}
+
+
+@patch.object(SwitcherApi, "get_light_state", return_value="light state")
+@patch.object(SwitcherApi, "get_shutter_state", return_value="shutter state")
+@patch.object(SwitcherApi, "get_breeze_state", return_value="breeze state")
+@patch.object(SwitcherApi, "get_state", return_value="state")
+async def test_get_fleet_states_selects_the_request_by_device_category(get_state, get_breeze_state, get_shutter_state, get_light_state, open_connection_mock):
+    results = await _collect(get_fleet_states([heater, breeze, runner, light]))
+
+    assert_that(results).is_length(4)
+    assert_that(results["aaaaaa"].response).is_equal_to("state")
+    assert_that(results["bbbbbb"].response).is_equal_to("breeze state")
+    assert_that(results["cccccc"].response).is_equal_to("shutter state")
+    assert_that(results["dddddd"].response).is_equal_to("light state")
+    for result in results.values():
+        assert_that(result.successful).is_true()
+    assert_that(open_connection_mock.call_count).is_equal_to(4)
+
+
+async def test_get_fleet_states_isolates_a_hung_device(open_connection_mock):
+    async def get_state(self):
+        if self.device_id == heater.device_id:
+            await Event().wait()
+        return "state"
+
+    with patch.object(SwitcherApi, "get_state", get_state):
+        other_heater = SwitcherDeviceDescriptor(DeviceType.V4, "1.2.3.8", "eeeeee", "18")
+        results = [result async for result in get_fleet_states([heater, other_heater], device_timeout=0.05)]
+
+    assert_that(results[0].device).is_equal_to(other_heater)
+    assert_that(results[0].successful).is_true()
+    assert_that(results[1].device).is_equal_to(heater)
+    assert_that(results[1].successful).is_false()
+    assert_that(results[1].error).is_instance_of(TimeoutError)
+
+
+async def test_get_fleet_states_reports_a_failing_device(open_connection_mock):
+    with patch.object(SwitcherApi, "get_state", side_effect=RuntimeError("login request was not successful")):
+        results = await _collect(get_fleet_states([heater]))
+
+    assert_that(results["aaaaaa"].successful).is_false()
+    assert_that(str(results["aaaaaa"].error)).is_equal_to("login request was not successful")
+
+
+async def test_get_fleet_states_respects_the_concurrency_limit(open_connection_mock):
+    running = []
+    max_running = []
+
+    async def get_state(self):
+        running.append(self)
+        max_running.append(len(running))
+        await sleep(0.01)
+        running.remove(self)
+        return "state"
+
+    devices = [SwitcherDeviceDescriptor(DeviceType.TOUCH, f"1.2.3.{i}", f"aaaa{i:02}", "18") for i in range(6)]
+    with patch.object(SwitcherApi, "get_state", get_state):
+        results = await _collect(get_fleet_states(devices, concurrency=2))
+
+    assert_that(results).is_length(6)
+    assert_that(max(max_running)).is_equal_to(2)
+
+
+@patch.object(SwitcherApi, "get_state", return_value="state")
+async def test_get_fleet_states_with_a_connection_pool(get_state, open_connection_mock):
+    async with SwitcherApiPool() as pool:
+        await _collect(get_fleet_states([heater], pool=pool))
+        await _collect(get_fleet_states([heater], pool=pool))
+    open_connection_mock.assert_called_once()
+
+
+async def test_get_fleet_states_with_an_invalid_concurrency_should_raise_error():
+    with raises(ValueError, match="concurrency must be at least 1"):
+        await _collect(get_fleet_states([heater], concurrency=0))
@@ -16,10 +16,11 @@
 
 from binascii import unhexlify
 from pathlib import Path
+from struct import pack
 from unittest.mock import Mock, patch
 
 from assertpy import assert_that
-from pytest import mark
+from pytest import mark, raises
 
 from aioswitcher.api import messages
 from aioswitcher.api.messages import (
@@ -29,7 +30,14 @@
     SwitcherLoginResponse,
     SwitcherStateResponse,
 )
-from aioswitcher.device import DeviceState
+from aioswitcher.device import (
+    DeviceState,
+    ShutterChildLock,
+    ShutterDirection,
+    ThermostatFanLevel,
+    ThermostatMode,
+    ThermostatSwing,
+)
 
 
 @mark.parametrize("faulty_response", [b'', bytearray(), None])
@@ -43,6 +51,7 @@ def test_switcher_login_response_dataclass(resource_path):
 
     assert_that(sut.unparsed_response).is_equal_to(unhexlify(response))
     assert_that(sut.session_id).is_equal_to("f050834e")
+    assert_that(sut.session_id_bytes).is_equal_to(unhexlify("f050834e"))
 
 
 def test_switcher_login_response_dataclass_without_a_valid_input_will_throw_an_error():
@@ -99,3 +108,52 @@ def test_the_state_message_parser(resource_path):
     assert_that(sut.get_time_on()).is_equal_to("00:00:00")
     assert_that(sut.get_auto_shutdown()).is_equal_to("01:30:00")
     assert_that(sut.get_power_consumption()).is_equal_to(0)
+
+
+def test_the_state_message_parser_for_thermostat_values():
+    response = bytearray(100)
+    response[76:78] = pack("<H", 245)
+    response[78:82] = bytes((0x01, 0x05, 24, 0x31))
+    response[84:92] = b"ELEC7022"
+    sut = StateMessageParser(bytes(response))
+
+    assert_that(sut.get_thermostat_temp()).is_equal_to(24.5)
+    assert_that(sut.get_thermostat_state()).is_equal_to(DeviceState.ON)
+    assert_that(sut.get_thermostat_mode()).is_equal_to(ThermostatMode.HEAT)
+    assert_that(sut.get_thermostat_target_temp()).is_equal_to(24)
+    assert_that(sut.get_thermostat_fan_level()).is_equal_to(ThermostatFanLevel.HIGH)
+    assert_that(sut.get_thermostat_swing()).is_equal_to(ThermostatSwing.ON)
+    assert_that(sut.get_thermostat_remote_id()).is_equal_to("ELEC7022")
+
+
+def test_the_state_message_parser_for_unknown_thermostat_values_returns_the_defaults():
+    response = bytearray(100)
+    response[79:82] = bytes((0x0F, 24, 0x90))
+    sut = StateMessageParser(bytes(response))
+
+    assert_that(sut.get_thermostat_state()).is_equal_to(DeviceState.OFF)
+    assert_that(sut.get_thermostat_mode()).is_equal_to(ThermostatMode.COOL)
+    assert_that(sut.get_thermostat_fan_level()).is_equal_to(ThermostatFanLevel.LOW)
+    assert_that(sut.get_thermostat_swing()).is_equal_to(ThermostatSwing.OFF)
+
+
+def test_the_state_message_parser_for_circuit_values():
+    response = bytearray(110)
+    response[76:80] = bytes((0x01, 0x00, 0x00, 0x01))
+    response[92:96] = bytes((40, 0x01, 0x01, 0x00))
+    sut = StateMessageParser(bytes(response))
+
+    assert_that(sut.get_light_state(0)).is_equal_to(DeviceState.ON)
+    assert_that(sut.get_shutter_direction(0)).is_equal_to(ShutterDirection.SHUTTER_DOWN)
+    assert_that(sut.get_shutter_child_lock(0)).is_equal_to(ShutterChildLock.OFF)
+    assert_that(sut.get_shutter_position(1)).is_equal_to(40)
+    assert_that(sut.get_shutter_child_lock(1)).is_equal_to(ShutterChildLock.ON)
+    assert_that(sut.get_shutter_direction(1)).is_equal_to(ShutterDirection.SHUTTER_UP)
+    assert_that(sut.get_light_state(1)).is_equal_to(DeviceState.OFF)
+
+
+@mark.parametrize("getter", ["get_state", "get_power_consumption", "get_auto_shutdown", "get_thermostat_temp", "get_thermostat_remote_id"])
+def test_the_state_message_parser_with_a_short_response_should_throw_an_error(getter):
+    sut = StateMessageParser(bytes(70))
+    with raises(ValueError, match="response is too short for the requested value"):
+        getattr(sut, getter)()
@@ -14,13 +14,18 @@
 
 """Switcher integration packet crc signing test cases."""
 
-from binascii import hexlify
+from binascii import crc_hqx, hexlify, unhexlify
 from struct import pack
 
 from assertpy import assert_that
 
 from aioswitcher.api import Command, packets
-from aioswitcher.device.tools import sign_packet_with_crc_key
+from aioswitcher.device.tools import (
+    get_crc_prefix,
+    sign_packet,
+    sign_packet_with_crc_key,
+    verify_packet_signature,
+)
 
 SUT_TIMESTAMP = "ef8db35c"
 SUT_SESSION_ID = "01000000"
@@ -89,3 +94,32 @@ def test_sign_packet_with_crc_key_for_get_schedules_packet_returns_signed_packet
     """Test the sign_packet_with_crc_key tool for the GET_SCHEDULES_PACKET."""
     packet = packets.GET_SCHEDULES_PACKET.format(SUT_SESSION_ID, SUT_TIMESTAMP, SUT_DEVICE_ID)
     assert_that(sign_packet_with_crc_key(packet)).is_equal_to(packet + "0efde536")
+
+
+def test_sign_packet_appends_the_packet_crc_and_the_key_crc():
+    """Test the sign_packet tool appends the packet crc and the key crc."""
+    packet = unhexlify(packets.GET_STATE_PACKET_TYPE1.format(SUT_SESSION_ID, SUT_TIMESTAMP, SUT_DEVICE_ID))
+    crc = crc_hqx(packet, 0x1021)
+    key_crc = crc_hqx(pack("<H", crc) + b"0" * 32, 0x1021)
+    assert_that(sign_packet(packet)).is_equal_to(packet + pack("<HH", crc, key_crc))
+    assert_that(sign_packet(packet)[-4:]).is_equal_to(unhexlify("42a9a1b2"))
+
+
+def test_sign_packet_resuming_from_a_crc_prefix_returns_the_same_signature():
+    """Test the sign_packet tool resuming from the crc of the packet header."""
+    packet = unhexlify(packets.LOGIN_PACKET_TYPE1.format(SUT_TIMESTAMP, SUT_DEVICE_KEY))
+    assert_that(sign_packet(packet, get_crc_prefix(packet[:24]))).is_equal_to(sign_packet(packet))
+
+
+def test_verify_packet_signature_of_a_signed_packet_returns_true():
+    """Test the verify_packet_signature tool with a signed packet."""
+    packet = unhexlify(packets.GET_SCHEDULES_PACKET.format(SUT_SESSION_ID, SUT_TIMESTAMP, SUT_DEVICE_ID))
+    assert_that(verify_packet_signature(sign_packet(packet))).is_true()
+
+
+def test_verify_packet_signature_of_a_tampered_packet_returns_false():
+    """Test the verify_packet_signature tool with a tampered and a short packet."""
+    signed = bytearray(sign_packet(unhexlify(packets.GET_SCHEDULES_PACKET.format(SUT_SESSION_ID, SUT_TIMESTAMP, SUT_DEVICE_ID))))
+    signed[10] ^= 0xFF
+    assert_that(verify_packet_signature(signed)).is_false()
+    assert_that(verify_packet_signature(b"\xfe\xf0")).is_false()
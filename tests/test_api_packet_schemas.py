@@ -0,0 +1,76 @@
+# Copyright Tomer Figenblat.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Switcher integration packet schemas test cases."""
+
+from binascii import unhexlify
+
+from assertpy import assert_that
+from pytest import mark
+
+from aioswitcher.api import packets
+from aioswitcher.device.tools import set_message_length, sign_packet_with_crc_key
+
+TIMESTAMP = "ef8db35c"
+SESSION_ID = "01000000"
+DEVICE_ID = "a123bc"
+DEVICE_KEY = "18"
+TOKEN = "0123456789abcdef0123456789abcdef"
+
+b_ts = unhexlify(TIMESTAMP)
+b_session = unhexlify(SESSION_ID)
+b_id = unhexlify(DEVICE_ID)
+b_token = unhexlify(TOKEN)
+common = {"session_id": b_session, "timestamp": b_ts, "device_id": b_id}
+
+
+def _signed(hex_packet):
+    return unhexlify(sign_packet_with_crc_key(set_message_length(hex_packet)))
+
+
+@mark.parametrize("schema, values, hex_packet", [
+    (packets.LOGIN_TYPE1_SCHEMA, {"timestamp": b_ts, "device_key": unhexlify(DEVICE_KEY)}, packets.LOGIN_PACKET_TYPE1.format(TIMESTAMP, DEVICE_KEY)),
+    (packets.LOGIN_TYPE2_SCHEMA, {"timestamp": b_ts, "device_id": b_id}, packets.LOGIN_PACKET_TYPE2.format(TIMESTAMP, DEVICE_ID)),
+    (packets.LOGIN_TOKEN_TYPE2_SCHEMA, {"token": b_token, "timestamp": b_ts, "device_id": b_id}, packets.LOGIN_TOKEN_PACKET_TYPE2.format(TOKEN, TIMESTAMP, DEVICE_ID)),
+    (packets.LOGIN2_TOKEN_TYPE2_SCHEMA, {"device_id": b_id, "timestamp": b_ts, "token": b_token}, packets.LOGIN2_TOKEN_PACKET_TYPE2.format(DEVICE_ID, TIMESTAMP, TOKEN)),
+    (packets.GET_STATE_TYPE1_SCHEMA, common, packets.GET_STATE_PACKET_TYPE1.format(SESSION_ID, TIMESTAMP, DEVICE_ID)),
+    (packets.GET_STATE2_TYPE2_SCHEMA, common, packets.GET_STATE_PACKET2_TYPE2.format(SESSION_ID, TIMESTAMP, DEVICE_ID)),
+    (packets.SEND_CONTROL_SCHEMA, {**common, "command": 1, "timer": 5400}, packets.SEND_CONTROL_PACKET.format(SESSION_ID, TIMESTAMP, DEVICE_ID, "1", "18150000")),
+    (packets.SEND_CONTROL_SCHEMA, {**common, "command": 0, "timer": 0}, packets.SEND_CONTROL_PACKET.format(SESSION_ID, TIMESTAMP, DEVICE_ID, "0", packets.NO_TIMER_REQUESTED)),
+    (packets.SET_AUTO_OFF_SET_SCHEMA, {**common, "auto_off": 5400}, packets.SET_AUTO_OFF_SET_PACKET.format(SESSION_ID, TIMESTAMP, DEVICE_ID, "18150000")),
+    (packets.UPDATE_DEVICE_NAME_SCHEMA, {**common, "name": b"my device"}, packets.UPDATE_DEVICE_NAME_PACKET.format(SESSION_ID, TIMESTAMP, DEVICE_ID, b"my device".hex() + "00" * 23)),
+    (packets.GET_SCHEDULES_SCHEMA, common, packets.GET_SCHEDULES_PACKET.format(SESSION_ID, TIMESTAMP, DEVICE_ID)),
+    (packets.DELETE_SCHEDULE_SCHEMA, {**common, "schedule_id": 7}, packets.DELETE_SCHEDULE_PACKET.format(SESSION_ID, TIMESTAMP, DEVICE_ID, "7")),
+    (packets.CREATE_SCHEDULE_SCHEMA, {**common, "weekdays": 0x82, "start_time": 0x5cb38def, "end_time": 0x5cb39bff}, packets.CREATE_SCHEDULE_PACKET.format(SESSION_ID, TIMESTAMP, DEVICE_ID, packets.SCHEDULE_CREATE_DATA_FORMAT.format("82", "ef8db35c", "ff9bb35c"))),
+    (packets.BREEZE_COMMAND_SCHEMA, {**common, "length": 4, "command": unhexlify("00112233")}, packets.BREEZE_COMMAND_PACKET.format(SESSION_ID, TIMESTAMP, DEVICE_ID, "0400", "00112233")),
+    (packets.BREEZE_UPDATE_STATUS_SCHEMA, {**common, "state": 1, "mode": 4, "target_temp": 24, "fan_swing": 0x31}, packets.BREEZE_UPDATE_STATUS_PACKET.format(SESSION_ID, TIMESTAMP, DEVICE_ID, "01", "04", 24, "3", "1")),
+    (packets.RUNNER_STOP_SCHEMA, common, packets.RUNNER_STOP_COMMAND.format(SESSION_ID, TIMESTAMP, DEVICE_ID)),
+    (packets.RUNNER_SET_POSITION_SCHEMA, {**common, "position": 100}, packets.RUNNER_SET_POSITION.format(SESSION_ID, TIMESTAMP, DEVICE_ID, "64")),
+    (packets.RUNNER_SET_CHILD_LOCK_SCHEMA, {**common, "child_lock": 1}, packets.RUNNER_SET_CHILD_LOCK.format(SESSION_ID, TIMESTAMP, DEVICE_ID, "01")),
+    (packets.GENERAL_TOKEN_COMMAND_SCHEMA, {"timestamp": b_ts, "device_id": b_id, "token": b_token, "precommand": packets.STOP_SHUTTER_PRECOMMAND_BYTES, "command": bytes((1, 0, 0))}, packets.GENERAL_TOKEN_COMMAND.format(TIMESTAMP, DEVICE_ID, TOKEN, packets.STOP_SHUTTER_PRECOMMAND, "010000")),
+    (packets.GENERAL_TOKEN_COMMAND_SCHEMA, {"timestamp": b_ts, "device_id": b_id, "token": b_token, "precommand": packets.SET_LIGHT_PRECOMMAND_BYTES, "command": bytes((2, 1))}, packets.GENERAL_TOKEN_COMMAND.format(TIMESTAMP, DEVICE_ID, TOKEN, packets.SET_LIGHT_PRECOMMAND, "0201")),
+])
+def test_packet_schema_builds_the_same_packet_as_the_hex_template(schema, values, hex_packet):
+    assert_that(schema.build(**values)).is_equal_to(_signed(hex_packet))
+
+
+def test_packet_schema_sets_the_length_of_messages_longer_than_255_bytes():
+    command = bytes(300)
+    packet = packets.BREEZE_COMMAND_SCHEMA.build(**common, length=len(command), command=command)
+    assert_that(int.from_bytes(packet[2:4], "little")).is_equal_to(len(packet))
+
+
+def test_packet_schema_pads_short_fixed_size_bytes():
+    packet = packets.GET_STATE_TYPE1_SCHEMA.build(session_id=b"", timestamp=b_ts, device_id=b_id)
+    assert_that(packet).is_equal_to(_signed(packets.GET_STATE_PACKET_TYPE1.format("00000000", TIMESTAMP, DEVICE_ID)))
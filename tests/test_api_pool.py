@@ -0,0 +1,130 @@
+# Copyright Tomer Figenblat.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Switcher integration TCP socket API connection pool test cases."""
+
+from asyncio import create_task, sleep
+from asyncio.streams import StreamReader, StreamWriter
+from datetime import timedelta
+from socket import AF_INET
+from unittest.mock import AsyncMock, Mock, patch
+
+from assertpy import assert_that
+from pytest import fixture, mark, raises
+
+from aioswitcher.api import SWITCHER_TCP_PORT_TYPE1
+from aioswitcher.api.pool import SwitcherApiPool
+from aioswitcher.device import DeviceType
+
+device_type = DeviceType.TOUCH
+device_id = "aaaaaa"
+device_key = "18"
+device_ip = "1.2.3.4"
+pytestmark = mark.asyncio
+
+
+def _connection():
+    reader = AsyncMock(spec_set=StreamReader)
+    reader.at_eof = Mock(return_value=False)
+    writer = AsyncMock(spec_set=StreamWriter)
+    writer.write = Mock()
+    writer.close = Mock()
+    writer.is_closing = Mock(return_value=False)
+    return reader, writer
+
+
+@fixture
+def open_connection_mock():
+    with patch("aioswitcher.api.open_connection", side_effect=lambda **_: _connection()) as mock:
+        yield mock
+
+
+async def test_pool_reuses_an_idle_connection(open_connection_mock):
+    async with SwitcherApiPool() as pool:
+        async with pool.acquire(device_type, device_ip, device_id, device_key) as first:
+            assert_that(first.connected).is_true()
+        async with pool.acquire(device_type, device_ip, device_id, device_key) as second:
+            assert_that(second).is_same_as(first)
+        assert_that(pool.idle_connections).is_equal_to(1)
+    open_connection_mock.assert_called_once_with(host=device_ip, port=SWITCHER_TCP_PORT_TYPE1, family=AF_INET)
+    assert_that(first.connected).is_false()
+
+
+async def test_pool_replaces_a_half_closed_connection(open_connection_mock):
+    async with SwitcherApiPool() as pool:
+        async with pool.acquire(device_type, device_ip, device_id, device_key) as first:
+            first._reader.at_eof.return_value = True
+        async with pool.acquire(device_type, device_ip, device_id, device_key) as second:
+            assert_that(second).is_not_same_as(first)
+    assert_that(open_connection_mock.call_count).is_equal_to(2)
+
+
+async def test_pool_drops_a_connection_that_failed_while_in_use(open_connection_mock):
+    async with SwitcherApiPool() as pool:
+        with raises(RuntimeError, match="dummy"):
+            async with pool.acquire(device_type, device_ip, device_id, device_key) as api:
+                raise RuntimeError("dummy")
+        assert_that(api.connected).is_false()
+        assert_that(pool.idle_connections).is_equal_to(0)
+
+
+async def test_pool_caps_the_connections_per_device(open_connection_mock):
+    async with SwitcherApiPool(max_connections=1) as pool:
+        async def use_connection():
+            async with pool.acquire(device_type, device_ip, device_id, device_key):
+                await sleep(0.01)
+
+        tasks = [create_task(use_connection()) for _ in range(3)]
+        for task in tasks:
+            await task
+    open_connection_mock.assert_called_once()
+
+
+async def test_pool_opens_a_connection_per_device(open_connection_mock):
+    async with SwitcherApiPool() as pool:
+        async with pool.acquire(device_type, device_ip, device_id, device_key):
+            async with pool.acquire(device_type, "1.2.3.5", "bbbbbb", device_key):
+                pass
+        assert_that(pool.idle_connections).is_equal_to(2)
+    assert_that(open_connection_mock.call_count).is_equal_to(2)
+
+
+async def test_pool_reaps_idle_connections(open_connection_mock):
+    async with SwitcherApiPool(idle_timeout=timedelta(0)) as pool:
+        async with pool.acquire(device_type, device_ip, device_id, device_key) as api:
+            pass
+        await pool.reap()
+        assert_that(pool.idle_connections).is_equal_to(0)
+        assert_that(api.connected).is_false()
+
+
+async def test_closed_pool_should_raise_error(open_connection_mock):
+    pool = SwitcherApiPool()
+    await pool.close()
+    with raises(RuntimeError, match="the connection pool is closed"):
+        async with pool.acquire(device_type, device_ip, device_id, device_key):
+            pass
+
+
+async def test_pool_with_an_invalid_max_connections_should_raise_error():
+    with raises(ValueError, match="max connections must be at least 1"):
+        SwitcherApiPool(max_connections=0)
+
+
+async def test_pool_opens_connections_with_its_timeouts(open_connection_mock):
+    async with SwitcherApiPool(connect_timeout=1, read_timeout=2, operation_timeout=3) as pool:
+        async with pool.acquire(device_type, device_ip, device_id, device_key) as api:
+            assert_that(api._connect_timeout).is_equal_to(1)
+            assert_that(api._read_timeout).is_equal_to(2)
+            assert_that(api._operation_timeout).is_equal_to(3)
@@ -0,0 +1,140 @@
+# Copyright Tomer Figenblat.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Switcher integration TCP socket API reconnect and circuit breaker test cases."""
+
+from asyncio import CancelledError
+from asyncio.streams import StreamReader, StreamWriter
+from datetime import timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+from assertpy import assert_that
+from pytest import fixture, mark, raises
+
+from aioswitcher.api import SwitcherApi
+from aioswitcher.api.resilience import (
+    CircuitState,
+    SwitcherCircuitBreaker,
+    SwitcherCircuitOpenError,
+    connect_with_backoff,
+)
+from aioswitcher.device import DeviceType
+
+device_id = "aaaaaa"
+pytestmark = mark.asyncio
+
+
+@fixture
+def api():
+    return SwitcherApi(DeviceType.TOUCH, "1.2.3.4", device_id, "18")
+
+
+@fixture
+def connection():
+    return AsyncMock(spec_set=StreamReader), AsyncMock(spec_set=StreamWriter)
+
+
+@fixture
+def sleep_mock():
+    with patch("aioswitcher.api.resilience.sleep") as mock:
+        yield mock
+
+
+async def test_connect_with_backoff_retries_until_connected(api, connection, sleep_mock):
+    with patch("aioswitcher.api.open_connection", side_effect=[ConnectionRefusedError(), OSError(), connection]) as open_connection:
+        await connect_with_backoff(api, base_delay=1, max_delay=1.5)
+    assert_that(api.connected).is_true()
+    assert_that(open_connection.call_count).is_equal_to(3)
+    assert_that(sleep_mock.call_count).is_equal_to(2)
+    first_delay, second_delay = (call.args[0] for call in sleep_mock.call_args_list)
+    assert_that(first_delay).is_between(0, 1)
+    assert_that(second_delay).is_between(0, 1.5)
+
+
+async def test_connect_with_backoff_raises_the_last_error_when_all_attempts_failed(api, sleep_mock):
+    with patch("aioswitcher.api.open_connection", side_effect=ConnectionRefusedError("dummy")):
+        with raises(ConnectionRefusedError, match="dummy"):
+            await connect_with_backoff(api, attempts=3)
+    assert_that(sleep_mock.call_count).is_equal_to(2)
+
+
+async def test_connect_with_backoff_fails_fast_once_the_circuit_is_open(api, sleep_mock):
+    breaker = SwitcherCircuitBreaker(failure_threshold=2)
+    with patch("aioswitcher.api.open_connection", side_effect=ConnectionRefusedError()) as open_connection:
+        with raises(SwitcherCircuitOpenError, match="device aaaaaa is known as down"):
+            await connect_with_backoff(api, breaker, attempts=5)
+        with raises(SwitcherCircuitOpenError):
+            await connect_with_backoff(api, breaker)
+    assert_that(open_connection.call_count).is_equal_to(2)
+    assert_that(breaker.state(device_id)).is_equal_to(CircuitState.OPEN)
+
+
+async def test_connect_with_backoff_closes_the_circuit_on_success(api, connection, sleep_mock):
+    breaker = SwitcherCircuitBreaker(failure_threshold=2)
+    breaker.record_failure(device_id)
+    with patch("aioswitcher.api.open_connection", return_value=connection):
+        await connect_with_backoff(api, breaker)
+    assert_that(breaker.state(device_id)).is_equal_to(CircuitState.CLOSED)
+
+
+async def test_connect_with_backoff_with_invalid_attempts_should_raise_error(api):
+    with raises(ValueError, match="attempts must be at least 1"):
+        await connect_with_backoff(api, attempts=0)
+
+
+async def test_circuit_allows_a_single_probe_after_the_reset_timeout():
+    breaker = SwitcherCircuitBreaker(failure_threshold=1, reset_timeout=timedelta(0))
+    breaker.record_failure(device_id)
+    assert_that(breaker.state(device_id)).is_equal_to(CircuitState.HALF_OPEN)
+    assert_that(breaker.allow_request(device_id)).is_true()
+    assert_that(breaker.allow_request(device_id)).is_false()
+    breaker.record_failure(device_id)
+    assert_that(breaker.allow_request(device_id)).is_true()
+
+
+async def test_circuit_is_closed_when_the_bridge_sees_the_device():
+    breaker = SwitcherCircuitBreaker(failure_threshold=1)
+    breaker.record_failure(device_id)
+    assert_that(breaker.allow_request(device_id)).is_false()
+    on_device = Mock()
+    device = Mock(device_id=device_id)
+
+    breaker.track(on_device)(device)
+
+    on_device.assert_called_once_with(device)
+    assert_that(breaker.state(device_id)).is_equal_to(CircuitState.CLOSED)
+    assert_that(breaker.allow_request(device_id)).is_true()
+
+
+async def test_circuit_breaker_with_an_invalid_threshold_should_raise_error():
+    with raises(ValueError, match="failure threshold must be at least 1"):
+        SwitcherCircuitBreaker(failure_threshold=0)
+
+
+@mark.parametrize("error", [CancelledError(), RuntimeError("dummy")])
+async def test_an_interrupted_probe_should_not_leave_the_circuit_half_open(api, error):
+    breaker = SwitcherCircuitBreaker(failure_threshold=1, reset_timeout=timedelta(0))
+    breaker.record_failure(device_id)
+    with patch("aioswitcher.api.open_connection", side_effect=error):
+        with raises(type(error)):
+            await connect_with_backoff(api, breaker)
+    assert_that(breaker.allow_request(device_id)).is_true()
+
+
+async def test_a_cancelled_connection_should_not_count_as_a_failure(api):
+    breaker = SwitcherCircuitBreaker(failure_threshold=1)
+    with patch("aioswitcher.api.open_connection", side_effect=CancelledError()):
+        with raises(CancelledError):
+            await connect_with_backoff(api, breaker)
+    assert_that(breaker.state(device_id)).is_equal_to(CircuitState.CLOSED)
@@ -15,6 +15,7 @@
 """Switcher integration TCP socket API module test cases."""
 
 import os
+from asyncio import CancelledError, Event, Queue, create_task, gather, sleep
 from asyncio.streams import StreamReader, StreamWriter
 from binascii import hexlify, unhexlify
 from datetime import timedelta
@@ -30,6 +31,7 @@
     SWITCHER_TCP_PORT_TYPE2,
     Command,
     SwitcherApi,
+    SwitcherTimeoutError,
 )
 from aioswitcher.api.messages import (
     SwitcherBaseResponse,
@@ -189,6 +191,130 @@ async def test_get_state_function_with_valid_packets(reader_mock, writer_write,
     assert_that(response.unparsed_response).is_equal_to(get_state_response_packet)
 
 
+async def test_get_state_function_reuses_the_login_session(reader_mock, writer_write, connected_api_type1, resource_path_root):
+    three_packets = _get_dummy_packets(resource_path_root, "login_response", "get_state_response", "get_state_response")
+    with patch.object(reader_mock, "read", side_effect=three_packets):
+        await connected_api_type1.get_state()
+        response = await connected_api_type1.get_state()
+    assert_that(writer_write.call_count).is_equal_to(3)
+    assert_that(response).is_instance_of(SwitcherStateResponse)
+
+
+async def test_get_state_function_with_a_zero_session_lifetime_logs_in_every_request(reader_mock, writer_mock, writer_write, resource_path_root):
+    four_packets = _get_dummy_packets(resource_path_root, "login_response", "get_state_response", "login_response", "get_state_response")
+    with patch("aioswitcher.api.open_connection", return_value=(reader_mock, writer_mock)):
+        async with SwitcherApi(device_type_api1, device_ip, device_id, device_key, session_lifetime=timedelta(0)) as api:
+            with patch.object(reader_mock, "read", side_effect=four_packets):
+                await api.get_state()
+                await api.get_state()
+    assert_that(writer_write.call_count).is_equal_to(4)
+
+
+async def test_get_state_function_logs_in_again_after_the_session_was_rejected(reader_mock, writer_write, connected_api_type1, resource_path_root):
+    login_response_packet, get_state_response_packet = _get_dummy_packets(resource_path_root, "login_response", "get_state_response")
+    with patch.object(reader_mock, "read", side_effect=[login_response_packet, b'', login_response_packet, get_state_response_packet]):
+        with raises(RuntimeError, match="get state request was not successful"):
+            await connected_api_type1.get_state()
+        response = await connected_api_type1.get_state()
+    assert_that(writer_write.call_count).is_equal_to(4)
+    assert_that(response).is_instance_of(SwitcherStateResponse)
+
+
+async def test_two_responses_received_in_a_single_segment_are_split_by_their_header(reader_mock, writer_write, connected_api_type2, resource_path_root):
+    login_response_packet, get_state_response_packet = _get_dummy_packets(resource_path_root, "login2_response", "get_shutter_state_response")
+    with patch.object(reader_mock, "read", side_effect=[login_response_packet + get_state_response_packet]):
+        response = await connected_api_type2.get_shutter_state()
+    assert_that(writer_write.call_count).is_equal_to(2)
+    assert_that(response.unparsed_response).is_equal_to(get_state_response_packet)
+
+
+async def test_a_response_received_in_several_segments_is_reassembled(reader_mock, writer_write, connected_api_type2, resource_path_root):
+    login_response_packet, get_state_response_packet = _get_dummy_packets(resource_path_root, "login2_response", "get_shutter_state_response")
+    segments = [login_response_packet[:3], login_response_packet[3:] + get_state_response_packet[:10], get_state_response_packet[10:]]
+    with patch.object(reader_mock, "read", side_effect=segments):
+        response = await connected_api_type2.get_shutter_state()
+    assert_that(writer_write.call_count).is_equal_to(2)
+    assert_that(response.unparsed_response).is_equal_to(get_state_response_packet)
+
+
+async def test_a_response_longer_than_a_single_read_is_reassembled(reader_mock, connected_api_type1):
+    long_response = b"\xfe\xf0\x00\x06" + bytes(1532)
+    with patch.object(reader_mock, "read", side_effect=[long_response[:1024], long_response[1024:]]):
+        response = await connected_api_type1._send_packet("get schedules", b"\xfe\xf0\x00\x00\x00")
+    assert_that(response).is_equal_to(long_response)
+
+
+async def test_concurrent_requests_on_a_single_connection_get_their_own_responses(reader_mock, writer_write, connected_api_type1, resource_path_root):
+    login_response_packet, get_state_response_packet = _get_dummy_packets(resource_path_root, "login_response", "get_state_response")
+    responses = Queue()
+
+    def write(packet):
+        # the login packet type is 0x02a1 in the header
+        responses.put_nowait(login_response_packet if packet[4:8] == unhexlify("0232a100") else get_state_response_packet)
+
+    async def read(_):
+        # a stream reader can't serve two waiting readers at once
+        if read.waiting:
+            raise RuntimeError("read() called while another coroutine is already waiting for incoming data")
+        read.waiting = True
+        await sleep(0)
+        read.waiting = False
+        return await responses.get()
+
+    read.waiting = False
+
+    writer_write.side_effect = write
+    with patch.object(reader_mock, "read", side_effect=read):
+        results = await gather(connected_api_type1.get_state(), connected_api_type1.get_state())
+    assert_that(writer_write.call_count).is_equal_to(3)
+    for response in results:
+        assert_that(response).is_instance_of(SwitcherStateResponse)
+        assert_that(response.unparsed_response).is_equal_to(get_state_response_packet)
+
+
+async def test_connect_to_an_unresponsive_device_should_raise_a_timeout_error():
+    async def hang(**_):
+        await Event().wait()
+
+    with patch("aioswitcher.api.open_connection", side_effect=hang):
+        api = SwitcherApi(device_type_api1, device_ip, device_id, device_key, connect_timeout=0.01)
+        with raises(SwitcherTimeoutError, match="connecting to the device timed out"):
+            await api.connect()
+    assert_that(api.connected).is_false()
+
+
+async def test_get_state_function_with_no_response_should_raise_a_timeout_error_and_close_the_connection(reader_mock, writer_mock, writer_write):
+    async def hang(_):
+        await Event().wait()
+
+    with patch("aioswitcher.api.open_connection", return_value=(reader_mock, writer_mock)):
+        api = SwitcherApi(device_type_api1, device_ip, device_id, device_key, read_timeout=0.01)
+        await api.connect()
+    with patch.object(reader_mock, "read", side_effect=hang):
+        with raises(SwitcherTimeoutError, match="reading the login response timed out"):
+            await api.get_state()
+    writer_write.assert_called_once()
+    writer_mock.close.assert_called_once()
+    assert_that(api.connected).is_false()
+
+
+async def test_get_state_function_exceeding_the_operation_deadline_should_raise_a_timeout_error(reader_mock, writer_mock, resource_path_root):
+    login_response_packet = _load_dummy_packet(resource_path_root, "login_response")
+
+    async def slow_read(_):
+        await sleep(0.02)
+        return login_response_packet
+
+    with patch("aioswitcher.api.open_connection", return_value=(reader_mock, writer_mock)):
+        api = SwitcherApi(device_type_api1, device_ip, device_id, device_key, read_timeout=1, operation_timeout=0.03)
+        await api.connect()
+    with patch.object(reader_mock, "read", side_effect=slow_read):
+        with raises(SwitcherTimeoutError, match="get_state request timed out"):
+            await api.get_state()
+    writer_mock.close.assert_called_once()
+    assert_that(api.connected).is_false()
+
+
 async def test_get_breeze_state_function_with_valid_packets(reader_mock, writer_write, connected_api_type2, resource_path_root):
     login_response_packet = _load_dummy_packet(resource_path_root, "login2_response")
     get_breeze_state_response_packet = _load_dummy_packet(resource_path_root, "get_breeze_state")
@@ -570,3 +696,62 @@ def _get_dummy_packets(resource_path_root, *packets):
 
 def _load_dummy_packet(path, file_name):
     return unhexlify((path / ("dummy_responses/" + file_name + ".txt")).read_text().replace('\n', '').encode())
+
+
+async def test_a_request_cancelled_while_reading_should_close_the_connection(reader_mock, writer_mock, writer_write):
+    reading = Event()
+
+    async def hang(_):
+        reading.set()
+        await Event().wait()
+
+    with patch("aioswitcher.api.open_connection", return_value=(reader_mock, writer_mock)):
+        api = SwitcherApi(device_type_api1, device_ip, device_id, device_key)
+        await api.connect()
+    with patch.object(reader_mock, "read", side_effect=hang):
+        request = create_task(api.get_state())
+        await reading.wait()
+        request.cancel()
+        with raises(CancelledError):
+            await request
+    writer_write.assert_called_once()
+    writer_mock.close.assert_called_once()
+    assert_that(api.connected).is_false()
+
+
+async def test_a_request_after_a_timed_out_request_should_raise_not_connected(reader_mock, writer_mock, writer_write):
+    async def hang(_):
+        await Event().wait()
+
+    with patch("aioswitcher.api.open_connection", return_value=(reader_mock, writer_mock)):
+        api = SwitcherApi(device_type_api1, device_ip, device_id, device_key, read_timeout=0.01)
+        await api.connect()
+    with patch.object(reader_mock, "read", side_effect=hang):
+        with raises(SwitcherTimeoutError):
+            await api.get_state()
+    with raises(ConnectionError, match="not connected"):
+        await api.get_state()
+    writer_write.assert_called_once()
+
+
+async def test_a_request_timing_out_while_queued_should_keep_the_connection(reader_mock, writer_mock, writer_write, resource_path_root):
+    login_response_packet = _load_dummy_packet(resource_path_root, "login_response")
+    responding = Event()
+
+    async def slow_read(_):
+        await responding.wait()
+        return login_response_packet
+
+    with patch("aioswitcher.api.open_connection", return_value=(reader_mock, writer_mock)):
+        api = SwitcherApi(device_type_api1, device_ip, device_id, device_key, operation_timeout=0.01)
+        await api.connect()
+    with patch.object(reader_mock, "read", side_effect=slow_read):
+        in_flight = create_task(api._send_packet("login", b"dummy packet"))
+        await sleep(0)
+        with raises(SwitcherTimeoutError, match="get_state request timed out"):
+            await api.get_state()
+        responding.set()
+        assert_that(await in_flight).is_equal_to(login_response_packet)
+    writer_write.assert_called_once()
+    writer_mock.close.assert_not_called()
+    assert_that(api.connected).is_true()
@@ -14,15 +14,28 @@
 
 """Switcher integration UDP bridge module test cases."""
 import socket
-from asyncio import sleep
+from asyncio import Event, create_task, sleep
 from binascii import unhexlify
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 from assertpy import assert_that
-from pytest import fixture, mark
+from pytest import fixture, mark, raises
 
-from aioswitcher.bridge import SwitcherBridge
+from aioswitcher.bridge import (
+    DatagramFilter,
+    LatencyHistogram,
+    OverflowPolicy,
+    SwitcherBridge,
+    UnchangedBroadcastPolicy,
+    _decode_datagrams,
+    _DeviceBuffer,
+    _get_kernel_drops,
+)
+from aioswitcher.device import DeviceState, DeviceType, ShutterDirection
+from aioswitcher.registry import SwitcherDeviceRegistry
 
 pytestmark = mark.asyncio
 
@@ -82,3 +95,660 @@ async def test_bridge_callback_loading(udp_broadcast_server, unused_udp_broadcas
         await sleep(0.2)
 
     assert_that(mock_callback.call_count).is_equal_to(2)
+
+
+def _volatile_change(datagram):
+    return datagram[:4] + b"\x99" + datagram[5:24] + b"\x00\x00\x00\x00" + datagram[28:-4] + b"\x01\x02\x03\x04"
+
+
+async def test_bridge_skips_unchanged_broadcasts(mock_callback, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    changed_datagram = datagram[:133] + b"\x01" + datagram[134:]
+    bridge = SwitcherBridge(mock_callback, UnchangedBroadcastPolicy.SKIP)
+
+    bridge._handle_datagram(datagram)
+    bridge._handle_datagram(datagram)
+    bridge._handle_datagram(_volatile_change(datagram))
+    assert_that(mock_callback.call_count).is_equal_to(1)
+
+    bridge._handle_datagram(changed_datagram)
+    assert_that(mock_callback.call_count).is_equal_to(2)
+    assert_that(mock_callback.call_args.args[0].device_state).is_equal_to(DeviceState.ON)
+
+
+async def test_bridge_reuses_the_device_of_unchanged_broadcasts(mock_callback, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    bridge = SwitcherBridge(mock_callback, UnchangedBroadcastPolicy.REUSE)
+
+    bridge._handle_datagram(datagram)
+    first_device = mock_callback.call_args.args[0]
+    first_update = first_device.last_data_update
+    bridge._handle_datagram(_volatile_change(datagram))
+
+    assert_that(mock_callback.call_count).is_equal_to(2)
+    assert_that(mock_callback.call_args.args[0]).is_same_as(first_device)
+    assert_that(first_device.last_data_update).is_greater_than_or_equal_to(first_update)
+
+
+async def test_bridge_parses_unchanged_broadcasts_by_default(mock_callback, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    bridge = SwitcherBridge(mock_callback)
+
+    bridge._handle_datagram(datagram)
+    bridge._handle_datagram(datagram)
+
+    first_device, second_device = (call.args[0] for call in mock_callback.call_args_list)
+    assert_that(second_device).is_not_same_as(first_device)
+    assert_that(second_device.name).is_equal_to(first_device.name)
+
+
+async def test_bridge_sends_only_changes(resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    turned_on_datagram = datagram[:133] + b"\x01" + datagram[134:]
+    on_change = Mock()
+    bridge = SwitcherBridge(on_change=on_change)
+
+    bridge._handle_datagram(datagram)
+    bridge._handle_datagram(datagram)
+    bridge._handle_datagram(turned_on_datagram)
+
+    assert_that(on_change.call_count).is_equal_to(2)
+    discovery, change = (call.args[0] for call in on_change.call_args_list)
+    assert_that(discovery.discovered).is_true()
+    assert_that(discovery.current).contains_entry({"device_state": DeviceState.OFF}).does_not_contain_key("last_data_update")
+    assert_that(change.discovered).is_false()
+    assert_that(change.previous).is_equal_to({"device_state": DeviceState.OFF})
+    assert_that(change.current).is_equal_to({"device_state": DeviceState.ON})
+    assert_that(change.device.device_state).is_equal_to(DeviceState.ON)
+
+
+async def test_bridge_sends_changes_of_the_chosen_fields_only(mock_callback, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    renamed_datagram = datagram[:42] + b"Renamed".ljust(32, b"\x00") + datagram[74:]
+    on_change = Mock()
+    bridge = SwitcherBridge(mock_callback, on_change=on_change, change_fields=["device_state", "position"])
+
+    bridge._handle_datagram(datagram)
+    bridge._handle_datagram(renamed_datagram)
+
+    assert_that(mock_callback.call_count).is_equal_to(2)
+    on_change.assert_called_once()
+    assert_that(on_change.call_args.args[0].current).is_equal_to({"device_state": DeviceState.OFF})
+
+
+async def test_bridge_updates_the_registry(resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    async with SwitcherDeviceRegistry() as registry:
+        bridge = SwitcherBridge(registry=registry)
+        bridge._handle_datagram(datagram, 20002)
+
+        entry = registry.get("aaaaaa")
+        assert_that(entry.device.name).is_equal_to("My Switcher Boiler")
+        assert_that(entry.port).is_equal_to(20002)
+
+
+async def test_bridge_keeps_devices_with_skipped_broadcasts_online(resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    async with SwitcherDeviceRegistry(broadcast_interval=timedelta(milliseconds=10), missed_broadcasts=1) as registry:
+        bridge = SwitcherBridge(unchanged_broadcasts=UnchangedBroadcastPolicy.SKIP, registry=registry)
+        bridge._handle_datagram(datagram, 20002)
+        for _ in range(5):
+            await sleep(0.005)
+            bridge._handle_datagram(_volatile_change(datagram), 20002)
+            registry.sweep()
+
+        assert_that(registry.get("aaaaaa").online).is_true()
+
+
+async def test_bridge_stream_yields_the_devices_until_stopped(unused_udp_port_factory, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    bridge = SwitcherBridge(ports=[unused_udp_port_factory()], bind_address="127.0.0.1")
+    await bridge.start()
+
+    async def consume():
+        return [device async for device in bridge.stream()]
+
+    consumer = create_task(consume())
+    await sleep(0)
+    bridge._handle_datagram(datagram)
+    bridge._handle_datagram(datagram[:133] + b"\x01" + datagram[134:])
+    await bridge.stop()
+
+    devices = await consumer
+    assert_that([device.device_state for device in devices]).is_equal_to([DeviceState.OFF, DeviceState.ON])
+    assert_that(bridge._streams).is_empty()
+
+
+async def test_bridge_stream_buffers_the_devices_before_the_iteration_starts(unused_udp_port_factory):
+    device = Mock(device_id="aaaaaa")
+    bridge = SwitcherBridge(ports=[unused_udp_port_factory()], bind_address="127.0.0.1")
+    await bridge.start()
+    stream = bridge.stream()
+    bridge._emit(device)
+    assert_that(stream.pending).is_equal_to(1)
+    await bridge.stop()
+
+    assert_that([device async for device in stream]).is_equal_to([device])
+
+
+async def test_bridge_stream_ends_right_away_when_the_bridge_is_not_running(unused_udp_port_factory):
+    bridge = SwitcherBridge(ports=[unused_udp_port_factory()], bind_address="127.0.0.1")
+    assert_that([device async for device in bridge.stream()]).is_empty()
+
+    await bridge.start()
+    await bridge.stop()
+    assert_that([device async for device in bridge.stream()]).is_empty()
+    assert_that(bridge._streams).is_empty()
+
+
+@mark.parametrize("overflow, expected_devices, expected_dropped", [
+    (OverflowPolicy.DROP_OLDEST, ["bbbbbb-1", "aaaaaa-2"], 1),
+    (OverflowPolicy.DROP_NEWEST, ["aaaaaa-1", "bbbbbb-1"], 1),
+    (OverflowPolicy.COALESCE, ["aaaaaa-2", "bbbbbb-1"], 0),
+])
+async def test_device_buffer_overflow(overflow, expected_devices, expected_dropped):
+    buffer = _DeviceBuffer(2, overflow)
+    for device_id, version in (("aaaaaa", 1), ("bbbbbb", 1), ("aaaaaa", 2)):
+        buffer.put(Mock(device_id=device_id, version=version))
+    buffer.close()
+
+    devices = []
+    with raises(StopAsyncIteration):
+        while True:
+            device = await buffer.get()
+            devices.append(f"{device.device_id}-{device.version}")
+    assert_that(devices).is_equal_to(expected_devices)
+    assert_that(buffer.dropped).is_equal_to(expected_dropped)
+
+
+async def test_device_buffer_coalescing_drops_the_oldest_device_when_full():
+    buffer = _DeviceBuffer(1, OverflowPolicy.COALESCE)
+    buffer.put(Mock(device_id="aaaaaa"))
+    buffer.put(Mock(device_id="bbbbbb"))
+    assert_that((await buffer.get()).device_id).is_equal_to("bbbbbb")
+    assert_that(buffer.dropped).is_equal_to(1)
+
+
+async def test_device_buffer_with_an_invalid_maxsize_should_raise_error():
+    with raises(ValueError, match="maxsize must be at least 1"):
+        _DeviceBuffer(0, OverflowPolicy.DROP_OLDEST)
+
+
+async def test_bridge_schedules_coroutine_callbacks(resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    received = []
+
+    async def on_device(device):
+        await sleep(0.01)
+        received.append(device)
+
+    bridge = SwitcherBridge(on_device)
+    bridge._handle_datagram(datagram)
+    assert_that(received).is_empty()
+    await bridge.stop()
+
+    assert_that(received).is_length(1)
+    assert_that(bridge.callback_latency.count).is_equal_to(1)
+    assert_that(bridge.callback_latency.max).is_greater_than_or_equal_to(0.01)
+
+
+async def test_bridge_limits_the_concurrent_coroutine_callbacks():
+    running = []
+    max_running = []
+
+    async def on_device(device):
+        running.append(device)
+        max_running.append(len(running))
+        await sleep(0.01)
+        running.remove(device)
+
+    bridge = SwitcherBridge(on_device, callback_concurrency=2)
+    for device_id in ("aaaaaa", "bbbbbb", "cccccc", "dddddd"):
+        bridge._emit(Mock(device_id=device_id))
+    await bridge.stop()
+
+    assert_that(max_running).is_length(4)
+    assert_that(max(max_running)).is_equal_to(2)
+
+
+async def test_bridge_cancels_coroutine_callbacks_when_stopped_without_draining():
+    async def wait_forever(device):
+        await Event().wait()
+
+    on_device = AsyncMock(side_effect=wait_forever)
+    bridge = SwitcherBridge(on_device, callback_concurrency=1)
+    bridge._emit(Mock(device_id="aaaaaa"))
+    bridge._emit(Mock(device_id="bbbbbb"))
+    await sleep(0)
+
+    await bridge.stop(drain=False)
+    assert_that(bridge._callback_tasks).is_empty()
+    on_device.assert_awaited_once()
+
+
+async def test_bridge_cancels_coroutine_callbacks_after_the_drain_timeout():
+    bridge = SwitcherBridge(lambda device: Event().wait(), drain_timeout=timedelta(milliseconds=10))
+    bridge._emit(Mock(device_id="aaaaaa"))
+    await bridge.stop()
+    assert_that(bridge._callback_tasks).is_empty()
+
+
+@patch("logging.Logger.exception")
+async def test_bridge_logs_failing_coroutine_callbacks(mock_exception):
+    bridge = SwitcherBridge(AsyncMock(side_effect=RuntimeError("dummy")))
+    bridge._emit(Mock(device_id="aaaaaa"))
+    await bridge.stop()
+    mock_exception.assert_called_once_with("device callback failed")
+
+
+async def test_bridge_with_an_invalid_callback_concurrency_should_raise_error():
+    with raises(ValueError, match="callback concurrency must be at least 1"):
+        SwitcherBridge(callback_concurrency=0)
+
+
+async def test_bridge_drops_the_coroutine_callbacks_exceeding_the_pending_limit():
+    async def slow(device):
+        await sleep(0.01)
+
+    callback = AsyncMock(side_effect=slow)
+    bridge = SwitcherBridge(callback, max_pending_callbacks=2)
+    for device_id in ("aaaaaa", "bbbbbb", "cccccc", "dddddd", "eeeeee"):
+        bridge._emit(Mock(device_id=device_id))
+
+    assert_that(bridge._callback_tasks).is_length(2)
+    assert_that(bridge.statistics.dropped_callbacks).is_equal_to(3)
+    await bridge.stop()
+    assert_that(callback.await_count).is_equal_to(2)
+
+
+async def test_bridge_with_an_invalid_max_pending_callbacks_should_raise_error():
+    with raises(ValueError, match="max pending callbacks must be at least 1"):
+        SwitcherBridge(max_pending_callbacks=0)
+
+
+async def test_latency_histogram():
+    histogram = LatencyHistogram()
+    assert_that(histogram.mean).is_equal_to(0)
+    for latency in (0.0002, 0.0003, 0.003, 7.0):
+        histogram.record(latency)
+
+    assert_that(histogram.count).is_equal_to(4)
+    assert_that(histogram.max).is_equal_to(7.0)
+    assert_that(histogram.mean).is_close_to(1.750875, 0.000001)
+    assert_that(histogram.buckets).contains_entry({0.0005: 2}, {0.005: 1}, {float("inf"): 1})
+    assert_that(histogram.quantile(0.5)).is_equal_to(0.0005)
+    assert_that(histogram.quantile(0.75)).is_equal_to(0.005)
+    assert_that(histogram.quantile(1)).is_equal_to(7.0)
+
+
+async def test_bridge_delivers_to_subscribers_independently():
+    bridge = SwitcherBridge()
+    slow_subscriber_blocked = Event()
+    fast_devices = []
+    slow_devices = []
+
+    async def slow_subscriber(device):
+        slow_devices.append(device)
+        await slow_subscriber_blocked.wait()
+
+    fast_subscription = bridge.subscribe(fast_devices.append)
+    slow_subscription = bridge.subscribe(slow_subscriber, maxsize=1)
+    for device_id in ("aaaaaa", "bbbbbb", "cccccc"):
+        bridge._emit(Mock(device_id=device_id, device_type=DeviceType.V4))
+        await sleep(0)
+
+    assert_that([device.device_id for device in fast_devices]).is_equal_to(["aaaaaa", "bbbbbb", "cccccc"])
+    assert_that([device.device_id for device in slow_devices]).is_equal_to(["aaaaaa"])
+    assert_that(slow_subscription.pending).is_equal_to(1)
+    assert_that(slow_subscription.dropped).is_equal_to(1)
+    assert_that(fast_subscription.dropped).is_equal_to(0)
+    await bridge.stop(drain=False)
+
+
+async def test_bridge_filters_the_devices_of_subscribers():
+    bridge = SwitcherBridge()
+    by_type = Mock()
+    by_id = Mock()
+    bridge.subscribe(by_type, device_types=[DeviceType.RUNNER])
+    bridge.subscribe(by_id, device_ids=["aaaaaa"])
+
+    runner = Mock(device_id="bbbbbb", device_type=DeviceType.RUNNER)
+    heater = Mock(device_id="aaaaaa", device_type=DeviceType.V4)
+    bridge._emit(runner)
+    bridge._emit(heater)
+    await bridge.stop()
+
+    by_type.assert_called_once_with(runner)
+    by_id.assert_called_once_with(heater)
+
+
+async def test_bridge_stops_delivering_to_an_unsubscribed_subscriber():
+    bridge = SwitcherBridge()
+    subscriber = Mock()
+    subscription = bridge.subscribe(subscriber)
+    bridge._emit(Mock(device_id="aaaaaa"))
+    await sleep(0)
+    bridge.unsubscribe(subscription)
+    bridge._emit(Mock(device_id="aaaaaa"))
+    await bridge.stop()
+
+    subscriber.assert_called_once()
+
+
+@patch("logging.Logger.exception")
+async def test_bridge_logs_failing_subscribers(mock_exception):
+    bridge = SwitcherBridge()
+    bridge.subscribe(Mock(side_effect=RuntimeError("dummy")))
+    bridge._emit(Mock(device_id="aaaaaa"))
+    await bridge.stop()
+    mock_exception.assert_called_once_with("subscriber callback failed")
+
+
+async def test_bridge_batches_the_devices_of_a_loop_iteration():
+    on_devices = Mock()
+    bridge = SwitcherBridge(on_devices=on_devices)
+    first = Mock(device_id="aaaaaa")
+    latest = Mock(device_id="aaaaaa")
+    other = Mock(device_id="bbbbbb")
+
+    bridge._emit(first)
+    bridge._emit(other)
+    bridge._emit(latest)
+    on_devices.assert_not_called()
+    await sleep(0)
+    on_devices.assert_called_once_with([latest, other])
+
+    bridge._emit(first)
+    await sleep(0)
+    on_devices.assert_called_with([first])
+    await bridge.stop()
+
+
+async def test_bridge_batches_the_devices_of_a_window():
+    on_devices = Mock()
+    bridge = SwitcherBridge(on_devices=on_devices, batch_window=timedelta(milliseconds=20))
+    first = Mock(device_id="aaaaaa")
+    second = Mock(device_id="bbbbbb")
+
+    bridge._emit(first)
+    await sleep(0.005)
+    bridge._emit(second)
+    await sleep(0)
+    on_devices.assert_not_called()
+    await sleep(0.03)
+    on_devices.assert_called_once_with([first, second])
+    await bridge.stop()
+
+
+async def test_bridge_sends_the_pending_batch_when_stopped():
+    on_devices = AsyncMock()
+    bridge = SwitcherBridge(on_devices=on_devices, batch_window=timedelta(seconds=60))
+    device = Mock(device_id="aaaaaa")
+    bridge._emit(device)
+    await bridge.stop()
+    on_devices.assert_awaited_once_with([device])
+
+
+async def test_bridge_parses_in_the_executor_above_the_offload_threshold(mock_callback, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    with ThreadPoolExecutor(1) as executor:
+        bridge = SwitcherBridge(mock_callback, executor=executor, offload_threshold=1)
+        bridge._handle_datagram(datagram)
+        mock_callback.assert_called_once()
+        bridge._handle_datagram(datagram)
+        mock_callback.assert_called_once()
+        await bridge.stop()
+
+    assert_that(mock_callback.call_count).is_equal_to(2)
+    assert_that(mock_callback.call_args.args[0].name).is_equal_to("My Switcher Boiler")
+
+
+async def test_bridge_parses_in_the_event_loop_below_the_offload_threshold(mock_callback, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    executor = Mock(spec_set=ThreadPoolExecutor)
+    bridge = SwitcherBridge(mock_callback, executor=executor, offload_threshold=2)
+    bridge._handle_datagram(datagram)
+    bridge._handle_datagram(datagram)
+
+    assert_that(mock_callback.call_count).is_equal_to(2)
+    executor.submit.assert_not_called()
+
+
+async def test_bridge_drops_datagrams_above_max_in_flight(mock_callback, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    with ThreadPoolExecutor(1) as executor:
+        bridge = SwitcherBridge(mock_callback, executor=executor, offload_threshold=0, max_in_flight=1)
+        bridge._handle_datagram(datagram)
+        bridge._handle_datagram(datagram)
+        mock_callback.assert_not_called()
+        await bridge.stop()
+
+    mock_callback.assert_called_once()
+    assert_that(bridge.statistics.overloaded).is_equal_to(1)
+
+
+async def test_bridge_drops_devices_parsed_in_the_executor_after_a_newer_device(mock_callback, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    with ThreadPoolExecutor(1) as executor:
+        bridge = SwitcherBridge(mock_callback, executor=executor, offload_threshold=1)
+        bridge._handle_datagram(datagram)
+        bridge._handle_datagram(datagram)
+        # a new rate window parses the next datagram in the event loop
+        bridge._load_window_start = 0.0
+        bridge._handle_datagram(datagram)
+        assert_that(mock_callback.call_count).is_equal_to(2)
+        await bridge.stop()
+
+    assert_that(mock_callback.call_count).is_equal_to(2)
+
+
+async def test_bridge_with_an_invalid_max_in_flight_should_raise_error():
+    with raises(ValueError, match="max in flight must be at least 1"):
+        SwitcherBridge(max_in_flight=0)
+
+
+async def test_bridge_submits_datagrams_to_the_executor_in_chunks(mock_callback, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    with ThreadPoolExecutor(1) as executor, patch("aioswitcher.bridge._decode_datagrams", wraps=_decode_datagrams) as decode_datagrams:
+        bridge = SwitcherBridge(mock_callback, executor=executor, offload_threshold=0)
+        for _ in range(100):
+            bridge._handle_datagram(datagram)
+        await bridge.stop()
+
+    assert_that(mock_callback.call_count).is_equal_to(100)
+    assert_that([len(call.args[0]) for call in decode_datagrams.call_args_list]).is_equal_to([64, 36])
+
+
+async def test_bridge_throttles_the_devices_with_trailing_delivery(mock_callback):
+    bridge = SwitcherBridge(mock_callback, throttle=timedelta(milliseconds=20))
+    first = Mock(device_id="aaaaaa", device_state=DeviceState.ON)
+    second = Mock(device_id="aaaaaa", device_state=DeviceState.ON)
+    latest = Mock(device_id="aaaaaa", device_state=DeviceState.ON)
+    other = Mock(device_id="bbbbbb", device_state=DeviceState.ON)
+
+    bridge._emit(first)
+    bridge._emit(second)
+    bridge._emit(latest)
+    bridge._emit(other)
+    assert_that(mock_callback.call_args_list).is_equal_to([((first,),), ((other,),)])
+    await sleep(0.03)
+    assert_that(mock_callback.call_args_list).is_equal_to([((first,),), ((other,),), ((latest,),)])
+    await bridge.stop()
+
+
+async def test_bridge_sends_state_transitions_through_the_throttle(mock_callback):
+    bridge = SwitcherBridge(mock_callback, throttle=timedelta(seconds=60))
+    turned_on = Mock(device_id="aaaaaa", device_state=DeviceState.ON)
+    still_on = Mock(device_id="aaaaaa", device_state=DeviceState.ON)
+    turned_off = Mock(device_id="aaaaaa", device_state=DeviceState.OFF)
+
+    bridge._emit(turned_on)
+    bridge._emit(still_on)
+    bridge._emit(turned_off)
+    assert_that(mock_callback.call_args_list).is_equal_to([((turned_on,),), ((turned_off,),)])
+    await bridge.stop()
+    assert_that(mock_callback.call_count).is_equal_to(2)
+
+
+async def test_bridge_sends_light_and_shutter_transitions_through_the_throttle(mock_callback):
+    bridge = SwitcherBridge(mock_callback, throttle=timedelta(seconds=60))
+    light_on = Mock(device_id="aaaaaa", device_state=DeviceState.ON, light=[DeviceState.ON, DeviceState.OFF], direction=[ShutterDirection.SHUTTER_STOP])
+    still_on = Mock(device_id="aaaaaa", device_state=DeviceState.ON, light=[DeviceState.ON, DeviceState.OFF], direction=[ShutterDirection.SHUTTER_STOP])
+    light_off = Mock(device_id="aaaaaa", device_state=DeviceState.ON, light=[DeviceState.OFF, DeviceState.OFF], direction=[ShutterDirection.SHUTTER_STOP])
+    shutter_up = Mock(device_id="aaaaaa", device_state=DeviceState.ON, light=[DeviceState.OFF, DeviceState.OFF], direction=[ShutterDirection.SHUTTER_UP])
+
+    bridge._emit(light_on)
+    bridge._emit(still_on)
+    bridge._emit(light_off)
+    bridge._emit(shutter_up)
+    assert_that(mock_callback.call_args_list).is_equal_to([((light_on,),), ((light_off,),), ((shutter_up,),)])
+    await bridge.stop()
+    assert_that(mock_callback.call_count).is_equal_to(3)
+
+
+async def test_bridge_sends_the_throttled_devices_when_stopped(mock_callback):
+    registry = SwitcherDeviceRegistry()
+    bridge = SwitcherBridge(mock_callback, throttle=timedelta(seconds=60), registry=registry)
+    first = Mock(device_id="aaaaaa", device_state=DeviceState.ON)
+    latest = Mock(device_id="aaaaaa", device_state=DeviceState.ON)
+
+    bridge._emit(first)
+    bridge._emit(latest)
+    assert_that(registry.get("aaaaaa").device).is_equal_to(latest)
+    mock_callback.assert_called_once_with(first)
+    await bridge.stop()
+    mock_callback.assert_called_with(latest)
+    await registry.close()
+
+
+async def test_bridge_listens_only_on_the_chosen_ports_and_address(udp_broadcast_server, unused_udp_port_factory, mock_callback, resource_path):
+    port = unused_udp_port_factory()
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+
+    async with SwitcherBridge(mock_callback, ports=[port], bind_address="127.0.0.1") as bridge:
+        assert_that(bridge._transports).is_length(1).contains_key(port)
+        udp_broadcast_server.sendto(datagram, ("127.0.0.1", port))
+        await sleep(0.2)
+
+    mock_callback.assert_called_once()
+
+
+async def test_bridge_sets_the_socket_options(unused_udp_port_factory, mock_callback):
+    port = unused_udp_port_factory()
+    first = SwitcherBridge(mock_callback, ports=[port], receive_buffer_size=65536, reuse_port=True)
+    second = SwitcherBridge(mock_callback, ports=[port], reuse_port=True)
+
+    async with first, second:
+        sock = first._transports[port].get_extra_info("socket")
+        assert_that(sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)).is_greater_than_or_equal_to(65536)
+        assert_that(sock.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT)).is_not_zero()
+        assert_that(second.is_running).is_true()
+
+
+async def test_bridge_with_no_ports_should_raise_error():
+    with raises(ValueError, match="ports must not be empty"):
+        SwitcherBridge(ports=[])
+
+
+async def test_bridge_statistics_count_the_datagrams_and_devices(resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    unknown_device = datagram[:74] + b"\xff\xff" + datagram[76:]
+    on_device = Mock(side_effect=[None, RuntimeError("dummy")])
+    bridge = SwitcherBridge(on_device)
+
+    bridge._handle_datagram(datagram)
+    bridge._handle_datagram(datagram)
+    bridge._handle_datagram(b"a foreign datagram")
+    bridge._handle_datagram(unknown_device)
+
+    statistics = bridge.statistics
+    assert_that(statistics.foreign).is_equal_to(1)
+    assert_that(statistics.parse_failures).is_equal_to(1)
+    assert_that(statistics.devices).is_equal_to(2)
+    assert_that(statistics.callback_errors).is_equal_to(1)
+    assert_that(statistics.parse_latency.count).is_equal_to(3)
+    assert_that(statistics.dispatch_latency.count).is_equal_to(2)
+    assert_that(statistics.kernel_drops).is_none()
+    await bridge.stop()
+
+
+async def test_bridge_statistics_count_the_received_datagrams_per_port(udp_broadcast_server, unused_udp_port_factory, mock_callback, resource_path):
+    port = unused_udp_port_factory()
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    datagram_filter = DatagramFilter(denied_device_ids=["bbbbbb"])
+
+    async with SwitcherBridge(mock_callback, ports=[port], datagram_filter=datagram_filter) as bridge:
+        udp_broadcast_server.sendto(datagram, ("127.0.0.1", port))
+        udp_broadcast_server.sendto(b"a foreign datagram", ("127.0.0.1", port))
+        await sleep(0.2)
+        statistics = bridge.statistics
+
+    assert_that(statistics.received).is_equal_to({port: 2})
+    assert_that(statistics.foreign).is_equal_to(1)
+    assert_that(statistics.denied).is_equal_to(0)
+    assert_that(statistics.devices).is_equal_to(1)
+    if Path("/proc/net/udp").exists():
+        assert_that(statistics.kernel_drops).is_equal_to(0)
+
+
+async def test_bridge_statistics_read_the_kernel_drops_in_the_background(unused_udp_port_factory, mock_callback):
+    with patch("aioswitcher.bridge._get_kernel_drops", return_value=7) as get_kernel_drops:
+        async with SwitcherBridge(mock_callback, ports=[unused_udp_port_factory()], bind_address="127.0.0.1") as bridge:
+            await sleep(0.05)
+            assert_that(bridge.statistics.kernel_drops).is_equal_to(7)
+            assert_that(bridge.statistics.kernel_drops).is_equal_to(7)
+            get_kernel_drops.assert_called_once()
+        assert_that(bridge._kernel_drops_reader).is_none()
+        assert_that(bridge.statistics.kernel_drops).is_none()
+
+
+async def test_kernel_drops_are_read_by_socket_inode(tmp_path):
+    proc_net_udp = tmp_path / "udp"
+    proc_net_udp.write_text(
+        "   sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode ref pointer drops\n"
+        "  101: 00000000:4E22 00000000:0000 07 00000000:00000000 00:00000000 00000000     0        0 1111 2 0000000000000000 5\n"
+        "  102: 00000000:4E23 00000000:0000 07 00000000:00000000 00:00000000 00000000     0        0 2222 2 0000000000000000 7\n"
+    )
+    with patch("aioswitcher.bridge._PROC_NET_UDP", str(proc_net_udp)):
+        assert_that(_get_kernel_drops([1111])).is_equal_to(5)
+        assert_that(_get_kernel_drops([1111, 2222])).is_equal_to(12)
+        assert_that(_get_kernel_drops([])).is_none()
+    with patch("aioswitcher.bridge._PROC_NET_UDP", str(tmp_path / "missing")):
+        assert_that(_get_kernel_drops([1111])).is_none()
+
+
+async def test_bridge_drops_only_the_faulty_datagrams_of_a_chunk(mock_callback, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    unknown_device = datagram[:74] + b"\xff\xff" + datagram[76:]
+    with ThreadPoolExecutor(1) as executor:
+        bridge = SwitcherBridge(mock_callback, executor=executor, offload_threshold=0)
+        bridge._handle_datagram(datagram)
+        bridge._handle_datagram(unknown_device)
+        bridge._handle_datagram(datagram)
+        await bridge.stop()
+
+    assert_that(mock_callback.call_count).is_equal_to(2)
+    assert_that(bridge.statistics.parse_failures).is_equal_to(1)
+
+
+async def test_bridge_sends_the_throttled_and_parsing_devices_to_streams_when_stopped(unused_udp_port_factory, resource_path):
+    datagram = unhexlify(Path(f'{resource_path}.txt').read_text().replace('\n', '').encode())
+    first = Mock(device_id="bbbbbb", device_state=DeviceState.ON)
+    held_back = Mock(device_id="bbbbbb", device_state=DeviceState.ON)
+    with ThreadPoolExecutor(1) as executor:
+        bridge = SwitcherBridge(throttle=timedelta(seconds=60), executor=executor, offload_threshold=0, ports=[unused_udp_port_factory()], bind_address="127.0.0.1")
+        await bridge.start()
+
+        async def consume():
+            return [device async for device in bridge.stream()]
+
+        consumer = create_task(consume())
+        await sleep(0)
+        bridge._emit(first)
+        bridge._emit(held_back)
+        bridge._handle_datagram(datagram)
+        await bridge.stop()
+
+    devices = await consumer
+    assert_that(devices).is_length(3).contains(first, held_back)
+    assert_that([device.device_id for device in devices]).contains("aaaaaa")
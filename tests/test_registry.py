@@ -0,0 +1,173 @@
+# Copyright Tomer Figenblat.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Switcher integration device registry test cases."""
+
+from asyncio import sleep
+from datetime import timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+from assertpy import assert_that
+from pytest import mark, raises
+
+from aioswitcher.device import DeviceCategory, DeviceState, DeviceType
+from aioswitcher.registry import SwitcherDeviceRegistry
+
+pytestmark = mark.asyncio
+
+
+def _water_heater(device_id, ip_address, device_state, device_type=DeviceType.V4):
+    mac_address = f"AA:BB:CC:{device_id[:2]}:{device_id[2:4]}:{device_id[4:]}".upper()
+    return Mock(device_type=device_type, device_state=device_state, device_id=device_id, ip_address=ip_address, mac_address=mac_address)
+
+
+def _shutter(device_id, ip_address):
+    return Mock(device_type=DeviceType.RUNNER, device_state=DeviceState.ON, device_id=device_id, ip_address=ip_address, mac_address="11:22:33:44:55:66")
+
+
+async def test_registry_holds_the_latest_device():
+    first_device = Mock(device_id="aaaaaa")
+    latest_device = Mock(device_id="aaaaaa")
+    async with SwitcherDeviceRegistry() as registry:
+        registry.update(first_device, 20002)
+        registry.update(latest_device, 10002)
+
+        assert_that(registry).is_length(1)
+        assert_that("aaaaaa" in registry).is_true()
+        entry = registry.get("aaaaaa")
+        assert_that(entry.device).is_same_as(latest_device)
+        assert_that(entry.port).is_equal_to(10002)
+        assert_that(entry.online).is_true()
+        assert_that(registry.get("bbbbbb")).is_none()
+        assert_that(list(registry)).is_equal_to([entry])
+
+
+async def test_registry_marks_a_silent_device_offline_and_back_online():
+    on_online = Mock()
+    on_offline = Mock()
+    device = Mock(device_id="aaaaaa")
+    async with SwitcherDeviceRegistry(timedelta(0), 1, on_online, on_offline) as registry:
+        registry.update(device)
+        on_online.assert_called_once_with(registry.get("aaaaaa"))
+
+        registry.sweep()
+        assert_that(registry.get("aaaaaa").online).is_false()
+        on_offline.assert_called_once_with(registry.get("aaaaaa"))
+
+        registry.update(device)
+        assert_that(registry.get("aaaaaa").online).is_true()
+        assert_that(on_online.call_count).is_equal_to(2)
+
+
+async def test_registry_sweeps_offline_devices_periodically():
+    on_offline = Mock()
+    async with SwitcherDeviceRegistry(timedelta(milliseconds=10), 1, on_offline=on_offline) as registry:
+        registry.update(Mock(device_id="aaaaaa"))
+        await sleep(0.05)
+    on_offline.assert_called_once()
+
+
+async def test_registry_awaits_coroutine_callbacks():
+    on_online = AsyncMock()
+    on_offline = AsyncMock()
+    async with SwitcherDeviceRegistry(timedelta(0), 1, on_online, on_offline) as registry:
+        registry.update(Mock(device_id="aaaaaa"))
+        registry.sweep()
+        await sleep(0)
+        on_online.assert_awaited_once_with(registry.get("aaaaaa"))
+        on_offline.assert_awaited_once_with(registry.get("aaaaaa"))
+
+
+@patch("logging.Logger.exception")
+@mark.parametrize("callback_type", [Mock, AsyncMock])
+async def test_registry_logs_failing_callbacks(mock_exception, callback_type):
+    on_online = callback_type(side_effect=RuntimeError("dummy"))
+    on_offline = callback_type(side_effect=RuntimeError("dummy"))
+    async with SwitcherDeviceRegistry(timedelta(milliseconds=10), 1, on_online, on_offline) as registry:
+        registry.update(Mock(device_id="aaaaaa"))
+        await sleep(0.05)
+        assert_that(registry.get("aaaaaa").online).is_false()
+        registry.update(Mock(device_id="aaaaaa"))
+        await sleep(0.05)
+        assert_that(registry.get("aaaaaa").online).is_false()
+    assert_that(on_online.call_count).is_equal_to(2)
+    assert_that(on_offline.call_count).is_equal_to(2)
+    mock_exception.assert_called_with("registry callback failed")
+    assert_that(mock_exception.call_count).is_equal_to(4)
+
+
+async def test_registry_keeps_a_broadcasting_device_online():
+    on_offline = Mock()
+    async with SwitcherDeviceRegistry(timedelta(seconds=60), on_offline=on_offline) as registry:
+        registry.update(Mock(device_id="aaaaaa"))
+        registry.sweep()
+    on_offline.assert_not_called()
+
+
+async def test_registry_remove_a_device():
+    registry = SwitcherDeviceRegistry()
+    registry.update(Mock(device_id="aaaaaa"))
+    registry.remove("aaaaaa")
+    assert_that(registry).is_empty()
+    await registry.close()
+
+
+async def test_registry_with_an_invalid_missed_broadcasts_should_raise_error():
+    with raises(ValueError, match="missed broadcasts must be at least 1"):
+        SwitcherDeviceRegistry(missed_broadcasts=0)
+
+
+async def test_registry_finds_devices_by_the_indexed_fields():
+    async with SwitcherDeviceRegistry() as registry:
+        registry.update(_water_heater("aaaaaa", "10.0.3.15", DeviceState.ON))
+        registry.update(_water_heater("bbbbbb", "10.0.3.16", DeviceState.OFF, DeviceType.TOUCH))
+        registry.update(_water_heater("cccccc", "10.0.3.17", DeviceState.ON, DeviceType.TOUCH))
+        registry.update(_shutter("dddddd", "10.0.3.18"))
+
+        def found(**criteria):
+            return sorted(entry.device.device_id for entry in registry.find(**criteria))
+
+        assert_that(found(category=DeviceCategory.WATER_HEATER, device_state=DeviceState.ON)).is_equal_to(["aaaaaa", "cccccc"])
+        assert_that(found(device_type=DeviceType.TOUCH)).is_equal_to(["bbbbbb", "cccccc"])
+        assert_that(found(device_state=DeviceState.ON)).is_equal_to(["aaaaaa", "cccccc", "dddddd"])
+        assert_that(found(category=DeviceCategory.THERMOSTAT)).is_empty()
+        assert_that(found()).is_length(4)
+        assert_that(registry.get_by_ip_address("10.0.3.17").device.device_id).is_equal_to("cccccc")
+        assert_that(registry.get_by_mac_address("aa:bb:cc:bb:bb:bb").device.device_id).is_equal_to("bbbbbb")
+        assert_that(registry.get_by_ip_address("10.0.3.99")).is_none()
+
+
+async def test_registry_reindexes_an_updated_device():
+    async with SwitcherDeviceRegistry() as registry:
+        registry.update(_water_heater("aaaaaa", "10.0.3.15", DeviceState.OFF))
+        registry.update(_water_heater("aaaaaa", "10.0.3.16", DeviceState.ON))
+
+        assert_that(registry.find(device_state=DeviceState.OFF)).is_empty()
+        assert_that(registry.find(device_state=DeviceState.ON)).is_length(1)
+        assert_that(registry.get_by_ip_address("10.0.3.15")).is_none()
+        assert_that(registry.get_by_ip_address("10.0.3.16").device.device_id).is_equal_to("aaaaaa")
+
+        registry.remove("aaaaaa")
+        assert_that(registry.find(device_state=DeviceState.ON)).is_empty()
+        assert_that(registry.get_by_ip_address("10.0.3.16")).is_none()
+
+
+async def test_registry_finds_online_or_offline_devices():
+    async with SwitcherDeviceRegistry(timedelta(0), 1) as registry:
+        registry.update(_water_heater("aaaaaa", "10.0.3.15", DeviceState.ON))
+        registry.sweep()
+        registry.update(_water_heater("bbbbbb", "10.0.3.16", DeviceState.ON))
+
+        assert_that([entry.device.device_id for entry in registry.find(device_state=DeviceState.ON, online=True)]).is_equal_to(["bbbbbb"])
+        assert_that([entry.device.device_id for entry in registry.find(online=False)]).is_equal_to(["aaaaaa"])
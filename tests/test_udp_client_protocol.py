@@ -17,9 +17,11 @@
 from unittest.mock import Mock, patch
 
 from assertpy import assert_that
-from pytest import fixture, warns
+from pytest import fixture, mark, raises, warns
 
-from aioswitcher.bridge import UdpClientProtocol
+from aioswitcher.bridge import DatagramFilter, SourceRateLimiter, UdpClientProtocol
+
+switcher_datagram = b"\xfe\xf0" + bytes(16) + bytes.fromhex("aaaaaa") + bytes(144)
 
 
 @fixture
@@ -44,6 +46,98 @@ def test_given_datagram_when_sut_received_then_the_callback_is_called(sut_protoc
     mock_callback.assert_called_once_with(mock_datagram)
 
 
+@mark.parametrize("datagram", [b"\x00\x01" + bytes(163), switcher_datagram[:-1], b""])
+def test_given_a_filter_when_sut_received_a_foreign_datagram_then_the_callback_is_not_called(mock_callback, datagram):
+    datagram_filter = DatagramFilter()
+    sut_protocol = UdpClientProtocol(mock_callback, datagram_filter)
+    sut_protocol.datagram_received(datagram, ("1.2.3.4", 20002))
+    mock_callback.assert_not_called()
+    assert_that(datagram_filter.rejected).is_equal_to(1)
+    assert_that(datagram_filter.foreign).is_equal_to(1)
+    assert_that(sut_protocol.received).is_equal_to(1)
+
+
+def test_given_a_filter_when_sut_received_a_switcher_datagram_then_the_callback_is_called(mock_callback):
+    sut_protocol = UdpClientProtocol(mock_callback, DatagramFilter())
+    sut_protocol.datagram_received(switcher_datagram, ("1.2.3.4", 20002))
+    mock_callback.assert_called_once_with(switcher_datagram)
+
+
+@mark.parametrize("datagram_filter, expected_accepted", [
+    (DatagramFilter(allowed_addresses=["1.2.3.4"]), True),
+    (DatagramFilter(allowed_addresses=["4.3.2.1"]), False),
+    (DatagramFilter(denied_addresses=["1.2.3.4"]), False),
+    (DatagramFilter(denied_addresses=["4.3.2.1"]), True),
+    (DatagramFilter(allowed_addresses=["1.2.3.4"], denied_addresses=["1.2.3.4"]), False),
+    (DatagramFilter(allowed_device_ids=["aaaaaa"]), True),
+    (DatagramFilter(allowed_device_ids=["bbbbbb"]), False),
+    (DatagramFilter(denied_device_ids=["aaaaaa"]), False),
+    (DatagramFilter(denied_device_ids=["bbbbbb"]), True),
+])
+def test_datagram_filter_allow_and_deny_lists(datagram_filter, expected_accepted):
+    assert_that(datagram_filter.accepts(switcher_datagram, "1.2.3.4")).is_equal_to(expected_accepted)
+    assert_that(datagram_filter.rejected).is_equal_to(0 if expected_accepted else 1)
+
+
+@patch("aioswitcher.bridge.monotonic", return_value=100.0)
+def test_given_a_rate_limiter_when_a_source_floods_then_only_its_datagrams_are_dropped(mock_monotonic, mock_callback):
+    rate_limiter = SourceRateLimiter(rate=1, burst=2)
+    sut_protocol = UdpClientProtocol(mock_callback, rate_limiter=rate_limiter)
+    for _ in range(5):
+        sut_protocol.datagram_received(switcher_datagram, ("1.2.3.4", 20002))
+    sut_protocol.datagram_received(switcher_datagram, ("4.3.2.1", 20002))
+    assert_that(mock_callback.call_count).is_equal_to(3)
+    assert_that(rate_limiter.dropped).is_equal_to(3)
+    assert_that(rate_limiter.dropped_by_address).is_equal_to({"1.2.3.4": 3})
+
+
+@patch("aioswitcher.bridge.monotonic")
+def test_rate_limiter_refills_the_bucket_of_a_source_over_time(mock_monotonic):
+    rate_limiter = SourceRateLimiter(rate=2, burst=1)
+    mock_monotonic.return_value = 100.0
+    assert_that(rate_limiter.allow("1.2.3.4")).is_true()
+    assert_that(rate_limiter.allow("1.2.3.4")).is_false()
+    mock_monotonic.return_value = 100.25
+    assert_that(rate_limiter.allow("1.2.3.4")).is_false()
+    mock_monotonic.return_value = 100.5
+    assert_that(rate_limiter.allow("1.2.3.4")).is_true()
+
+
+@patch("aioswitcher.bridge.monotonic")
+def test_rate_limiter_forgets_idle_sources_when_tracking_too_many(mock_monotonic):
+    rate_limiter = SourceRateLimiter(rate=1, burst=1, max_sources=2)
+    mock_monotonic.return_value = 100.0
+    rate_limiter.allow("1.1.1.1")
+    mock_monotonic.return_value = 101.0
+    rate_limiter.allow("2.2.2.2")
+    rate_limiter.allow("3.3.3.3")
+    assert_that(rate_limiter._buckets).does_not_contain_key("1.1.1.1").contains_key("2.2.2.2", "3.3.3.3")
+
+
+@patch("aioswitcher.bridge.monotonic", return_value=100.0)
+def test_rate_limiter_tracks_at_most_max_sources_forgetting_the_least_recently_seen(mock_monotonic):
+    rate_limiter = SourceRateLimiter(rate=1, burst=1, max_sources=2)
+    for address in ("1.1.1.1", "2.2.2.2", "1.1.1.1", "2.2.2.2", "3.3.3.3", "3.3.3.3"):
+        rate_limiter.allow(address)
+    assert_that(rate_limiter._buckets).does_not_contain_key("1.1.1.1").contains_key("2.2.2.2", "3.3.3.3")
+    for index in range(1000):
+        rate_limiter.allow(f"10.0.{index // 256}.{index % 256}")
+        rate_limiter.allow(f"10.0.{index // 256}.{index % 256}")
+    assert_that(rate_limiter._buckets).is_length(2)
+    assert_that(rate_limiter.dropped_by_address).is_length(2).contains_key("10.0.3.230", "10.0.3.231")
+    assert_that(rate_limiter.dropped).is_equal_to(1003)
+
+
+@mark.parametrize("rate, burst, max_sources, error", [
+    (0, 1, 1, "rate must be positive"),
+    (1, 0, 1, "burst must be at least 1"),
+    (1, 1, 0, "max sources must be at least 1"),
+])
+def test_rate_limiter_with_invalid_arguments_should_raise_error(rate, burst, max_sources, error):
+    with raises(ValueError, match=error):
+        SourceRateLimiter(rate=rate, burst=burst, max_sources=max_sources)
+
+
 def test_error_received_with_no_error_should_issue_a_warning(sut_protocol):
     with warns(UserWarning, match="udp client received error"):
         sut_protocol.error_received(None)
@@ -18,7 +18,7 @@
 from pathlib import Path
 
 from assertpy import assert_that
-from pytest import mark
+from pytest import mark, raises
 
 from aioswitcher.bridge import DatagramParser
 from aioswitcher.device import DeviceState, DeviceType
@@ -81,3 +81,9 @@ def test_a_faulty_datagram(resource_path, type_suffix):
     sut_datagram = Path(f'{resource_path}_{type_suffix}.txt').read_text().replace('\n', '').encode()
     sut_parser = DatagramParser(unhexlify(sut_datagram))
     assert_that(sut_parser.is_switcher_originator()).is_false()
+
+
+def test_a_truncated_datagram_should_raise_error():
+    sut_parser = DatagramParser(b"\xfe\xf0" + bytes(98))
+    with raises(ValueError, match="datagram is too short for the requested value"):
+        sut_parser.get_power_consumption()